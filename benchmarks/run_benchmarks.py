@@ -0,0 +1,328 @@
+"""Benchmark the drive I/O loop and motion handshakes against simulated drives.
+
+Measures, for each I/O engine:
+
+- the worker cycle rate of a single drive polled as fast as possible,
+- the latency from `Drive.move()` being called to the setpoint being written
+  and the drive acknowledging the start, and the duration of the move,
+- the duration of `DriveManager.move()`, and
+- the pick cycles per hour of a `pathing_demo.py`-style sampling run.
+
+The drives are served by `libmotorctrl.simulator` on the same event loop as
+the benchmark, so no hardware is required. Results are written as JSON, to
+stdout or to the file given with `--output`, so that runs of different
+versions can be compared.
+
+Usage: python run_benchmarks.py [--engine {thread,asyncio,all}] [--output FILE]"""
+
+import argparse
+import asyncio
+import importlib.metadata
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from libmotorctrl import DriveManager, DriveTarget, InMemoryMetrics, IOEngine
+from libmotorctrl.drive import Drive
+from libmotorctrl.metrics import Histogram
+from libmotorctrl.route_planner import plan_picks
+from libmotorctrl.simulator import start_simulators
+
+# The pick workload, laid out as in `examples/support/constants.py`. All
+# coordinates are micrometer offsets from the calibration point.
+DISH_CENTER = (100_000, 0)
+DISH_RADIUS = 40_000
+WELL_ORIGIN = (267_790, 31_080)
+WELL_PITCH = 9_070
+WELL_ROWS = 8
+WELL_COLUMNS = 12
+STERILIZER_COORDINATES = (461_330, 87_950, 60_000)
+PETRI_DISH_DEPTH = 80_000
+WELL_DEPTH = 80_000
+
+ENGINES = {"thread": IOEngine.THREAD, "asyncio": IOEngine.ASYNCIO}
+
+
+class _SampledHistogram(Histogram):
+    """A histogram which also keeps every observed value."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, buckets):
+        super().__init__(buckets)
+        self.samples = []
+
+    def observe(self, value: float):
+        super().observe(value)
+        self.samples.append(value)
+
+
+class SampledMetrics(InMemoryMetrics):
+    """An in-memory metrics sink keeping the samples of every histogram, so
+    percentiles can be reported."""
+
+    def histogram(self, name: str, description: str, **labels: str) -> Histogram:
+        return self._get(
+            "histogram",
+            name,
+            description,
+            labels,
+            lambda: _SampledHistogram(self.buckets),
+        )
+
+
+def summarize(samples: list[float]) -> dict:
+    """Summarize a list of durations in seconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "min": ordered[0],
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "max": ordered[-1],
+    }
+
+
+async def bench_cycle_rate(engine: IOEngine, duration: float) -> dict:
+    """Count the worker cycles of an idle drive polled with no delay."""
+    (simulator,) = await start_simulators(1)
+    metrics = SampledMetrics()
+    drive = Drive(
+        "bench",
+        *simulator.endpoint,
+        engine=engine,
+        cycle_time=0,
+        autoconnect=False,
+        metrics=metrics,
+    )
+    try:
+        await drive.connect()
+        await drive.wait_for(lambda: drive.cycle_count > 0, "first status read")
+        start_cycles, start = drive.cycle_count, time.perf_counter()
+        await asyncio.sleep(duration)
+        cycles, elapsed = drive.cycle_count - start_cycles, time.perf_counter() - start
+    finally:
+        await drive.terminate()
+        await simulator.stop()
+
+    round_trip = metrics.get("modbus_round_trip_seconds", drive="bench")
+    return {
+        "cycles": cycles,
+        "duration": elapsed,
+        "cycles_per_second": cycles / elapsed,
+        "round_trip": summarize(round_trip.samples),
+    }
+
+
+async def bench_drive_move(engine: IOEngine, args: argparse.Namespace) -> dict:
+    """Time back-and-forth `Drive.move()` calls on a single homed drive."""
+    (simulator,) = await start_simulators(1)
+    metrics = SampledMetrics()
+    drive = Drive(
+        "bench",
+        *simulator.endpoint,
+        engine=engine,
+        cycle_time=args.cycle_time,
+        busy_cycle_time=args.busy_cycle_time,
+        autoconnect=False,
+        metrics=metrics,
+    )
+    durations = []
+    try:
+        await drive.connect()
+        await drive.initialize_reg()
+        await drive.home()
+        for index in range(args.moves):
+            start = time.perf_counter()
+            await drive.move(args.move_distance * (index % 2 + 1))
+            durations.append(time.perf_counter() - start)
+    finally:
+        await drive.terminate()
+        await simulator.stop()
+
+    return {
+        "distance": args.move_distance,
+        "duration": summarize(durations),
+        **{
+            event: summarize(
+                metrics.get("move_latency_seconds", drive="bench", event=event).samples
+            )
+            for event in ("setpoint_write", "ack_start", "is_moving", "motion_complete")
+        },
+    }
+
+
+async def create_manager(
+    engine: IOEngine, args: argparse.Namespace
+) -> tuple[DriveManager, list]:
+    """Start three simulated drives and a homed drive manager using them."""
+    simulators = await start_simulators(3)
+    manager = await DriveManager.create(
+        engine=engine,
+        cycle_time=args.cycle_time,
+        busy_cycle_time=args.busy_cycle_time,
+        metrics=SampledMetrics(),
+        endpoints=[simulator.endpoint for simulator in simulators],
+    )
+    await manager.home(DriveTarget.DriveZ)
+    await manager.home(DriveTarget.DriveX)
+    await manager.home(DriveTarget.DriveY)
+    return manager, simulators
+
+
+async def bench_manager_move(engine: IOEngine, args: argparse.Namespace) -> dict:
+    """Time `DriveManager.move()` calls to random points in the work area."""
+    rng = random.Random(args.seed)
+    manager, simulators = await create_manager(engine, args)
+    try:
+        for _ in range(args.moves):
+            await manager.move(
+                rng.randint(50_000, 450_000),
+                rng.randint(-100_000, 100_000),
+                rng.randint(0, 80_000),
+            )
+    finally:
+        await manager.terminate()
+        for simulator in simulators:
+            await simulator.stop()
+
+    return {
+        "duration": summarize(manager.metrics.get("move_duration_seconds").samples),
+    }
+
+
+def pick_workload(count: int, seed: int) -> list:
+    """Plan a sampling run of `count` colonies spread over a Petri dish."""
+    rng = random.Random(seed)
+    colonies = []
+    while len(colonies) < count:
+        x, y = rng.uniform(-1, 1), rng.uniform(-1, 1)
+        if x * x + y * y <= 1:
+            colonies.append(
+                (
+                    DISH_CENTER[0] + round(x * DISH_RADIUS),
+                    DISH_CENTER[1] + round(y * DISH_RADIUS),
+                )
+            )
+    wells = [
+        (WELL_ORIGIN[0] + column * WELL_PITCH, WELL_ORIGIN[1] + row * WELL_PITCH)
+        for row in range(WELL_ROWS)
+        for column in range(WELL_COLUMNS)
+    ]
+    return plan_picks(colonies, wells, sterilizer=STERILIZER_COORDINATES[:2])
+
+
+async def bench_picks(engine: IOEngine, args: argparse.Namespace) -> dict:
+    """Run a sampling run as in `pathing_demo.py`, counting pick cycles."""
+    picks = pick_workload(args.picks, args.seed)
+    manager, simulators = await create_manager(engine, args)
+    try:
+        await manager.move(*STERILIZER_COORDINATES)
+        start = time.perf_counter()
+        for pick in picks:
+            await manager.move(*pick.colony, PETRI_DISH_DEPTH)
+            await manager.move(*pick.well, WELL_DEPTH)
+            if pick.sterilize:
+                await manager.move(*STERILIZER_COORDINATES)
+                await asyncio.sleep(args.dwell)
+        elapsed = time.perf_counter() - start
+    finally:
+        await manager.terminate()
+        for simulator in simulators:
+            await simulator.stop()
+
+    return {
+        "picks": len(picks),
+        "dwell": args.dwell,
+        "duration": elapsed,
+        "picks_per_hour": len(picks) * 3600 / elapsed,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    engines = list(ENGINES) if args.engine == "all" else [args.engine]
+    results = {}
+    for name in engines:
+        engine = ENGINES[name]
+        logging.info("Benchmarking %s engine...", name)
+        results[name] = {
+            "cycle_rate": await bench_cycle_rate(engine, args.duration),
+            "drive_move": await bench_drive_move(engine, args),
+            "manager_move": await bench_manager_move(engine, args),
+            "pick_cycle": await bench_picks(engine, args),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engine", choices=[*ENGINES, "all"], default="all")
+    parser.add_argument(
+        "--cycle-time", type=float, default=0.1, help="drive polling period (s)"
+    )
+    parser.add_argument(
+        "--busy-cycle-time",
+        type=float,
+        default=None,
+        help="drive polling period while busy (s)",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=5.0, help="cycle rate measurement time (s)"
+    )
+    parser.add_argument("--moves", type=int, default=20, help="number of moves to time")
+    parser.add_argument(
+        "--move-distance",
+        type=int,
+        default=10_000,
+        help="length of the Drive.move() moves (um)",
+    )
+    parser.add_argument(
+        "--picks", type=int, default=5, help="number of colonies to pick"
+    )
+    parser.add_argument(
+        "--dwell", type=float, default=0.0, help="sterilizer dwell per pick (s)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="file to write the results to")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s: %(message)s",
+        level=logging.INFO if args.verbose else logging.WARNING,
+        datefmt="%H:%M:%S",
+    )
+    try:
+        version = importlib.metadata.version("libmotorctrl")
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+
+    report = {
+        "libmotorctrl": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "verbose")
+        },
+        "results": asyncio.run(run(args)),
+    }
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
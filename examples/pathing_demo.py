@@ -2,7 +2,8 @@ import asyncio
 import json
 import logging
 import sys
-from libmotorctrl import DriveManager, DriveTarget
+from libmotorctrl import DriveManager, DriveTarget, DwellScheduler
+from libmotorctrl.route_planner import plan_picks
 from support.constants import (
     STERILIZER_COORDINATES,
     PETRI_DISH_DEPTH,
@@ -13,6 +14,11 @@ from support.datastructures import Colony
 
 LOGLEVEL = logging.INFO
 STERILIZER_DWELL_DURATION = 5
+# Time for the loop to cool after the full dwell before it touches a colony.
+# It is overlapped with the travel to the colony, rather than spent waiting at
+# the sterilizer, and only ever delays the next pick. Replace it with the
+# measured cooling time of the loop in use.
+STERILIZER_COOLDOWN_DURATION = 3
 
 logging.basicConfig(
     format="%(asctime)s: %(threadName)s: %(message)s",
@@ -42,50 +48,47 @@ async def main():
 
     logging.info("Target colonies list acquired!")
 
+    scheduler = DwellScheduler(
+        drive_ctrl,
+        colony_depth=PETRI_DISH_DEPTH,
+        well_depth=WELL_DEPTH,
+        sterilizer=STERILIZER_COORDINATES,
+        dwell=STERILIZER_DWELL_DURATION,
+        cooldown=STERILIZER_COOLDOWN_DURATION,
+    )
     logging.info("Performing initial sterilization...")
-    await drive_ctrl.move(
-        STERILIZER_COORDINATES[0],
-        STERILIZER_COORDINATES[1],
-        STERILIZER_COORDINATES[2],
+    await scheduler.sterilize()
+
+    # Plan the colony order and the well for each colony to minimize travel
+    free_wells = [well for well in WELLS if not well.has_sample]
+    if len(free_wells) < len(target_colonies):
+        logging.error("No unused wells!")  # TODO Handle differently
+        sys.exit(1)
+    picks = plan_picks(
+        [(int(colony.x * 10**3), int(colony.y * 10**3)) for colony in target_colonies],
+        [(int(well.x * 10**3), int(well.y * 10**3)) for well in free_wells],
+        sterilizer=STERILIZER_COORDINATES[:2],
     )
-    logging.info("Sleeping for %s seconds...", STERILIZER_DWELL_DURATION)
-    await asyncio.sleep(STERILIZER_DWELL_DURATION)
 
-    for colony in target_colonies:
-        logging.info("Starting sampling cycle...")
+    async def prepare(pick):
+        # Runs while the previous pick is executed
+        colony = target_colonies[pick.colony_index]
         logging.info(
-            f"Target colony is at {colony.x:.2f}, {colony.y:.2f} in Petri dish {colony.dish}"
-        )
-        # Find the target well
-        well_target = None
-        for well_candidate in WELLS:
-            if not well_candidate.has_sample:
-                well_target = well_candidate
-                logging.info("Target well is %s", well_target.id)
-                break
-        if well_target is None:
-            logging.error("No unused wells!")  # TODO Handle differently
-            sys.exit(1)
-        # Target well has been found, execute sampling run
-        await drive_ctrl.move(
-            int(colony.x * 10**3), int(colony.y * 10**3), PETRI_DISH_DEPTH
-        )
-        logging.info("Colony collected, moving to well...")
-        await drive_ctrl.move(
-            int(well_target.x * 10**3), int(well_target.y * 10**3), WELL_DEPTH
+            f"Next colony is at {colony.x:.2f}, {colony.y:.2f} in Petri dish {colony.dish}"
         )
-        logging.info("Well reached, moving to sterilizer...")
+        logging.info("Next well is %s", free_wells[pick.well_index].id)
+
+    def deposited(pick):
+        well_target = free_wells[pick.well_index]
         well_target.has_sample = True
-        well_target.origin = colony.dish
-        await drive_ctrl.move(
-            STERILIZER_COORDINATES[0],
-            STERILIZER_COORDINATES[1],
-            STERILIZER_COORDINATES[2],
-        )
-        logging.info("Sleeping for %s seconds...", STERILIZER_DWELL_DURATION)
-        await asyncio.sleep(STERILIZER_DWELL_DURATION)
+        well_target.origin = target_colonies[pick.colony_index].dish
 
-    logging.info("Sampling complete!")
+    await scheduler.run(picks, prepare=prepare, on_deposit=deposited)
+    logging.info(
+        "Sampling complete! Waited %.1f s of %.1f s of cooldown at the colonies",
+        scheduler.wait_time,
+        len([pick for pick in picks if pick.sterilize]) * STERILIZER_COOLDOWN_DURATION,
+    )
     await drive_ctrl.move(490_000, -90_000, 0)
     await drive_ctrl.terminate()
 
@@ -1,2 +1,10 @@
-from .drive_manager import DriveManager, DriveTarget
-from .drive import DriveState, DriveError, DriveActionError
+from .drive_manager import AxisConfig, DriveManager, DriveTarget, MotionProfile
+from .drive_manager import Command, WaypointTiming
+from .command_queue import CommandPriority, CommandPreemptedError
+from .coordinator import Coordinator
+from .drive import DriveState, DriveError, DriveActionError, IOEngine
+from .collision import KeepOutZone
+from .telemetry import TelemetryRecorder, load_telemetry
+from .metrics import MetricsSink, InMemoryMetrics
+from .kinematics import AxisModel, GantryModel
+from .scheduler import DwellScheduler, Tool
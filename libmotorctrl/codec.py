@@ -0,0 +1,288 @@
+"""Encoding and decoding of the FHPP control and status registers.
+
+The CMMO-ST drive controllers exchange four 16-bit registers in each
+direction. The first two hold bitfields (CCON/CPOS/CDIR/SP1 for control,
+SCON/SPOS/SDIR/velocity for status), and the last two hold a signed 32-bit
+value (the setpoint or the actual position). In record selection mode, the
+third control byte holds the number of the record to start instead of CDIR.
+The bitfield layouts are declared below as tables of `BitField`s, and
+compiled into a `RegisterCodec` once on import.
+
+Decoding looks up each byte of the bitfield registers in a precomputed table
+of field values, and encoding looks up the field values of each byte in the
+inverse table, so both cost four lookups regardless of the number of fields.
+
+If the controller is configured for FHPP+ with the parameter channel (FPC),
+four further registers carry parameter requests and responses, which are
+encoded as `ParameterMessage`s.
+
+Consult sections 5.3 and 5.4 of the CMMO-ST FHPP datasheet for details on the
+mapping.
+
+@private"""
+
+from operator import attrgetter
+from typing import NamedTuple
+
+
+class BitField(NamedTuple):
+    """A field of the first two (bitfield) registers.
+
+    @private"""
+
+    name: str
+    """The attribute holding the field value."""
+    register: int
+    """The index of the register containing the field."""
+    shift: int
+    """The offset of the least significant bit of the field in the register."""
+    width: int = 1
+    """The number of bits in the field. Single-bit fields are decoded as
+    `bool`, wider fields as `int`."""
+    inverted: bool = False
+    """Whether the register bit is the complement of the field value."""
+
+
+# fmt: off
+CONTROL_LAYOUT = (
+    # CCON, see page 42, Table 5.14
+    BitField("drive_enabled",       0, 8),
+    BitField("operation_enabled",   0, 9),
+    BitField("brake_active",        0, 10, inverted=True),
+    BitField("reset",               0, 11),
+    # Bit 4 is reserved
+    BitField("fct_blocked",         0, 13),
+    BitField("operation_mode",      0, 14, 2),
+    # CPOS, see page 43, Table 5.15
+    BitField("halt_active",         0, 0, inverted=True),
+    BitField("positioning_start",   0, 1),
+    BitField("homing_start",        0, 2),
+    BitField("jog_positive",        0, 3),
+    BitField("jog_negative",        0, 4),
+    BitField("teach",               0, 5),
+    BitField("clear_path",          0, 6),
+    # CDIR, see page 44, Table 5.16
+    BitField("setpoint_mode",       1, 8),
+    BitField("control_mode",        1, 9, 2),
+    BitField("stroke_limit_bypass", 1, 13),
+    # SP 1
+    BitField("preselection",        1, 0, 8),
+)
+"""The layout of the control registers. The 32-bit value is the setpoint."""
+
+STATUS_LAYOUT = (
+    # SCON, see page 46, Table 5.21
+    BitField("drive_enabled",        0, 8),
+    BitField("operation_enabled",    0, 9),
+    BitField("warning_present",      0, 10),
+    BitField("fault_present",        0, 11),
+    BitField("load_applied",         0, 12),
+    BitField("fct_blocked",          0, 13),
+    BitField("operation_mode",       0, 14, 2),
+    # SPOS, see page 47, Table 5.22
+    BitField("halt_active",          0, 0, inverted=True),
+    BitField("ack_start",            0, 1),
+    BitField("motion_complete",      0, 2),
+    BitField("ack_teach",            0, 3),
+    BitField("is_moving",            0, 4),
+    BitField("following_error",      0, 5),
+    BitField("still_monitoring",     0, 6),
+    BitField("reference_set",        0, 7),
+    # SDIR, see page 48, Table 5.24
+    BitField("setpoint_mode",        1, 8),
+    BitField("control_mode",         1, 9, 2),
+    BitField("speed_limit_reached",  1, 12),
+    BitField("stroke_limit_reached", 1, 13),
+    # Drive actual velocity (%)
+    BitField("velocity_percent",     1, 0, 8),
+)
+"""The layout of the status registers. The 32-bit value is the actual
+position."""
+
+RECORD_CONTROL_LAYOUT = CONTROL_LAYOUT[:13] + (
+    # Record number, replacing CDIR in record selection mode
+    BitField("record_number",       1, 8, 8),
+    # Byte 4 is reserved
+)
+"""The layout of the control registers in record selection mode. The 32-bit
+value is reserved, and ignored by the controller."""
+# fmt: on
+
+# The bytes of the bitfield registers, as (register, shift), in the order the
+# field values are decoded
+_BYTES = ((0, 8), (0, 0), (1, 8), (1, 0))
+
+
+class RegisterCodec:
+    """A register layout compiled for encoding and decoding.
+
+    The fields of `layout` must be declared in decoding order: the high byte
+    of the first register, its low byte, then the high and low bytes of the
+    second register. Decoded values are returned in this order, followed by
+    the 32-bit value, so they can be passed positionally to a dataclass
+    declaring its fields in the same order.
+
+    @private"""
+
+    def __init__(self, layout: tuple[BitField, ...], value_name: str):
+        byte_order = [_BYTES.index((f.register, f.shift // 8 * 8)) for f in layout]
+        if byte_order != sorted(byte_order):
+            raise ValueError("Fields must be declared in decoding order")
+        for f in layout:
+            if f.shift % 8 + f.width > 8:
+                raise ValueError(f"Field {f.name} crosses a byte boundary")
+
+        self.names = tuple(f.name for f in layout) + (value_name,)
+        """The names of the decoded values, in order."""
+        self._getter = attrgetter(*self.names)
+        self._encoders = tuple(
+            (f.name, f.register, f.shift, (1 << f.width) - 1, f.inverted)
+            for f in layout
+        )
+
+        byte_fields = [
+            [f for f in layout if (f.register, f.shift // 8 * 8) == byte]
+            for byte in _BYTES
+        ]
+        self._tables = tuple(
+            self._byte_table(fields, byte[1])
+            for fields, byte in zip(byte_fields, _BYTES)
+        )
+        # attrgetter returns a bare value rather than a tuple for one name.
+        # Bytes are added in reverse so unused bits are encoded as zero.
+        self._byte_getters = tuple(
+            attrgetter(*(f.name for f in fields)) if fields else _no_fields
+            for fields in byte_fields
+        )
+        self._inverse_tables = tuple(
+            {
+                (values if len(fields) != 1 else values[0]): byte
+                for byte, values in reversed(list(enumerate(table)))
+            }
+            for fields, table in zip(byte_fields, self._tables)
+        )
+        self._value_getter = attrgetter(value_name)
+
+    @staticmethod
+    def _byte_table(fields: list[BitField], byte_shift: int) -> tuple[tuple, ...]:
+        """Precompute the field values for every value of a byte."""
+        table = []
+        for byte in range(256):
+            values = []
+            for f in fields:
+                value = (byte >> (f.shift - byte_shift)) & ((1 << f.width) - 1)
+                if f.width == 1:
+                    value = bool(value) != f.inverted
+                values.append(value)
+            table.append(tuple(values))
+        return tuple(table)
+
+    def decode(self, registers: list[int]) -> tuple:
+        """Decode four registers into a tuple of values ordered as `names`."""
+        reg0, reg1, value_high, value_low = registers
+        high0, low0, high1, low1 = self._tables
+        value = (value_high << 16) | value_low
+        if value & 0x8000_0000:
+            value -= 0x1_0000_0000
+        return (
+            high0[reg0 >> 8]
+            + low0[reg0 & 0xFF]
+            + high1[reg1 >> 8]
+            + low1[reg1 & 0xFF]
+            + (value,)
+        )
+
+    def encode(self, source) -> list[int]:
+        """Encode the attributes of `source` named in `names` into four
+        registers.
+
+        Raises a `ValueError` if a field value does not fit in its field."""
+        high0, low0, high1, low1 = self._inverse_tables
+        get_high0, get_low0, get_high1, get_low1 = self._byte_getters
+        try:
+            reg0 = (high0[get_high0(source)] << 8) | low0[get_low0(source)]
+            reg1 = (high1[get_high1(source)] << 8) | low1[get_low1(source)]
+        except (KeyError, TypeError):
+            # Values outside the tables, which are checked field by field
+            reg0, reg1 = self._encode_fields(source)
+        value = self._value_getter(source) & 0xFFFF_FFFF
+        return [reg0, reg1, value >> 16, value & 0xFFFF]
+
+    def _encode_fields(self, source) -> list[int]:
+        """Encode the bitfield registers field by field.
+
+        Raises a `ValueError` if a value does not fit in its field."""
+        *values, _ = self._getter(source)
+        registers = [0, 0]
+        for field_value, (name, register, shift, mask, inverted) in zip(
+            values, self._encoders
+        ):
+            field_value = int(field_value)
+            if not 0 <= field_value <= mask:
+                raise ValueError(
+                    f"Value {field_value} of field {name} does not fit in "
+                    f"{mask.bit_length()} bits"
+                )
+            registers[register] |= (field_value ^ inverted) << shift
+        return registers
+
+
+def _no_fields(source) -> tuple:
+    return ()
+
+
+CONTROL_CODEC = RegisterCodec(CONTROL_LAYOUT, "setpoint")
+"""@private"""
+
+RECORD_CONTROL_CODEC = RegisterCodec(RECORD_CONTROL_LAYOUT, "setpoint")
+"""@private"""
+
+STATUS_CODEC = RegisterCodec(STATUS_LAYOUT, "position")
+"""@private"""
+
+
+class ParameterMessage(NamedTuple):
+    """A request or response on the FHPP parameter channel (FPC).
+
+    See the parameter channel (FPC) section of the CMMO-ST FHPP datasheet.
+
+    @private"""
+
+    identifier: int
+    """The request identifier (ReqID) or response identifier (ResID)."""
+    pnu: int
+    """The parameter number."""
+    subindex: int = 0
+    """The subindex of the parameter, e.g. the record number for the
+    parameters of the record table."""
+    value: int = 0
+    """The (signed 32-bit) parameter value."""
+
+
+def encode_parameter(message: ParameterMessage) -> list[int]:
+    """Encode a parameter channel message into four registers.
+
+    The first byte is reserved, followed by the subindex, the identifier
+    and parameter number (4 and 12 bits), and the value.
+
+    @private"""
+    value = message.value & 0xFFFF_FFFF
+    return [
+        message.subindex & 0xFF,
+        ((message.identifier & 0xF) << 12) | (message.pnu & 0xFFF),
+        value >> 16,
+        value & 0xFFFF,
+    ]
+
+
+def decode_parameter(registers: list[int]) -> ParameterMessage:
+    """Decode four parameter channel registers.
+
+    @private"""
+    subindex, parameter_id, value_high, value_low = registers
+    value = (value_high << 16) | value_low
+    if value & 0x8000_0000:
+        value -= 0x1_0000_0000
+    return ParameterMessage(
+        parameter_id >> 12, parameter_id & 0xFFF, subindex & 0xFF, value
+    )
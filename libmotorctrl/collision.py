@@ -0,0 +1,61 @@
+"""Keep-out regions used to plan the z-axis clearance of movements.
+
+A `KeepOutZone` describes a rectangular region of the work area containing
+obstacles (e.g. a well plate, the walls of a Petri dish or the sterilizer),
+and the depth the picker-head must be raised to in order to pass over it.
+See `DriveManager.set_keepout_zones()`.
+
+All coordinates are micrometer offsets from the calibration point, as used by
+`DriveManager.move()`. Depths are z-axis coordinates, which increase
+downwards."""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class KeepOutZone:
+    """A rectangular region which can only be crossed above a certain depth."""
+
+    x_min: int
+    x_max: int
+    y_min: int
+    y_max: int
+    depth: int
+    """The deepest z-axis position at which the picker-head clears every
+    obstacle in the region."""
+
+    def intersects(self, start: tuple[int, int], end: tuple[int, int]) -> bool:
+        """Check whether the straight segment from `start` to `end` touches
+        the region. Segments ending inside the region count as touching it."""
+        # Liang-Barsky clipping of the segment against the rectangle
+        t_min, t_max = 0.0, 1.0
+        for origin, delta, low, high in (
+            (start[0], end[0] - start[0], self.x_min, self.x_max),
+            (start[1], end[1] - start[1], self.y_min, self.y_max),
+        ):
+            if delta == 0:
+                if not low <= origin <= high:
+                    return False
+                continue
+            t_low = (low - origin) / delta
+            t_high = (high - origin) / delta
+            if t_low > t_high:
+                t_low, t_high = t_high, t_low
+            t_min = max(t_min, t_low)
+            t_max = min(t_max, t_high)
+            if t_min > t_max:
+                return False
+        return True
+
+
+def clearance_depth(
+    zones: Iterable[KeepOutZone], start: tuple[int, int], end: tuple[int, int]
+) -> int | None:
+    """Get the deepest z-axis position at which the picker-head can travel
+    in a straight line from `start` to `end`.
+
+    Returns `None` if the segment does not touch any of the zones, in which
+    case it can be travelled at any depth."""
+    depths = [zone.depth for zone in zones if zone.intersects(start, end)]
+    return min(depths, default=None)
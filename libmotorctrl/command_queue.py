@@ -0,0 +1,178 @@
+"""Serialized execution of drive commands with priorities and preemption.
+
+Every drive action of a `DriveManager` runs as a command through its
+`CommandQueue`. Each command claims the axes it uses, and runs once all of
+them are free and no command ahead of it in the queue is waiting for any of
+them, so commands on each axis run one at a time, in order of priority and
+then submission. Commands on different axes run concurrently.
+
+A command with `CommandPriority.STOP` preempts lower-priority commands on its
+axes: the commands running on them are cancelled, and those waiting for them
+are dropped, failing with a `CommandPreemptedError`."""
+
+import asyncio
+import bisect
+import itertools
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+
+class CommandPriority(IntEnum):
+    """The priority of a command. Commands with lower values run first."""
+
+    STOP = 0
+    """Preempts all lower-priority commands on the same axes."""
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+command_priority: ContextVar[CommandPriority] = ContextVar(
+    "command_priority", default=CommandPriority.NORMAL
+)
+"""The priority of commands which do not specify one. Set per task by
+`DriveManager.submit()`."""
+
+
+class CommandPreemptedError(Exception):
+    """Raised by a command which was preempted by a stop command.
+
+    Unlike other errors during a motion, this does not terminate the drives
+    (see `DriveManager.stop()`)."""
+
+    pass
+
+
+@dataclass(order=True)
+class _Entry:
+    """A command in the queue."""
+
+    priority: CommandPriority
+    sequence: int
+    axes: frozenset[str] = field(compare=False)
+    granted: asyncio.Future = field(compare=False)
+    runner: asyncio.Task = field(default=None, compare=False)
+    preempted: bool = field(default=False, compare=False)
+
+    def preempted_error(self) -> CommandPreemptedError:
+        return CommandPreemptedError(
+            f"Command on {', '.join(sorted(self.axes))} was preempted"
+        )
+
+
+class CommandQueue:
+    """Runs commands on named axes one at a time per axis."""
+
+    def __init__(self):
+        self._pending: list[_Entry] = []
+        self._running: dict[str, _Entry] = {}
+        self._sequence = itertools.count()
+
+    @property
+    def pending(self) -> int:
+        """The number of commands waiting to run."""
+        return len(self._pending)
+
+    async def run(
+        self,
+        axes: Iterable[str],
+        action: Callable[[], Awaitable],
+        priority: CommandPriority = None,
+    ):
+        """Run `action()` as a command on `axes` once they are free, and
+        return its result.
+
+        `priority` defaults to the `command_priority` of the current
+        context. The action is run in its own task, so that preempting it
+        does not cancel the caller; if the caller is cancelled, the action
+        is cancelled and its axes are released once it has finished.
+
+        Raises a `CommandPreemptedError` if the command is preempted."""
+
+        if priority is None:
+            priority = command_priority.get()
+        entry = _Entry(
+            priority,
+            next(self._sequence),
+            frozenset(axes),
+            asyncio.get_running_loop().create_future(),
+        )
+        if priority == CommandPriority.STOP:
+            self._preempt(entry.axes)
+        bisect.insort(self._pending, entry)
+        self._dispatch()
+
+        try:
+            await entry.granted
+        except BaseException:
+            if entry in self._pending:
+                self._pending.remove(entry)
+            elif entry.granted.done() and not entry.granted.cancelled():
+                # Granted, but cancelled before it could run
+                self._release(entry)
+            self._dispatch()
+            raise
+        if entry.preempted:
+            # Preempted before the caller resumed to start it
+            self._release(entry)
+            self._dispatch()
+            raise entry.preempted_error()
+
+        entry.runner = asyncio.create_task(action())
+        try:
+            return await asyncio.shield(entry.runner)
+        except asyncio.CancelledError:
+            if not entry.runner.done():
+                # The caller was cancelled; wait for the action to clean up
+                entry.runner.cancel()
+                await asyncio.wait([entry.runner])
+                if not entry.runner.cancelled():
+                    entry.runner.exception()
+                raise
+            if entry.preempted:
+                raise entry.preempted_error() from None
+            raise
+        finally:
+            self._release(entry)
+            self._dispatch()
+
+    def _preempt(self, axes: frozenset[str]):
+        """Cancel the running commands and drop the waiting commands of lower
+        than `CommandPriority.STOP` priority on any of `axes`."""
+
+        running = {id(entry): entry for entry in self._running.values()}
+        for entry in running.values():
+            if entry.priority != CommandPriority.STOP and entry.axes & axes:
+                entry.preempted = True
+                if entry.runner is not None:
+                    entry.runner.cancel()
+                logging.warning("Preempting command on %s", sorted(entry.axes))
+
+        for entry in list(self._pending):
+            if entry.priority != CommandPriority.STOP and entry.axes & axes:
+                self._pending.remove(entry)
+                entry.granted.set_exception(entry.preempted_error())
+
+    def _release(self, entry: _Entry):
+        """Free the axes of a finished command."""
+        for axis in entry.axes:
+            if self._running.get(axis) is entry:
+                del self._running[axis]
+
+    def _dispatch(self):
+        """Start every waiting command whose axes are free, in queue order.
+
+        A command also waits while an earlier command is waiting for any of
+        its axes, so later commands cannot overtake it."""
+
+        blocked = set(self._running)
+        for entry in list(self._pending):
+            if entry.axes.isdisjoint(blocked):
+                self._pending.remove(entry)
+                for axis in entry.axes:
+                    self._running[axis] = entry
+                entry.granted.set_result(None)
+            blocked |= entry.axes
@@ -0,0 +1,210 @@
+"""Running several colony-picking robots from one process via the
+`Coordinator` class.
+
+Each robot is driven by its own `DriveManager`, and is given its own queue of
+picks (see `libmotorctrl.route_planner`). The coordinator executes the queues
+of every robot concurrently on a single event loop. Its drive managers use
+the `IOEngine.ASYNCIO` engine by default, so the register exchange of every
+drive of every robot also runs on that loop, without any worker threads.
+
+```python
+from libmotorctrl import Coordinator
+from libmotorctrl.route_planner import plan_picks
+
+coordinator = Coordinator()
+for name, endpoints in ROBOTS.items():
+    await coordinator.add_robot(
+        name,
+        colony_depth=80_000,
+        well_depth=80_000,
+        sterilizer=(461_330, 87_950, 60_000),
+        sterilizer_dwell=5,
+        endpoints=endpoints,
+    )
+    # Home the robot via coordinator.robots[name].manager
+    coordinator.submit(name, plan_picks(colonies[name], wells[name]))
+await coordinator.run()
+print(coordinator.get_throughput().picks_per_hour)
+await coordinator.terminate()
+```"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from .drive import IOEngine
+from .drive_manager import DriveManager, DriveManagerError
+from .route_planner import Pick, plan_waypoints
+
+
+@dataclass
+class Throughput:
+    """The picks completed by one or more robots over a run."""
+
+    picks: int
+    """The number of picks completed."""
+    elapsed: float
+    """The time in seconds spent running."""
+
+    @property
+    def picks_per_hour(self) -> float:
+        """The rate at which picks were completed."""
+        return self.picks * 3600 / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class Robot:
+    """A robot hosted by a `Coordinator`, and its queue of picks."""
+
+    name: str
+    """The name of the robot."""
+    manager: DriveManager
+    """The drive manager of the robot."""
+    colony_depth: int
+    """The z-axis depth to lower to at each colony."""
+    well_depth: int
+    """The z-axis depth to lower to at each well."""
+    sterilizer: tuple[int, int, int] = None
+    """The (x, y, z) position of the sterilizer, visited after each pick
+    that requires sterilization."""
+    sterilizer_dwell: float = 0
+    """The time in seconds to remain at the sterilizer."""
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue, repr=False)
+    """The picks waiting to be executed."""
+    completed: int = 0
+    """The number of picks completed."""
+    error: Exception = None
+    """The error which stopped the robot, if any."""
+
+
+class Coordinator:
+    """Runs the pick queues of several robots concurrently.
+
+    Robots are added with `add_robot()` and given picks with `submit()`.
+    `run()` then executes the queued picks of every robot, each robot
+    working through its own queue in order while the others move, until
+    all of the queues are empty."""
+
+    def __init__(self):
+        self.robots: dict[str, Robot] = {}
+        """The robots, by name."""
+        self._elapsed = 0.0
+
+    async def add_robot(
+        self,
+        name: str,
+        colony_depth: int,
+        well_depth: int,
+        sterilizer: tuple[int, int, int] = None,
+        sterilizer_dwell: float = 0,
+        manager: DriveManager = None,
+        **manager_args,
+    ) -> Robot:
+        """Add a robot, creating its drive manager.
+
+        `colony_depth`, `well_depth`, `sterilizer` and `sterilizer_dwell`
+        describe how picks are executed (see `Robot`). Unless an existing
+        `manager` is provided, the drive manager is created with
+        `DriveManager.create()`, passing it any other keyword arguments;
+        the `IOEngine.ASYNCIO` engine is used unless another `engine` is
+        given. As the robots share axis names, each robot needs its own
+        `telemetry` recorder."""
+
+        if name in self.robots:
+            raise DriveManagerError(f"Duplicate robot name {name}")
+        if manager is None:
+            manager_args.setdefault("engine", IOEngine.ASYNCIO)
+            manager = await DriveManager.create(**manager_args)
+        robot = Robot(
+            name=name,
+            manager=manager,
+            colony_depth=colony_depth,
+            well_depth=well_depth,
+            sterilizer=sterilizer,
+            sterilizer_dwell=sterilizer_dwell,
+        )
+        self.robots[name] = robot
+        logging.info("Robot %s added", name)
+        return robot
+
+    def submit(self, name: str, picks: Iterable[Pick]):
+        """Queue picks for a robot, to be executed in order.
+
+        Picks may be submitted while the coordinator is running, but not
+        to a robot which was stopped by an error."""
+
+        robot = self.robots[name]
+        if robot.error is not None:
+            raise DriveManagerError(f"Robot {name} was stopped by an error")
+        for pick in picks:
+            robot.queue.put_nowait(pick)
+
+    async def run(self):
+        """Execute the queued picks of every robot until all queues are empty.
+
+        If a pick fails, that robot is stopped and its remaining picks
+        are dropped, while the other robots carry on. Once every queue is
+        empty, the errors of any robots which failed are raised as an
+        `ExceptionGroup`."""
+
+        start = time.monotonic()
+        running = [robot for robot in self.robots.values() if robot.error is None]
+        workers = [
+            asyncio.create_task(self._work(robot), name=robot.name) for robot in running
+        ]
+        try:
+            for robot in running:
+                await robot.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._elapsed += time.monotonic() - start
+
+        errors = [robot.error for robot in running if robot.error is not None]
+        if errors:
+            raise ExceptionGroup("Robots stopped by errors", errors)
+
+    async def _work(self, robot: Robot):
+        """Execute the picks of a robot as they are queued."""
+        while True:
+            pick = await robot.queue.get()
+            try:
+                await robot.manager.execute_path(
+                    plan_waypoints(
+                        [pick],
+                        robot.colony_depth,
+                        robot.well_depth,
+                        robot.sterilizer,
+                        robot.sterilizer_dwell,
+                    )
+                )
+            except Exception as e:
+                logging.critical("Robot %s stopped: %s", robot.name, e)
+                robot.error = e
+                robot.queue.task_done()
+                # Drop the remaining picks so the queue is seen as empty
+                while not robot.queue.empty():
+                    robot.queue.get_nowait()
+                    robot.queue.task_done()
+                return
+            robot.completed += 1
+            robot.queue.task_done()
+
+    def get_throughput(self, name: str = None) -> Throughput:
+        """Get the picks completed by all robots (or only the named robot)
+        over the time spent in `run()`."""
+
+        if name is None:
+            picks = sum(robot.completed for robot in self.robots.values())
+        else:
+            picks = self.robots[name].completed
+        return Throughput(picks=picks, elapsed=self._elapsed)
+
+    async def terminate(self):
+        """Terminate the drive managers of every robot."""
+
+        async with asyncio.TaskGroup() as term_tg:
+            for robot in self.robots.values():
+                term_tg.create_task(robot.manager.terminate())
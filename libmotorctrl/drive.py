@@ -1,12 +1,21 @@
 import asyncio
+import inspect
 import json
 import logging
 import threading
 import time
+from collections.abc import Callable, Sequence
 from enum import Enum, IntEnum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from pymodbus.client import ModbusTcpClient
+from typing import NamedTuple
+from pymodbus.client import AsyncModbusTcpClient, ModbusTcpClient
+from pymodbus.exceptions import ModbusException
+from pymodbus.pdu import ExceptionResponse, ModbusExceptions
+from .codec import CONTROL_CODEC, RECORD_CONTROL_CODEC, STATUS_CODEC
+from .codec import ParameterMessage, decode_parameter, encode_parameter
+from .metrics import InMemoryMetrics, MetricsSink
+from .telemetry import TelemetryRecorder
 
 logging.getLogger("pymodbus").setLevel(logging.WARNING)
 
@@ -32,6 +41,17 @@ class DriveState(Enum):
     """Drive operation is not enabled."""
 
 
+class IOEngine(Enum):
+    """The engine used to exchange registers with the drive controllers."""
+
+    THREAD = 0
+    """Each drive spawns a worker thread with a blocking Modbus client."""
+    ASYNCIO = 1
+    """Each drive runs its register exchange as a task on the running event
+    loop with an asynchronous Modbus client. Drives must be connected with
+    `Drive.connect()` from within the event loop before use."""
+
+
 class DriveActionError(Exception):
     """An error raised by a drive interface method."""
 
@@ -86,17 +106,49 @@ class ControlMode(IntEnum):
     RESERVED = 0b11
 
 
+# Identifiers of the parameter channel (FPC) requests and responses used by
+# the `Drive`, and the parameters of the record table. Each record table
+# parameter is an array, indexed by the record number.
+REQUEST_NONE = 0
+REQUEST_READ = 1
+REQUEST_WRITE = 3
+REQUEST_READ_ARRAY = 6
+REQUEST_WRITE_ARRAY = 8
+RESPONSE_ERROR = 7
+PNU_RECORD_POSITION = 404
+PNU_RECORD_VELOCITY = 406
+
+MAX_RECORDS = 31
+"""The number of positioning records in the record table. Record 0 is
+reserved for homing."""
+
+
+class MotionRecord(NamedTuple):
+    """A positioning record for the record table of a drive controller."""
+
+    position: int
+    """The target position in micrometers."""
+    velocity: int | None = None
+    """The velocity of the move in micrometers per second, or `None` to keep
+    the velocity configured in the record table."""
+
+
 # The CMMO-ST drive controllers have separate control registers (write-only)
 # and status registers (read-only). They are subtly different. Consult sections
 # 5.3 and 5.4 of the CMMO-ST FHPP datasheet for details on the mapping.
 
-# The classes defined below contain the full contents of these registers.
+# The classes defined below contain the full contents of these registers. Their
+# bit layouts are declared in the `codec` module.
 
 
 @dataclass(slots=True)
 class ControlRegisters:
     """The control registers written to the drive controller.
 
+    Assigning a new value to any register field sets `dirty` and calls
+    `on_change`, so the drive only needs to write the registers out when
+    they have changed.
+
     @private"""
 
     # CCONT
@@ -122,11 +174,31 @@ class ControlRegisters:
     preselection: int
     # SP 2
     setpoint: int
+    # Record number, sent instead of CDIR in record selection mode
+    record_number: int = 0
+    # Change tracking
+    dirty: bool = field(default=True, repr=False, compare=False)
+    on_change: Callable[[], None] = field(default=None, repr=False, compare=False)
 
+    def __setattr__(self, name, value):
+        if name in ("dirty", "on_change") or getattr(self, name, None) == value:
+            object.__setattr__(self, name, value)
+            return
 
-@dataclass(slots=True)
-class StatusRegisters:
-    """The status registers read from the drive controller.
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "dirty", True)
+        on_change = getattr(self, "on_change", None)
+        if on_change is not None:
+            on_change()
+
+
+class StatusRegisters(NamedTuple):
+    """A snapshot of the status registers read from the drive controller.
+
+    Snapshots are immutable: the worker publishes a new one after every read
+    by replacing `Drive.reg_status`, so a snapshot never mixes values from two
+    cycles. The register fields are declared in the same order as in
+    `codec.STATUS_LAYOUT`, so they can be constructed from the decoded values.
 
     @private"""
 
@@ -156,27 +228,179 @@ class StatusRegisters:
     velocity_percent: int
     # Drive actual position (sinc)
     position: int
+    # When the registers were read, as a `time.monotonic()` timestamp
+    timestamp: float = 0.0
+    # The number of the worker cycle the registers were read in, matching
+    # `Drive.cycle_count` once the cycle completes
+    cycle: int = 0
+    # Set while the connection to the drive is lost, in which case the fields
+    # above hold the last values read
+    stale: bool = False
+
+
+@dataclass(slots=True)
+class _MoveTrace:
+    """When each stage of a positioning command was reached, as
+    `time.monotonic()` timestamps.
+
+    Updated by the worker as it writes the control registers and reads each
+    status snapshot."""
+
+    started: float
+    setpoint_write: float | None = None
+    ack_start: float | None = None
+    is_moving: float | None = None
+    motion_complete: float | None = None
+
+    def update(self, status: StatusRegisters):
+        if self.ack_start is None:
+            if not status.ack_start:
+                return
+            self.ack_start = status.timestamp
+        if self.is_moving is None and status.is_moving:
+            self.is_moving = status.timestamp
+        if self.motion_complete is None and status.motion_complete:
+            self.motion_complete = status.timestamp
 
 
 class Drive:
     """Object representing an active drive controller.
 
-    A worker thread is spawned for each drive controller to continually
-    read/write the registers values (from the `ControlRegisters` and
-    `StatusRegisters` classes defined above). The methods within this class
-    operate by updating the internal `ControlRegisters` object, then waiting
-    for the worker thread to write the register values out to the controller.
-
-    The worker thread is defined by the `worker()` method.
+    A worker is run for each drive controller to continually read/write the
+    registers values (from the `ControlRegisters` and `StatusRegisters` classes
+    defined above). The methods within this class operate by updating the
+    internal `ControlRegisters` object, then waiting for the worker to write the
+    register values out to the controller.
+
+    The register exchange is defined by the `io_loop()` coroutine. With the
+    default `IOEngine.THREAD` engine it runs in a worker thread spawned when the
+    drive is constructed (see `worker()`), or by `connect()` if `autoconnect` is
+    unset. With `IOEngine.ASYNCIO` it runs as a task on the caller's event loop,
+    started by `connect()`, so control register updates are never interleaved
+    with a write in progress.
+
+    After every status read the worker wakes any coroutines waiting on a status
+    change, so handshakes with the drive advance as soon as the drive
+    acknowledges each step. Each step is
+    bounded by `step_timeout` seconds, and waiting for a motion to complete is
+    bounded by `motion_timeout` seconds.
+
+    The worker polls the drive every `cycle_time` seconds. If `busy_cycle_time`
+    is set, the worker instead polls at that (faster) rate while the drive is
+    moving or a handshake is in progress, and backs off to `cycle_time` when the
+    drive is idle.
+
+    If `combined_io` is set, each cycle exchanges the control and status
+    registers in a single Read/Write Multiple Registers (FC23) transaction (see
+    `reg_exchange()`), falling back to separate write and read requests if the
+    controller does not support it.
+
+    The control registers are written as soon as they change. While they are
+    unchanged, they are only rewritten every `keepalive` seconds; the status
+    registers are still read every cycle.
+
+    The last `history_size` status snapshots are kept in a ring buffer (see
+    `get_status_history()`), from which the velocity and settle time of the
+    drive are derived without additional reads. If a `telemetry` recorder is
+    given, the raw status registers read on every cycle are also recorded to
+    it.
+
+    The Modbus round-trip time of every cycle and the latency of each stage of
+    every move are reported to `metrics` (see the `metrics` module).
+
+    Besides direct positioning (`start_move()`), moves can be started from the
+    record table of the controller (`start_record()`), whose records are
+    written through the parameter channel with `upload_records()`. The drive
+    switches between direct and record selection mode as required.
+
+    Each Modbus request is bounded by `request_timeout` seconds. If a cycle
+    fails for any reason, the status registers are flagged as stale and the
+    worker reconnects to the drive, waiting `reconnect_delay` seconds between
+    attempts and doubling the delay up to `reconnect_delay_max` seconds. Any
+    waits in progress fail immediately, and status queries fail until the
+    connection is restored.
 
     @private"""
 
-    def __init__(self, name: str, ip_addr: str):
+    def __init__(
+        self,
+        name: str,
+        ip_addr: str,
+        port: int = 502,
+        step_timeout: float = 2.0,
+        motion_timeout: float = 60.0,
+        engine: IOEngine = IOEngine.THREAD,
+        cycle_time: float = 0.1,
+        busy_cycle_time: float = None,
+        combined_io: bool = True,
+        keepalive: float = 1.0,
+        autoconnect: bool = True,
+        reconnect_delay: float = 0.1,
+        reconnect_delay_max: float = 5.0,
+        request_timeout: float = 1.0,
+        history_size: int = 64,
+        telemetry: TelemetryRecorder = None,
+        metrics: MetricsSink = None,
+    ):
         self.name = name
         self.ip_addr = ip_addr
+        self.port = port
+        self.engine = engine
+        self.step_timeout = step_timeout
+        self.motion_timeout = motion_timeout
+        self.cycle_time = cycle_time
+        self.busy_cycle_time = busy_cycle_time
+        self.combined_io = combined_io
+        self.keepalive = keepalive
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_delay_max = reconnect_delay_max
+        self.request_timeout = request_timeout
         self.terminated = False
-        self.client = ModbusTcpClient(ip_addr)
-        self.error_code = None
+        self.cycle_count = 0
+        self.connection_losses = 0
+        self._loop = None
+        self._status_waiters = set()
+        self._io_loop = None
+        self._io_wakeup = None
+        self._last_write = 0.0
+        self._status_raw = None
+        self._status_values = None
+        # Snapshots are stored at the index of their cycle number modulo the
+        # history size
+        self._status_history = [None] * history_size
+        self.telemetry = telemetry
+        if telemetry is not None:
+            self._telemetry_axis = telemetry.add_axis(name)
+        self.metrics = InMemoryMetrics() if metrics is None else metrics
+        self._round_trip = self.metrics.histogram(
+            "modbus_round_trip_seconds",
+            "Duration of the Modbus transactions of a worker cycle",
+            drive=name,
+        )
+        self._cycle_errors = self.metrics.counter(
+            "modbus_errors_total", "Worker cycles which failed", drive=name
+        )
+        self._move_latency = {
+            event: self.metrics.histogram(
+                "move_latency_seconds",
+                "Time from a move being started to each stage being reached",
+                drive=name,
+                event=event,
+            )
+            for event in ("setpoint_write", "ack_start", "is_moving", "motion_complete")
+        }
+        self._move_trace = None
+        # Parameter channel registers to write on each cycle while a request
+        # is in progress, and the last response read
+        self._parameter_out = None
+        self._parameter_in = None
+        self._parameter_lock = asyncio.Lock()
+        self.client = None
+        # The diagnostic code is only read from the drive when a fault or
+        # warning is flagged (or on request), and cached until it clears
+        self.error_code = bytes(1)
+        self._exception_flags = (False, False)
+        self._exception_requested = False
         self.reg_control = ControlRegisters(
             # CCON
             drive_enabled=False,
@@ -202,6 +426,7 @@ class Drive:
             # SP 2
             setpoint=0,
         )
+        self.reg_control.on_change = self._wake_worker
         self.reg_status = StatusRegisters(
             # SCON
             drive_enabled=False,
@@ -231,6 +456,29 @@ class Drive:
             position=0,
         )
 
+        self.write_worker = None
+        self.io_task = None
+
+        if self.engine == IOEngine.THREAD and autoconnect:
+            self._connect_thread()
+
+    def _new_client(self):
+        if self.engine == IOEngine.THREAD:
+            return ModbusTcpClient(
+                self.ip_addr, port=self.port, timeout=self.request_timeout
+            )
+        # Reconnecting is handled by the worker (see `_reconnect()`) rather
+        # than in the background by the client
+        return AsyncModbusTcpClient(
+            self.ip_addr,
+            port=self.port,
+            timeout=self.request_timeout,
+            reconnect_delay=0,
+        )
+
+    def _connect_thread(self):
+        """Connect the blocking client and start the worker thread."""
+        self.client = self._new_client()
         self.client.connect()
         if not self.client.connected:
             logging.critical("Connection failed!")
@@ -243,176 +491,612 @@ class Drive:
         logging.debug("Starting write thread...")
         self.write_worker.start()
 
+    @property
+    def connected(self) -> bool:
+        """Whether the register exchange with the drive has been started."""
+        return self.write_worker is not None or self.io_task is not None
+
+    async def connect(self):
+        """Connect to the drive controller and start the register exchange.
+
+        Drives using the `IOEngine.THREAD` engine are connected when
+        constructed unless `autoconnect` is unset, in which case the
+        blocking connect is run in a separate thread so that several
+        drives can be connected concurrently."""
+        if self.connected:
+            return
+
+        if self.engine == IOEngine.THREAD:
+            await asyncio.to_thread(self._connect_thread)
+            return
+
+        self.client = self._new_client()
+        await self.client.connect()
+        if not self.client.connected:
+            logging.critical("Connection failed!")
+            raise DriveActionError("Connection failed!")
+
+        logging.debug("Client is connected!")
+        self.io_task = asyncio.create_task(self.io_loop(), name=self.name)
+
     async def initialize_reg(self):
-        await asyncio.sleep(0.2)
+        # Wait for the first status read so the confirmations below are
+        # checked against live register values
+        await self.wait_for(lambda: self.cycle_count > 0, "first status read")
 
         logging.debug("Enabling drive...")
         self.reg_control.drive_enabled = True
-        await asyncio.sleep(0.2)
+        await self.wait_for(
+            lambda: self.reg_status.drive_enabled or self.reg_status.fault_present,
+            "drive enable",
+        )
 
         logging.debug("Disabling stop...")
         self.reg_control.operation_enabled = True
-        await asyncio.sleep(0.2)
+        await self.wait_for(
+            lambda: self.reg_status.operation_enabled or self.reg_status.fault_present,
+            "operation enable",
+        )
 
         logging.debug("Disabling halt...")
         self.reg_control.halt_active = False
-        await asyncio.sleep(0.2)
+        await self.wait_for(
+            lambda: not self.reg_status.halt_active or self.reg_status.fault_present,
+            "halt release",
+        )
 
+        # There is no status bit for the brake or the reset, so for these
+        # steps we only wait for the new control value to be written out
         logging.debug("Disabling brake...")
         self.reg_control.brake_active = False
-        await asyncio.sleep(0.2)
+        await self._wait_for_sync()
 
         logging.debug("Clearing faults...")
         self.reg_control.reset = True
-        await asyncio.sleep(0.2)
+        await self._wait_for_sync()
 
         logging.debug("De-asserting reset...")
         self.reg_control.reset = False
-        await asyncio.sleep(0.2)
+        await self._wait_for_sync()
 
         logging.debug("Setting operation mode to direct application...")
         self.reg_control.operation_mode = OpMode.DIRECTAPP
         self.reg_control.preselection = 100
-        await asyncio.sleep(0.2)
+        await self.wait_for(
+            lambda: self.reg_status.operation_mode == OpMode.DIRECTAPP,
+            "direct application mode",
+        )
 
         logging.info("Drive %s initialized", self.name)
 
     async def home(self):
+        await self.wait_for(
+            lambda: not self.reg_status.ack_start, "start acknowledge reset"
+        )
+
         logging.debug("Starting homing...")
         self.reg_control.homing_start = True
-        await asyncio.sleep(0.2)
-        self.reg_control.homing_start = False
-        await asyncio.sleep(0.4)
+        try:
+            await self.wait_for(
+                lambda: self.reg_status.ack_start
+                or not self.reg_status.motion_complete
+                or self.reg_status.fault_present,
+                "homing start acknowledge",
+            )
+            self._check_fault("homing")
+        finally:
+            self.reg_control.homing_start = False
 
-        while not self.reg_status.motion_complete:
-            await asyncio.sleep(0.1)
+        await self.wait_for(
+            lambda: not self.reg_status.ack_start or self.reg_status.fault_present,
+            "start acknowledge reset",
+        )
+        await self.wait_for(
+            lambda: self.reg_status.motion_complete or self.reg_status.fault_present,
+            "homing complete",
+            self.motion_timeout,
+        )
+        self._check_fault("homing")
         logging.info("Drive %s homing complete", self.name)
 
-    async def move(self, target: int):
-        self.reg_control.setpoint = target
-        await asyncio.sleep(0.2)
+    async def start_move(self, target: int, speed: int = 100):
+        """Start a positioning command, returning once the drive accepts it.
+
+        Starts a move to `target` at `speed` percent of the maximum velocity
+        configured in the drive. If the drive is in record selection mode,
+        it is first switched to direct mode."""
+        if not 1 <= speed <= 100:
+            raise DriveActionError(f"Invalid speed {speed}%")
+        await self._set_operation_mode(OpMode.DIRECTAPP)
+        # Like the setpoint, the speed is latched on the start bit
+        self.reg_control.preselection = speed
+        await self._start_positioning(target)
+
+    async def start_record(self, record: int):
+        """Start the positioning record `record` from the record table,
+        returning once the drive accepts it.
+
+        Only the record number is written to the drive; the target and
+        velocity are those stored in the record table (see
+        `upload_records()`). If the drive is in direct mode, it is first
+        switched to record selection mode.
+
+        In record selection mode, the drive reports the record number and
+        record status instead of the SDIR and velocity status fields, so
+        these fields of `reg_status` are not meaningful."""
+        if not 1 <= record <= MAX_RECORDS:
+            raise DriveActionError(f"Invalid record number {record}")
+        self.reg_control.record_number = record
+        await self._set_operation_mode(OpMode.RECSELECT)
+        await self._start_positioning()
+
+    async def _set_operation_mode(self, mode: OpMode):
+        """Switch the drive between direct and record selection mode."""
+        if (
+            self.reg_control.operation_mode == mode
+            and self.reg_status.operation_mode == mode
+        ):
+            return
+        logging.debug("%s: Switching to %s mode...", self.name, mode.name)
+        self.reg_control.operation_mode = mode
+        await self.wait_for(
+            lambda: self.reg_status.operation_mode == mode
+            or self.reg_status.fault_present,
+            "operation mode change",
+        )
+        self._check_fault("operation mode change")
+
+    async def _start_positioning(self, target: int = None):
+        """Toggle the start bit, waiting for the drive to acknowledge it."""
+        # A start acknowledge still pending from a previous command would be
+        # mistaken for the acknowledge of this one
+        await self.wait_for(
+            lambda: not self.reg_status.ack_start, "start acknowledge reset"
+        )
 
-        logging.debug("%s: Setpoint is %s", self.name, self.reg_control.setpoint)
+        # The setpoint is only latched by the drive on the rising edge of
+        # the start bit, so both can be written in the same cycle
+        if target is not None:
+            self.reg_control.setpoint = target
+            logging.debug("%s: Setpoint is %s", self.name, target)
+        self._move_trace = _MoveTrace(time.monotonic())
         self.reg_control.positioning_start = True
-        await asyncio.sleep(0.4)
-        self.reg_control.positioning_start = False
-        await asyncio.sleep(0.2)
-
-        while not self.reg_status.motion_complete:
-            await asyncio.sleep(0.1)
-            logging.debug("%s: Waiting for motion to complete...", self.name)
-            if self.get_status() == DriveState.ERROR:
-                drive_exception = self.get_exception()
-                logging.critical(
-                    "Drive %s entered error state 0x%s during motion: %s",
-                    self.name,
-                    drive_exception.error_code.hex(),
-                    drive_exception.error_desc,
-                )
-                raise DriveActionError("Movement aborted!")
+        try:
+            await self.wait_for(
+                lambda: self.reg_status.ack_start or self.reg_status.fault_present,
+                "start acknowledge",
+            )
+            self._check_fault("motion")
+        finally:
+            self.reg_control.positioning_start = False
+
+        await self.wait_for(
+            lambda: not self.reg_status.ack_start or self.reg_status.fault_present,
+            "start acknowledge reset",
+        )
+        self._check_fault("motion")
+
+    async def wait_motion_complete(self):
+        """Wait for the motion started by `start_move()` to complete."""
+        logging.debug("%s: Waiting for motion to complete...", self.name)
+        try:
+            await self.wait_for(
+                lambda: self.reg_status.motion_complete
+                or self.reg_status.fault_present,
+                "motion complete",
+                self.motion_timeout,
+            )
+            self._check_fault("motion")
+            self._report_move()
+        finally:
+            self._move_trace = None
 
         logging.debug("%s: Drive positioning complete!", self.name)
 
+    def _report_move(self):
+        """Report the latency of each stage of the completed move."""
+        trace = self._move_trace
+        if trace is None:
+            return
+        for event, histogram in self._move_latency.items():
+            reached = getattr(trace, event)
+            # A move to the current position never raises is_moving
+            if reached is not None:
+                histogram.observe(reached - trace.started)
+
+    async def move(self, target: int, speed: int = 100):
+        await self.start_move(target, speed)
+        await self.wait_motion_complete()
+
+    async def move_record(self, record: int):
+        """Move to the target of a record, see `start_record()`."""
+        await self.start_record(record)
+        await self.wait_motion_complete()
+
+    async def upload_records(self, records: Sequence[MotionRecord], first: int = 1):
+        """Write motion records into the record table of the drive.
+
+        The records are stored as record numbers `first` onwards, to be
+        started with `start_record()`. Each parameter is written through
+        the parameter channel, which must be enabled (FHPP+ with FPC) in
+        the controller parameterization. Records are positioned as
+        configured in their record control byte (absolute by default)."""
+        if first < 1 or first + len(records) - 1 > MAX_RECORDS:
+            raise DriveActionError(
+                f"Records {first} to {first + len(records) - 1} exceed the "
+                f"record table"
+            )
+        for number, record in enumerate(records, first):
+            await self.write_parameter(PNU_RECORD_POSITION, record.position, number)
+            if record.velocity is not None:
+                await self.write_parameter(PNU_RECORD_VELOCITY, record.velocity, number)
+        logging.info("%s: Uploaded %s records", self.name, len(records))
+
+    async def read_parameter(self, pnu: int, subindex: int = None) -> int:
+        """Read a parameter through the parameter channel.
+
+        `subindex` selects an element of an array parameter (e.g. a record
+        of the record table)."""
+        request_id = REQUEST_READ if subindex is None else REQUEST_READ_ARRAY
+        response = await self._parameter_request(
+            ParameterMessage(request_id, pnu, subindex or 0)
+        )
+        return response.value
+
+    async def write_parameter(self, pnu: int, value: int, subindex: int = None):
+        """Write a (32-bit) parameter through the parameter channel.
+
+        `subindex` selects an element of an array parameter (e.g. a record
+        of the record table)."""
+        request_id = REQUEST_WRITE if subindex is None else REQUEST_WRITE_ARRAY
+        await self._parameter_request(
+            ParameterMessage(request_id, pnu, subindex or 0, value)
+        )
+
+    async def _parameter_request(self, request: ParameterMessage) -> ParameterMessage:
+        """Issue a parameter channel request and wait for the response.
+
+        The worker exchanges the parameter channel registers on each cycle
+        while a request is in progress."""
+
+        def responded() -> bool:
+            response = self._parameter_in
+            return (
+                response is not None
+                and response.identifier != REQUEST_NONE
+                and response.pnu == request.pnu
+                and response.subindex == request.subindex
+            )
+
+        async with self._parameter_lock:
+            self._parameter_in = None
+            self._parameter_out = encode_parameter(request)
+            self._wake_worker()
+            try:
+                await self.wait_for(responded, f"parameter {request.pnu} response")
+                response = self._parameter_in
+                # Withdraw the request, so that repeating it is seen as a new
+                # request by the controller
+                self._parameter_in = None
+                self._parameter_out = encode_parameter(
+                    ParameterMessage(REQUEST_NONE, 0)
+                )
+                await self.wait_for(
+                    lambda: self._parameter_in is not None
+                    and self._parameter_in.identifier == REQUEST_NONE,
+                    "parameter channel reset",
+                )
+            finally:
+                self._parameter_out = None
+
+        if response.identifier == RESPONSE_ERROR:
+            logging.error(
+                "%s: Parameter %s[%s] request failed with error %s",
+                self.name,
+                request.pnu,
+                request.subindex,
+                response.value,
+            )
+            raise DriveActionError(
+                f"Parameter {request.pnu} request failed with error {response.value}"
+            )
+        return response
+
+    def _check_fault(self, action: str):
+        """Raise a `DriveActionError` if the drive has entered an error state."""
+        if self.get_status() == DriveState.ERROR:
+            drive_exception = self.get_exception()
+            logging.critical(
+                "Drive %s entered error state 0x%s during %s: %s",
+                self.name,
+                drive_exception.error_code.hex(),
+                action,
+                drive_exception.error_desc,
+            )
+            raise DriveActionError("Movement aborted!")
+
+    async def wait_for(self, condition, step: str, timeout: float = None):
+        """Wait until `condition()` is true, re-checking after every worker cycle.
+
+        Raises a `DriveActionError` if the condition does not hold within
+        `timeout` seconds (`step_timeout` if not specified), or if the
+        connection to the drive is lost."""
+        self._check_connection()
+        if condition():
+            return
+
+        connection_losses = self.connection_losses
+        self._loop = asyncio.get_running_loop()
+        status_changed = asyncio.Event()
+        self._status_waiters.add(status_changed)
+        if self.busy_cycle_time is not None:
+            # Don't wait out an idle cycle before polling at the busy rate
+            self._wake_worker()
+        try:
+            async with asyncio.timeout(timeout or self.step_timeout):
+                while not condition():
+                    status_changed.clear()
+                    await status_changed.wait()
+                    # The connection may already be back by the time we wake
+                    if self.connection_losses != connection_losses:
+                        logging.error(
+                            "%s: Connection lost waiting for %s", self.name, step
+                        )
+                        raise DriveActionError(f"Connection lost waiting for {step}")
+        except TimeoutError:
+            logging.error("%s: Timed out waiting for %s", self.name, step)
+            raise DriveActionError(f"Timed out waiting for {step}") from None
+        finally:
+            self._status_waiters.discard(status_changed)
+
+    def _check_connection(self):
+        """Raise a `DriveActionError` if the status registers are stale."""
+        if self.reg_status.stale:
+            logging.error("%s: Connection to drive lost", self.name)
+            raise DriveActionError("Connection to drive lost")
+
+    async def _wait_for_sync(self):
+        """Wait until the current control register values have been written.
+
+        A full cycle must start after the call for the write to be guaranteed
+        to contain the new values, so two cycle completions are required."""
+        target_cycle = self.cycle_count + 2
+        await self.wait_for(lambda: self.cycle_count >= target_cycle, "register sync")
+
+    def _notify_status(self):
+        """Wake any coroutines waiting in `wait_for()`.
+
+        Called by the worker after every status read."""
+        if not self._status_waiters:
+            return
+        if self.engine == IOEngine.ASYNCIO:
+            self._wake_status_waiters()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._wake_status_waiters)
+            except RuntimeError:
+                # The event loop has been closed; nobody is waiting anymore
+                pass
+
+    def _wake_status_waiters(self):
+        for status_changed in self._status_waiters:
+            status_changed.set()
+
+    def _is_busy(self) -> bool:
+        """Check whether the worker should poll at the busy rate."""
+        return bool(self._status_waiters) or self.reg_status.is_moving
+
+    def _wake_worker(self):
+        """Cut the worker's current sleep short, starting the next cycle."""
+        if self._io_wakeup is None:
+            return
+        if self.engine == IOEngine.ASYNCIO:
+            self._io_wakeup.set()
+        else:
+            try:
+                self._io_loop.call_soon_threadsafe(self._io_wakeup.set)
+            except RuntimeError:
+                # The worker has exited
+                pass
+
+    async def _sleep_cycle(self, period: float = None):
+        """Sleep until the next cycle is due (or for `period` seconds) or the
+        worker is woken."""
+        if period is None:
+            period = self.cycle_time
+            if self.busy_cycle_time is not None and self._is_busy():
+                period = self.busy_cycle_time
+
+        try:
+            async with asyncio.timeout(period):
+                await self._io_wakeup.wait()
+        except TimeoutError:
+            pass
+        self._io_wakeup.clear()
+
     async def terminate(self):
+        if self.terminated:
+            return
+        if not self.connected:
+            # Never connected, or the connection attempt failed
+            self.terminated = True
+            if self.client is not None:
+                self.client.close()
+            return
+
         self.reg_control.drive_enabled = False
         self.reg_control.operation_enabled = False
         self.reg_control.halt_active = True
         self.reg_control.brake_active = True
         self.reg_control.reset = True
-        await asyncio.sleep(0.4)
-        self.terminated = True
-        await asyncio.sleep(0.2)
-        self.write_worker.join()
-        self.client.close()
+        try:
+            if self.reg_status.stale:
+                logging.warning(
+                    "%s: Connection lost, terminating without disabling drive",
+                    self.name,
+                )
+            else:
+                await self._wait_for_sync()
+        except Exception as exc:
+            logging.error("%s: Failed to disable drive: %s", self.name, exc)
+            raise
+        finally:
+            # Stop the worker even if the drive could not be disabled, so the
+            # worker thread does not keep the process alive
+            self.terminated = True
+            self._wake_worker()
+            if self.engine == IOEngine.THREAD:
+                await asyncio.to_thread(self.write_worker.join)
+            elif self.io_task is not None:
+                await self.io_task
+            self.client.close()
+
+    async def _execute(self, request, *args):
+        """Issue a Modbus request with either the blocking or async client.
+
+        Raises a `ConnectionError` if the client has been disconnected, and
+        a `TimeoutError` if an async request takes longer than
+        `request_timeout` seconds."""
+        if not self.client.connected:
+            raise ConnectionError("Client is disconnected")
+        result = request(*args)
+        if inspect.isawaitable(result):
+            async with asyncio.timeout(self.request_timeout):
+                result = await result
+        return result
 
-    def reg_read(self):
-        result = self.client.read_holding_registers(0x0, 0x4)
+    async def reg_read(self):
+        result = await self._execute(self.client.read_holding_registers, 0x0, 0x4)
 
         if result.isError():
             logging.error("Modbus read response was an error!")
             raise DriveActionError("Invalid drive response")
         else:
-            # fmt: off
-            # Parse SCON
-            self.reg_status.drive_enabled = bool(((result.registers[0]     >> 0) >> 8) & 1)
-            self.reg_status.operation_enabled = bool(((result.registers[0] >> 1) >> 8) & 1)
-            self.reg_status.warning_present = bool(((result.registers[0]   >> 2) >> 8) & 1)
-            self.reg_status.fault_present = bool(((result.registers[0]     >> 3) >> 8) & 1)
-            self.reg_status.load_applied = bool(((result.registers[0]      >> 4) >> 8) & 1)
-            self.reg_status.fct_blocked = bool(((result.registers[0]       >> 5) >> 8) & 1)
-            self.reg_status.operation_mode = int((result.registers[0]      >> 6) >> 8)
-
-            # Parse SPOS
-            self.reg_status.halt_active = not bool((result.registers[0]  >> 0) & 1)
-            self.reg_status.ack_start = bool((result.registers[0]        >> 1) & 1)
-            self.reg_status.motion_complete = bool((result.registers[0]  >> 2) & 1)
-            self.reg_status.ack_teach = bool((result.registers[0]        >> 3) & 1)
-            self.reg_status.is_moving = bool((result.registers[0]        >> 4) & 1)
-            self.reg_status.following_error = bool((result.registers[0]  >> 5) & 1)
-            self.reg_status.still_monitoring = bool((result.registers[0] >> 6) & 1)
-            self.reg_status.reference_set = bool((result.registers[0]    >> 7) & 1)
-
-            # Parse SDIR
-            self.reg_status.setpoint_mode = int(((result.registers[1]         >> 0) >> 8) & 1)
-            self.reg_status.control_mode = int(((result.registers[1]          >> 1) >> 8) & 0b11)
-            self.reg_status.speed_limit_reached = bool(((result.registers[1]  >> 4) >> 8) & 1)
-            self.reg_status.stroke_limit_reached = bool(((result.registers[1] >> 5) >> 8) & 1)
-            # fmt: on
-
-            # Drive actual velocity (%)
-            self.reg_status.velocity_percent = int(result.registers[1] & 0xFFFF)
-
-            # Drive actual position (sinc)
-            self.reg_status.position = int(
-                (result.registers[2] << 16) + result.registers[3]
-            )
-
-            logging.debug("Parsed device register state is %s", self.reg_status)
-
-    def reg_write(self):
-        register_out = [0x0000, 0x0000, 0x0000, 0x0000]
-
-        # fmt: off
-        # CCON
-        register_out[0] |= (int(self.reg_control.drive_enabled)     << 0) << 8
-        register_out[0] |= (int(self.reg_control.operation_enabled) << 1) << 8
-        register_out[0] |= (int(not self.reg_control.brake_active)  << 2) << 8
-        register_out[0] |= (int(self.reg_control.reset)             << 3) << 8
-        # Bit 4 is reserved
-        register_out[0] |= (int(self.reg_control.fct_blocked)       << 5) << 8
-        register_out[0] |= (int(self.reg_control.operation_mode)    << 6) << 8
-
-        # CPOS
-        register_out[0] |= int(not self.reg_control.halt_active)   << 0
-        register_out[0] |= int(self.reg_control.positioning_start) << 1
-        register_out[0] |= int(self.reg_control.homing_start)      << 2
-        register_out[0] |= int(self.reg_control.jog_positive)      << 3
-        register_out[0] |= int(self.reg_control.jog_negative)      << 4
-        register_out[0] |= int(self.reg_control.teach)             << 5
-        register_out[0] |= int(self.reg_control.clear_path)        << 6
-
-        # CDIR
-        register_out[1] |= (int(self.reg_control.setpoint_mode)       << 0) << 8
-        register_out[1] |= (int(self.reg_control.control_mode)        << 1) << 8
-        register_out[1] |= (int(self.reg_control.stroke_limit_bypass) << 5) << 8
-        # fmt: on
-
-        # SP 1
-        register_out[1] |= self.reg_control.preselection
-
-        # SP 2
-        register_out[2] |= self.reg_control.setpoint >> 16
-        register_out[3] |= self.reg_control.setpoint & 0xFFFF
+            self._parse_status(result.registers)
+
+    def _parse_status(self, registers: list[int]):
+        cycle = self.cycle_count + 1
+        # The status registers are unchanged on most cycles while idle
+        if registers != self._status_raw:
+            self._status_raw = registers
+            self._status_values = STATUS_CODEC.decode(registers)
+            logging.debug("Parsed device register state is %s", self._status_values)
+        timestamp = time.monotonic()
+        if self.telemetry is not None:
+            self.telemetry.record(self._telemetry_axis, timestamp, cycle, registers)
+        snapshot = StatusRegisters._make(
+            self._status_values + (timestamp, cycle, False)
+        )
+        self._status_history[cycle % len(self._status_history)] = snapshot
+        self.reg_status = snapshot
+        # Read once, as the trace is cleared from outside the worker
+        move_trace = self._move_trace
+        if move_trace is not None:
+            move_trace.update(snapshot)
+
+    def _build_control(self) -> list[int]:
+        # Clear the dirty flag before reading the fields, so a change made
+        # while the buffer is being built is still picked up next cycle
+        self.reg_control.dirty = False
+        self._last_write = time.monotonic()
+        move_trace = self._move_trace
+        if (
+            move_trace is not None
+            and move_trace.setpoint_write is None
+            and self.reg_control.positioning_start
+        ):
+            move_trace.setpoint_write = self._last_write
+        if self.reg_control.operation_mode == OpMode.RECSELECT:
+            register_out = RECORD_CONTROL_CODEC.encode(self.reg_control)
+        else:
+            register_out = CONTROL_CODEC.encode(self.reg_control)
         logging.debug("Raw register write buffer: %s", register_out)
+        return register_out
 
-        result = self.client.write_registers(0x0, register_out)
+    async def reg_write(self):
+        register_out = self._build_control()
+        result = await self._execute(self.client.write_registers, 0x0, register_out)
         if result.isError():
             logging.error("Modbus write response was an error!")
             raise DriveActionError("Invalid drive write acknowledge")
 
-    def read_exception(self):
+    async def reg_exchange(self):
+        """Write the control registers and read the status registers in a
+        single Read/Write Multiple Registers (FC23) transaction.
+
+        If the controller rejects FC23 as an illegal function, the drive
+        falls back to separate `reg_write()` and `reg_read()` calls."""
+        register_out = self._build_control()
+        result = await self._execute(
+            self.client.readwrite_registers, 0x0, 0x4, 0x0, register_out
+        )
+
+        if not result.isError():
+            self._parse_status(result.registers)
+        elif (
+            isinstance(result, ExceptionResponse)
+            and result.exception_code == ModbusExceptions.IllegalFunction
+        ):
+            logging.warning(
+                "%s: Controller does not support FC23, using separate reads/writes",
+                self.name,
+            )
+            self.combined_io = False
+            await self.reg_write()
+            await self.reg_read()
+        else:
+            logging.error("Modbus read/write response was an error!")
+            raise DriveActionError("Invalid drive response")
+
+    async def reg_parameters(self, register_out: list[int]):
+        """Exchange the parameter channel registers, which follow the
+        control and status registers."""
+        if self.combined_io:
+            result = await self._execute(
+                self.client.readwrite_registers, 0x4, 0x4, 0x4, register_out
+            )
+        else:
+            result = await self._execute(self.client.write_registers, 0x4, register_out)
+            if not result.isError():
+                result = await self._execute(
+                    self.client.read_holding_registers, 0x4, 0x4
+                )
+
+        if result.isError():
+            logging.error("Modbus parameter channel response was an error!")
+            raise DriveActionError("Invalid parameter channel response")
+        self._parameter_in = decode_parameter(result.registers)
+
+    async def update_exception(self):
+        """Refresh the cached diagnostic code if the fault/warning bits changed.
+
+        The diagnostic code is read when a fault or warning is first flagged
+        (or after `read_diagnostics()`), and reset to 0 once both bits clear."""
+        exception_flags = (
+            self.reg_status.fault_present,
+            self.reg_status.warning_present,
+        )
+        if self._exception_requested or (
+            exception_flags != self._exception_flags and any(exception_flags)
+        ):
+            self._exception_requested = False
+            await self.read_exception()
+        elif not any(exception_flags):
+            self.error_code = bytes(1)
+        self._exception_flags = exception_flags
+
+    async def read_diagnostics(self) -> DriveError:
+        """Read the diagnostic code from the drive, regardless of its status bits.
+
+        Returns the freshly read diagnostic code and message."""
+        self._exception_requested = True
+        self._wake_worker()
+        await self.wait_for(lambda: not self._exception_requested, "diagnostics")
+        return self.get_exception()
+
+    async def read_exception(self):
         logging.debug("Reading exception status...")
-        result = self.client.read_exception_status()
+        result = await self._execute(self.client.read_exception_status)
         self.error_code = result.encode()
         logging.debug("Exception code: %s", self.error_code)
 
@@ -420,8 +1104,50 @@ class Drive:
         """Get the encoder position in micrometers."""
         return self.reg_status.position
 
+    def get_status_history(self) -> list[StatusRegisters]:
+        """Get the retained status snapshots, from oldest to newest."""
+        snapshots = [s for s in self._status_history if s is not None]
+        snapshots.sort(key=lambda snapshot: snapshot.cycle)
+        return snapshots
+
+    def get_velocity(self) -> float:
+        """Get the velocity of the drive in micrometers per second.
+
+        This is derived from the position and timestamp of the last two
+        status snapshots, and is 0 until two snapshots have been read."""
+        latest = self.reg_status
+        previous = self._status_history[(latest.cycle - 1) % len(self._status_history)]
+        if previous is None or previous.cycle != latest.cycle - 1:
+            return 0.0
+        return (latest.position - previous.position) / (
+            latest.timestamp - previous.timestamp
+        )
+
+    def get_settle_time(self) -> float | None:
+        """Get the time taken by the last motion to settle, in seconds.
+
+        This is the time from the last snapshot in which the drive was
+        moving to the first in which the motion was complete. Returns `None`
+        if the drive is still moving or settling, or the end of the last
+        motion is no longer in the history."""
+        settled = None
+        settling = False
+        for snapshot in reversed(self.get_status_history()):
+            if snapshot.is_moving:
+                if settled is None:
+                    return None
+                return settled.timestamp - snapshot.timestamp
+            if snapshot.motion_complete and not settling:
+                settled = snapshot
+            else:
+                settling = True
+        return None
+
     def get_status(self) -> DriveState:
-        """Identify the drive state from the status registers."""
+        """Identify the drive state from the status registers.
+
+        Raises a `DriveActionError` if the connection to the drive is lost."""
+        self._check_connection()
         if self.reg_status.fault_present:
             return DriveState.ERROR
         elif self.reg_status.warning_present:
@@ -439,20 +1165,24 @@ class Drive:
     def get_exception(self) -> DriveError:
         """Match the drive error to an exception code.
 
-        These are pulled straight from Appendix D of the FHPP datasheet."""
+        These are pulled straight from Appendix D of the FHPP datasheet. The
+        code is the one cached when the current fault or warning was flagged;
+        use `read_diagnostics()` to read it from the drive on demand."""
 
-        error_desc = DIAGNOSTIC_MESSAGES[self.error_code.hex()]
+        error_desc = DIAGNOSTIC_MESSAGES.get(
+            self.error_code.hex(), "No diagnostic message"
+        )
         return DriveError(self.error_code, error_desc)
 
     async def stop(self):
         """Set the halt bit, immediately stopping the drive."""
         self.reg_control.halt_active = True
-        await asyncio.sleep(0.2)
+        await self._wait_for_sync()
 
     async def resume(self):
         """Clear the halt bit, allowing the drive to continue moving."""
         self.reg_control.halt_active = False
-        await asyncio.sleep(0.2)
+        await self._wait_for_sync()
 
     async def reset_error(self):
         """Toggle the reset bit, clearing acknowledgeable drive errors.
@@ -463,18 +1193,89 @@ class Drive:
         # This needs more testing
         logging.debug("Clearing faults...")
         self.reg_control.reset = True
-        await asyncio.sleep(0.2)
+        await self._wait_for_sync()
 
         logging.debug("De-asserting reset...")
         self.reg_control.reset = False
-        await asyncio.sleep(0.2)
+        await self._wait_for_sync()
 
     def worker(self):
+        """Run the register exchange in a dedicated thread.
+
+        The thread gets its own event loop; the blocking client calls in
+        `io_loop()` then simply run to completion on it."""
+        asyncio.run(self.io_loop())
+
+    async def _connect_client(self) -> bool:
+        """Open the connection of the current client, returning whether it
+        succeeded."""
+        try:
+            result = self.client.connect()
+            if inspect.isawaitable(result):
+                async with asyncio.timeout(self.request_timeout):
+                    result = await result
+        except (ModbusException, OSError) as exc:
+            logging.debug("%s: Connect failed: %s", self.name, exc)
+            return False
+        return bool(result) and self.client.connected
+
+    async def _reconnect(self):
+        """Re-open the connection to the drive, backing off between attempts.
+
+        Returns once connected, or when the drive is terminated."""
+        delay = self.reconnect_delay
+        while not self.terminated:
+            self.client.close()
+            self.client = self._new_client()
+            if await self._connect_client():
+                logging.warning("%s: Reconnected to drive", self.name)
+                # Rewrite the control registers on the first cycle
+                self.reg_control.dirty = True
+                return
+            logging.warning("%s: Reconnect failed, retrying in %s s", self.name, delay)
+            await self._sleep_cycle(delay)
+            delay = min(delay * 2, self.reconnect_delay_max)
+
+    async def io_loop(self):
         logging.debug("Worker started")
+        self._io_loop = asyncio.get_running_loop()
+        self._io_wakeup = asyncio.Event()
         while not self.terminated:
-            logging.debug("Writing registers...")
-            self.reg_write()
-            self.reg_read()
-            self.read_exception()
-            time.sleep(0.1)
+            write_due = (
+                self.reg_control.dirty
+                or time.monotonic() - self._last_write >= self.keepalive
+            )
+            cycle_start = time.perf_counter()
+            try:
+                if write_due and self.combined_io:
+                    logging.debug("Exchanging registers...")
+                    await self.reg_exchange()
+                else:
+                    if write_due:
+                        logging.debug("Writing registers...")
+                        await self.reg_write()
+                    await self.reg_read()
+                await self.update_exception()
+                # Read once, as the request is withdrawn from outside the worker
+                parameter_out = self._parameter_out
+                if parameter_out is not None:
+                    await self.reg_parameters(parameter_out)
+            except Exception as exc:
+                if isinstance(exc, (DriveActionError, ModbusException, OSError)):
+                    logging.error("%s: Register exchange failed: %s", self.name, exc)
+                else:
+                    # e.g. the client failing on a connection dropped mid-request
+                    logging.exception(
+                        "%s: Unexpected error in register exchange", self.name
+                    )
+                self._cycle_errors.inc()
+                self.reg_status = self.reg_status._replace(stale=True)
+                self.connection_losses += 1
+                self._notify_status()
+                await self._reconnect()
+                continue
+            self._round_trip.observe(time.perf_counter() - cycle_start)
+            self.cycle_count += 1
+            self._notify_status()
+            await self._sleep_cycle()
         logging.debug("Worker exiting...")
@@ -1,11 +1,21 @@
 """Wrapper for all system-level drive commands via the `DriveManager` class."""
 
 import asyncio
+import contextvars
 import logging
+import math
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from .drive import Drive, DriveState, DriveActionError, DriveError
+from .collision import KeepOutZone, clearance_depth
+from .command_queue import CommandPreemptedError, CommandPriority, CommandQueue
+from .command_queue import command_priority
+from .drive import Drive, DriveState, DriveActionError, DriveError, IOEngine
+from .drive import MotionRecord
+from .metrics import InMemoryMetrics, MetricsSink
+from .telemetry import TelemetryRecorder
 
-# TODO Add locks for drive actions
 # TODO Refactor parse/write to use callbacks
 
 CRUISE_DEPTH = 0
@@ -13,24 +23,128 @@ CRUISE_DEPTH = 0
 obstacles. Specified in micrometers.
 
 The z-axis will be moved to this height when executing movement commands before
-adjusting the x and y-axes."""
+adjusting the x and y-axes, unless keep-out zones have been configured with
+`DriveManager.set_keepout_zones()`."""
+
+
+DRIVE_ENDPOINTS = (
+    ("192.168.2.21", 502),
+    ("192.168.2.22", 502),
+    ("192.168.2.23", 502),
+)
+"""The (host, port) Modbus TCP endpoints of the x, y and z-axis drive
+controllers."""
 
 
 class DriveTarget(Enum):
     """A drive target used for methods which require specifying a
-    target drive."""
+    target drive.
+
+    Methods accepting a `DriveTarget` also accept the name of any axis
+    configured with `AxisConfig`; the targets below are the "X", "Y" and
+    "Z" gantry axes."""
 
     DriveX = 0
     DriveY = 1
     DriveZ = 2
 
 
+_TARGET_AXES = {
+    DriveTarget.DriveX: "X",
+    DriveTarget.DriveY: "Y",
+    DriveTarget.DriveZ: "Z",
+}
+
+_GANTRY_AXES = tuple(_TARGET_AXES.values())
+
+
+@dataclass
+class AxisConfig:
+    """The configuration of a drive controller managed by a `DriveManager`."""
+
+    name: str
+    """The name used to target the axis. The gantry axes used by `move()`
+    must be named "X", "Y" and "Z"."""
+    host: str
+    """The host of the Modbus TCP endpoint of the drive controller."""
+    port: int = 502
+    """The port of the Modbus TCP endpoint of the drive controller."""
+    drive_args: dict = field(default_factory=dict)
+    """Settings for this drive overriding those passed to the
+    `DriveManager`, e.g. `cycle_time`, or `motion_timeout` for a slow
+    axis."""
+
+
 class DriveManagerError(Exception):
     """An error raised by the drive manager."""
 
     pass
 
 
+@dataclass
+class WaypointTiming:
+    """Timing of a single waypoint executed by `DriveManager.execute_path()`.
+
+    Times are `time.monotonic()` timestamps in seconds."""
+
+    index: int
+    """The position of the waypoint in the path."""
+    target: tuple[int, int, int]
+    """The (x, y, z) coordinates of the waypoint in micrometers."""
+    start: float
+    """When motion towards the waypoint was started."""
+    arrival: float
+    """When all drives reached the waypoint."""
+    end: float
+    """When the dwell at the waypoint finished."""
+
+    @property
+    def travel_time(self) -> float:
+        """The time spent moving to the waypoint, in seconds."""
+        return self.arrival - self.start
+
+    @property
+    def dwell_time(self) -> float:
+        """The time spent dwelling at the waypoint, in seconds."""
+        return self.end - self.arrival
+
+
+@dataclass(frozen=True)
+class MotionProfile:
+    """The speeds used by `DriveManager.move()`.
+
+    Speeds are percentages of the maximum velocity configured in each
+    drive controller."""
+
+    speed: int = 100
+    """The speed of the x and y axes."""
+    z_speed: int = 100
+    """The speed of the z-axis, when raised and lowered."""
+    synchronized: bool = False
+    """Whether to slow down the x or y-axis, whichever has the shorter
+    distance to travel, so that both arrive at the target together. The
+    axis with the longer distance moves at `speed`."""
+
+    def __post_init__(self):
+        for speed in (self.speed, self.z_speed):
+            if not 1 <= speed <= 100:
+                raise ValueError(f"Invalid speed {speed}%")
+
+
+@dataclass
+class Command:
+    """A call of a `DriveManager` method, for `DriveManager.submit()`."""
+
+    method: Callable[..., Awaitable]
+    """The method to call, e.g. `DriveManager.move`."""
+    args: tuple = ()
+    """The positional arguments of the call."""
+    kwargs: dict = field(default_factory=dict)
+    """The keyword arguments of the call."""
+    priority: CommandPriority = CommandPriority.NORMAL
+    """The priority of the drive actions of the call."""
+
+
 class DriveManager:
     """Wrapper for system-level commands to the drives.
 
@@ -49,7 +163,13 @@ class DriveManager:
     pinhole light with the camera.
 
     Once the full sampling run is complete, the drives can be disabled by
-    calling the `terminate()` method."""
+    calling the `terminate()` method.
+
+    Drive actions run through a `libmotorctrl.command_queue.CommandQueue`,
+    so concurrent calls using the same axes run one at a time, in order of
+    priority and then of the calls. `stop()`, `stop_drive()` and
+    `terminate()` preempt any other actions on their axes, which fail with
+    a `CommandPreemptedError`. Use `submit()` to queue a batch of calls."""
 
     _calibration_offset = (8_660, 119_340)
     """The location of the calibration point in (x,y) format. Specified in
@@ -67,45 +187,226 @@ class DriveManager:
     If a movement command is issued that would move beyond these bounds,
     the system will raise an exception."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        engine: IOEngine = IOEngine.THREAD,
+        cycle_time: float = 0.1,
+        busy_cycle_time: float = None,
+        combined_io: bool = True,
+        keepalive: float = 1.0,
+        autoconnect: bool = True,
+        telemetry: TelemetryRecorder = None,
+        metrics: MetricsSink = None,
+        endpoints: tuple[tuple[str, int], ...] = DRIVE_ENDPOINTS,
+        axes: Iterable[AxisConfig] = None,
+    ):
         """Initialize the drives.
 
-        Initializes the x, y and z-axis drive controllers in parallel
-        by connecting to them over Modbus and spawning a worker thread
-        to read and write the registers to/from the drive."""
+        With the default `IOEngine.THREAD` engine, this initializes each
+        drive controller by connecting to it over Modbus and spawning a
+        worker thread to read and write the registers to/from the
+        drive.
+
+        With the `IOEngine.ASYNCIO` engine, the connections are instead
+        opened by `init_drives()`, and the registers of every drive are
+        exchanged by tasks on the running event loop. If `autoconnect`
+        is unset, the `IOEngine.THREAD` connections are also deferred to
+        `init_drives()`, which opens them concurrently. See `create()`.
+
+        Each drive is polled every `cycle_time` seconds. If
+        `busy_cycle_time` is set, a drive is instead polled at that
+        rate while it is moving or a command is being acknowledged. See
+        `set_cycle_time()` to adjust the rates of a single drive.
+
+        If `combined_io` is set, each drive exchanges its control and
+        status registers in a single Modbus transaction per cycle where
+        the controller supports it.
+
+        Control registers are written to a drive as soon as they
+        change, and otherwise rewritten every `keepalive` seconds.
+
+        If a `telemetry` recorder is provided, the status registers
+        read from every drive on each cycle are recorded to it.
+
+        Latency metrics of the drives and of every `move()` are reported
+        to `metrics`, or collected in memory as `metrics` by default.
+
+        The drives are reached at the (host, port) `endpoints` of the x,
+        y and z-axis controllers, e.g. those of a
+        `libmotorctrl.simulator`. Alternatively, any number of drives
+        can be configured with `axes`, which replaces `endpoints`. The
+        gantry methods (`move()`, `get_position()`, etc.) require axes
+        named "X", "Y" and "Z"; other axes, such as a rotary or pipette
+        axis, are moved with `move_axis()`."""
 
         logging.info("Spawning drive controllers...")
-        self._drive_x = Drive("X", "192.168.2.21")
-        self._drive_y = Drive("Y", "192.168.2.22")
-        self._drive_z = Drive("Z", "192.168.2.23")
+        self.metrics = InMemoryMetrics() if metrics is None else metrics
+        self._move_duration = self.metrics.histogram(
+            "move_duration_seconds", "Duration of DriveManager.move() calls"
+        )
+        drive_args = {
+            "engine": engine,
+            "cycle_time": cycle_time,
+            "busy_cycle_time": busy_cycle_time,
+            "combined_io": combined_io,
+            "keepalive": keepalive,
+            "autoconnect": autoconnect,
+            "telemetry": telemetry,
+            "metrics": self.metrics,
+        }
+        if axes is None:
+            axes = [
+                AxisConfig(name, host, port)
+                for name, (host, port) in zip(
+                    _TARGET_AXES.values(), endpoints, strict=True
+                )
+            ]
+        self._drives = {}
+        for axis in axes:
+            if axis.name in self._drives:
+                raise DriveManagerError(f"Duplicate axis name {axis.name}")
+            self._drives[axis.name] = Drive(
+                axis.name, axis.host, axis.port, **(drive_args | axis.drive_args)
+            )
+        self._drive_x = self._drives.get("X")
+        self._drive_y = self._drives.get("Y")
+        self._drive_z = self._drives.get("Z")
+        self._keepout_zones = None
+        self._blending = False
+        self._descent_radius = 0
+        self._locations = []
+        self._profile = MotionProfile()
+        self._commands = CommandQueue()
+
+    @property
+    def axes(self) -> tuple[str, ...]:
+        """The names of the configured axes."""
+        return tuple(self._drives)
+
+    @classmethod
+    async def create(cls, **kwargs) -> "DriveManager":
+        """Create a drive manager with connected and initialized drives.
+
+        Unlike the constructor, this does not block on each drive
+        connection in turn. All drives are connected and initialized
+        concurrently by `init_drives()`. Keyword arguments are passed
+        to the constructor, except `autoconnect`, which is ignored. If
+        startup fails, any drives which were connected are terminated
+        before the error is raised."""
+
+        kwargs.pop("autoconnect", None)
+        manager = cls(autoconnect=False, **kwargs)
+        try:
+            await manager.init_drives()
+        except Exception:
+            logging.critical("Drive startup failed, terminating...")
+            await manager.terminate()
+            raise
+        return manager
 
-    async def init_drives(self):
+    async def init_drives(self, axes: Iterable[DriveTarget | str] = None):
         """Initialize the drive registers to prepare them for positioning.
 
         On startup, the drives are not configured for motion. We must
         set a sequence of registers to clear faults, configure each
-        drive for direct positioning, and enable movement."""
+        drive for direct positioning, and enable movement. All drives
+        (or only those in `axes`) are connected and initialized
+        concurrently."""
 
-        async with asyncio.TaskGroup() as init_tg:
-            init_tg.create_task(self._drive_x.initialize_reg())
-            init_tg.create_task(self._drive_y.initialize_reg())
-            init_tg.create_task(self._drive_z.initialize_reg())
+        await self._fan_out(Drive.connect, axes)
+        await self._fan_out(Drive.initialize_reg, axes)
         logging.info("All drives initialized")
 
-    async def home(self, drive: DriveTarget):
+    def _get_drive(self, drive: DriveTarget | str) -> Drive:
+        """Look up a drive by target or axis name."""
+        name = _TARGET_AXES.get(drive, drive)
+        try:
+            return self._drives[name]
+        except KeyError:
+            raise DriveManagerError(f"No axis named {name}") from None
+
+    async def _fan_out(
+        self,
+        action: Callable[[Drive], Awaitable],
+        axes: Iterable[DriveTarget | str] = None,
+        priority: CommandPriority = None,
+    ):
+        """Run `action` on every drive (or those in `axes`) concurrently, as
+        a single command on those axes."""
+        if axes is None:
+            drives = list(self._drives.values())
+        else:
+            drives = [self._get_drive(axis) for axis in axes]
+
+        async def fan_out():
+            async with asyncio.TaskGroup() as tg:
+                for drive in drives:
+                    tg.create_task(action(drive))
+
+        await self._commands.run([drive.name for drive in drives], fan_out, priority)
+
+    async def _run_motion(self, axes: Iterable[str], action: Callable[[], Awaitable]):
+        """Run `action` as a command on `axes`, terminating the drives if it
+        fails. A preempted command is not treated as a failure."""
+        try:
+            return await self._commands.run(axes, action)
+        except CommandPreemptedError:
+            raise
+        except:
+            logging.critical("Unhandled movement error, terminating...")
+            await self.terminate()
+            raise
+
+    def submit(self, commands: Iterable[Command]) -> list[asyncio.Task]:
+        """Queue a batch of calls, without waiting for them.
+
+        Returns a task for each command, which resolves to the result of
+        the call. The drive actions of each call are queued with the
+        priority of its command (see `libmotorctrl.command_queue`), in the
+        order of the commands. Several producers may submit commands
+        concurrently."""
+
+        tasks = []
+        for command in commands:
+            context = contextvars.copy_context()
+            context.run(command_priority.set, command.priority)
+            tasks.append(
+                asyncio.create_task(
+                    command.method(self, *command.args, **command.kwargs),
+                    context=context,
+                )
+            )
+        return tasks
+
+    def _check_gantry(self):
+        """Raise a `DriveManagerError` unless the gantry axes are configured."""
+        if None in (self._drive_x, self._drive_y, self._drive_z):
+            raise DriveManagerError("Gantry axes X, Y and Z are not configured")
+
+    async def home(self, drive: DriveTarget | str):
         """Home the targeted drive.
 
         This method homes the target drive. It is usually desirable
         to home the z-axis drive first to avoid colliding with
         obstacles while homing the other drives."""
 
-        match drive:
-            case DriveTarget.DriveX:
-                await self._drive_x.home()
-            case DriveTarget.DriveY:
-                await self._drive_y.home()
-            case DriveTarget.DriveZ:
-                await self._drive_z.home()
+        target_drive = self._get_drive(drive)
+        await self._commands.run((target_drive.name,), target_drive.home)
+
+    def set_cycle_time(
+        self, drive: DriveTarget | str, cycle_time: float, busy_cycle_time: float = None
+    ):
+        """Set the polling rate of the targeted drive.
+
+        The drive is polled every `cycle_time` seconds. If
+        `busy_cycle_time` is provided, the drive is polled at that rate
+        while it is moving or a command is being acknowledged, and backs
+        off to `cycle_time` while idle. Otherwise, the drive is polled
+        at a fixed rate."""
+
+        target_drive = self._get_drive(drive)
+        target_drive.cycle_time = cycle_time
+        target_drive.busy_cycle_time = busy_cycle_time
 
     def set_calibration_offset(self, x_cal: int, y_cal: int):
         """Set the calibration offset to the provided coordinates.
@@ -117,13 +418,71 @@ class DriveManager:
         self._calibration_offset = (x_cal, y_cal)
         logging.info("Calibration offset is %s, %s", x_cal, y_cal)
 
-    async def move(self, target_x: int, target_y: int, target_z: int):
+    def set_keepout_zones(self, zones: list[KeepOutZone] | None):
+        """Set the keep-out zones used to plan the z-axis clearance.
+
+        By default, every `move()` raises the z-axis to `CRUISE_DEPTH`.
+        Once keep-out zones are set, `move()` only raises the z-axis as
+        far as the zones crossed by the straight x/y path require, and
+        does not move it at all if the path crosses no zones. This is
+        only safe if every obstacle in the work area is covered by a
+        zone. Passing `None` or an empty list restores the default
+        behaviour."""
+
+        self._keepout_zones = list(zones) if zones else None
+        logging.info("Keep-out zones are %s", self._keepout_zones)
+
+    def set_motion_blending(self, enabled: bool, descent_radius: int = 5_000):
+        """Overlap the z-axis and x/y-axis phases of each move.
+
+        When enabled, the x and y axes start moving as soon as the
+        live z-axis position has passed the retract depth, rather than
+        once the retract has settled. If keep-out zones are set (see
+        `set_keepout_zones()`), the z-axis also starts descending once
+        the x/y position is within `descent_radius` micrometers of the
+        target, provided the remaining x/y path does not cross any zone
+        shallower than the target depth. Without keep-out zones the
+        descent is never started early."""
+
+        self._blending = enabled
+        self._descent_radius = descent_radius
+
+    def set_motion_profile(self, profile: MotionProfile):
+        """Set the motion profile used by moves which do not specify one.
+
+        By default, all axes move at full speed."""
+
+        self._profile = profile
+        logging.info("Motion profile is %s", profile)
+
+    def _select_profile(self, speed: int | None, profile: MotionProfile | None):
+        """Get the profile of a move, applying any `speed` override."""
+        profile = self._profile if profile is None else profile
+        if speed is not None:
+            profile = replace(profile, speed=speed, z_speed=speed)
+        return profile
+
+    async def move(
+        self,
+        target_x: int,
+        target_y: int,
+        target_z: int,
+        speed: int = None,
+        profile: MotionProfile = None,
+    ):
         """Move to the designated coordinates.
 
         Coordinates must be provided as um integer offsets from the
         calibration point. To execute a movement command, the system
         will raise the z-axis to the specified `CRUISE_DEPTH`, move
-        the x and y axes, and then lower the z-axis to `target_z`.
+        the x and y axes, and then lower the z-axis to `target_z`. If
+        keep-out zones are set (see `set_keepout_zones()`), the z-axis
+        is only raised as far as the x/y path requires.
+
+        The axes move with the speeds of `profile`, or of the profile
+        set with `set_motion_profile()`. If `speed` is provided, every
+        axis moves at that percentage of its maximum velocity instead,
+        e.g. to slow down short hops between wells.
 
         Note that the motion bounds which are used to restrict the
         range of motion to within the bounds of the frame are relative
@@ -132,58 +491,388 @@ class DriveManager:
         separate software limits set in the drive controller
         parameterization which will put the drive in an error state if
         a command exceeding the parameterization bounds is
-        received.
+        received. A target outside the motion bounds is treated as a
+        movement failure: the drives are terminated and a
+        `DriveManagerError` is raised, before anything moves.
 
         Also note that there is no software restriction imposed on the
         motion of the z-axis."""
 
-        try:
-            if not (
-                self._MOVEMENT_BOUNDS[0][0] <= target_x <= self._MOVEMENT_BOUNDS[0][1]
-            ):
-                logging.error(
-                    "Out-of-bounds X coordinate (target was %s, %s, %s)",
-                    target_x,
-                    target_y,
-                    target_z,
+        self._check_gantry()
+        profile = self._select_profile(speed, profile)
+        await self._enforce_bounds([(target_x, target_y, target_z)])
+
+        async def timed_move():
+            move_start = time.monotonic()
+            await self._move_sequence(target_x, target_y, target_z, profile=profile)
+            self._move_duration.observe(time.monotonic() - move_start)
+
+        await self._run_motion(_GANTRY_AXES, timed_move)
+
+    async def define_locations(self, locations: Sequence[tuple[int, int]]):
+        """Store frequently visited x/y locations in the drive controllers.
+
+        The locations (e.g. the wells and the sterilizer) are provided
+        as um integer offsets from the calibration point, and are
+        written into the record tables of the x and y-axis drives,
+        replacing any locations defined previously. Up to 31 locations
+        can be stored. `move_to_location()` then starts the x and y
+        motions by writing only the record number, rather than a new
+        setpoint.
+
+        All locations are checked against the motion bounds before any
+        are stored; as for `move()`, if any is out of bounds, the drives
+        are terminated and a `DriveManagerError` is raised. The calibration offset is applied as the locations
+        are stored, so they must be defined again if it changes. The
+        record tables are written through the parameter channel (FPC),
+        which must be enabled in the drive parameterization."""
+
+        self._check_gantry()
+        locations = [tuple(location) for location in locations]
+        await self._enforce_bounds([(x, y, 0) for x, y in locations], "Location")
+
+        async def upload():
+            async with asyncio.TaskGroup() as upload_tg:
+                upload_tg.create_task(
+                    self._drive_x.upload_records(
+                        [
+                            MotionRecord(x + self._calibration_offset[0])
+                            for x, _ in locations
+                        ]
+                    )
                 )
-                raise DriveManagerError("X coordinate exceeds limits")
-
-            if not (
-                self._MOVEMENT_BOUNDS[1][0] <= target_y <= self._MOVEMENT_BOUNDS[1][1]
-            ):
-                logging.error(
-                    "Out-of-bounds Y coordinate (target was %s, %s, %s)",
-                    target_x,
-                    target_y,
-                    target_z,
+                upload_tg.create_task(
+                    self._drive_y.upload_records(
+                        [
+                            MotionRecord(y + self._calibration_offset[1])
+                            for _, y in locations
+                        ]
+                    )
                 )
-                raise DriveManagerError("Y coordinate exceeds limits")
-        except DriveManagerError as e:
-            logging.critical("Unhandled error '%s', terminating...", e)
-            await self.terminate()
-            raise
 
-        try:
-            await self._drive_z.move(CRUISE_DEPTH)
-            logging.info("Drive Z raised to cruise depth")
-
-            # Run the X and Y motions concurrently
-            async with asyncio.TaskGroup() as move_tg:
-                move_tg.create_task(
-                    self._drive_x.move(target_x + self._calibration_offset[0])
+        await self._commands.run(("X", "Y"), upload)
+        self._locations = locations
+        logging.info("Defined %s locations", len(locations))
+
+    async def move_to_location(self, index: int, target_z: int, z_speed: int = None):
+        """Move to a location stored with `define_locations()`.
+
+        `index` is the position of the location in the list passed to
+        `define_locations()`. The move is otherwise executed as for
+        `move()`, with the z-axis lowered to `target_z`. The x and y
+        axes move at the velocity stored in the record tables, and the
+        z-axis at `z_speed`, or the speed of the current motion
+        profile."""
+
+        self._check_gantry()
+        profile = self._profile
+        if z_speed is not None:
+            profile = replace(profile, z_speed=z_speed)
+        if not 0 <= index < len(self._locations):
+            raise DriveManagerError(f"No location {index} has been defined")
+        target_x, target_y = self._locations[index]
+
+        async def timed_move():
+            move_start = time.monotonic()
+            await self._move_sequence(
+                target_x, target_y, target_z, record=index + 1, profile=profile
+            )
+            self._move_duration.observe(time.monotonic() - move_start)
+
+        await self._run_motion(_GANTRY_AXES, timed_move)
+
+    def _check_bounds(self, target_x: int, target_y: int, target_z: int):
+        """Raise a `DriveManagerError` if the target exceeds the motion bounds."""
+
+        if not (self._MOVEMENT_BOUNDS[0][0] <= target_x <= self._MOVEMENT_BOUNDS[0][1]):
+            logging.error(
+                "Out-of-bounds X coordinate (target was %s, %s, %s)",
+                target_x,
+                target_y,
+                target_z,
+            )
+            raise DriveManagerError("X coordinate exceeds limits")
+
+        if not (self._MOVEMENT_BOUNDS[1][0] <= target_y <= self._MOVEMENT_BOUNDS[1][1]):
+            logging.error(
+                "Out-of-bounds Y coordinate (target was %s, %s, %s)",
+                target_x,
+                target_y,
+                target_z,
+            )
+            raise DriveManagerError("Y coordinate exceeds limits")
+
+    async def _enforce_bounds(
+        self, targets: Sequence[tuple[int, int, int]], name: str = None
+    ):
+        """Check targets against the motion bounds before moving to them.
+
+        An out-of-bounds target is treated as a movement failure: the
+        drives are terminated and a `DriveManagerError` is raised, naming
+        the target by `name` and its index if `name` is provided."""
+
+        for index, target in enumerate(targets):
+            try:
+                self._check_bounds(*target)
+            except DriveManagerError as e:
+                logging.critical("Unhandled error '%s', terminating...", e)
+                await self.terminate()
+                if name is None:
+                    raise
+                raise DriveManagerError(f"{name} {index}: {e}") from None
+
+    async def _move_sequence(
+        self,
+        target_x: int,
+        target_y: int,
+        target_z: int,
+        record: int = None,
+        profile: MotionProfile = None,
+    ):
+        """Raise the z-axis, move the x and y axes, then lower the z-axis.
+
+        If `record` is provided, the x and y motions are started from that
+        record of the drive record tables, which must hold the target.
+        The axes move with the speeds of `profile`, or of the current
+        motion profile."""
+
+        if profile is None:
+            profile = self._profile
+
+        travel_depth = self._travel_depth(target_x, target_y)
+        retracting = False
+        if travel_depth is None:
+            logging.info("XY path is clear, skipping Z retract")
+        elif self._drive_z.get_encoder_position() > travel_depth:
+            if self._blending:
+                # Start the XY motion once Z has passed the retract depth,
+                # letting the retract settle in the background
+                await self._drive_z.start_move(travel_depth, profile.z_speed)
+                await self._drive_z.wait_for(
+                    lambda: self._drive_z.get_encoder_position() <= travel_depth
+                    or self._drive_z.reg_status.motion_complete
+                    or self._drive_z.reg_status.fault_present,
+                    "Z clearance",
+                    self._drive_z.motion_timeout,
                 )
-                move_tg.create_task(
-                    self._drive_y.move(target_y + self._calibration_offset[1])
+                retracting = True
+            else:
+                await self._drive_z.move(travel_depth, profile.z_speed)
+            logging.info("Drive Z raised to %s", travel_depth)
+
+        # Run the X and Y motions concurrently
+        async with asyncio.TaskGroup() as start_tg:
+            if record is None:
+                x_target = target_x + self._calibration_offset[0]
+                y_target = target_y + self._calibration_offset[1]
+                x_speed, y_speed = self._xy_speeds(x_target, y_target, profile)
+                start_tg.create_task(self._drive_x.start_move(x_target, x_speed))
+                start_tg.create_task(self._drive_y.start_move(y_target, y_speed))
+            else:
+                start_tg.create_task(self._drive_x.start_record(record))
+                start_tg.create_task(self._drive_y.start_record(record))
+        descending = False
+        async with asyncio.TaskGroup() as move_tg:
+            move_tg.create_task(self._drive_x.wait_motion_complete())
+            move_tg.create_task(self._drive_y.wait_motion_complete())
+            if self._blending and self._keepout_zones is not None:
+                descending = await self._blend_descent(
+                    move_tg, target_x, target_y, target_z, retracting, profile.z_speed
                 )
-            logging.info("XY motion complete")
-
-            await self._drive_z.move(target_z)
-            logging.info("Z motion complete")
-        except:
-            logging.critical("Unhandled movement error, terminating...")
-            await self.terminate()
-            raise
+        logging.info("XY motion complete")
+
+        if not descending:
+            if retracting:
+                await self._drive_z.wait_motion_complete()
+            await self._drive_z.move(target_z, profile.z_speed)
+        logging.info("Z motion complete")
+
+    async def _blend_descent(
+        self,
+        move_tg: asyncio.TaskGroup,
+        target_x: int,
+        target_y: int,
+        target_z: int,
+        retracting: bool,
+        z_speed: int,
+    ) -> bool:
+        """Start the z-axis descent in `move_tg` once the x/y position is
+        within the descent radius of the target and the remaining path is
+        clear down to the target depth.
+
+        Returns whether the descent was started before the x/y motion
+        completed."""
+
+        def xy_position() -> tuple[int, int]:
+            x_pos, y_pos, _ = self.get_position_raw()
+            return (
+                x_pos - self._calibration_offset[0],
+                y_pos - self._calibration_offset[1],
+            )
+
+        def near_target() -> bool:
+            x_pos, y_pos = xy_position()
+            distance = math.hypot(x_pos - target_x, y_pos - target_y)
+            return distance <= self._descent_radius
+
+        def xy_settled() -> bool:
+            x_status, y_status = self._drive_x.reg_status, self._drive_y.reg_status
+            return (x_status.motion_complete and y_status.motion_complete) or (
+                x_status.fault_present or y_status.fault_present
+            )
+
+        await self._drive_x.wait_for(
+            lambda: near_target() or xy_settled(),
+            "descent radius",
+            self._drive_x.motion_timeout,
+        )
+        if xy_settled():
+            # Either finished or failed, both handled by the regular sequence
+            return False
+
+        clearance = clearance_depth(
+            self._keepout_zones, xy_position(), (target_x, target_y)
+        )
+        if clearance is not None and clearance < target_z:
+            return False
+
+        if retracting:
+            await self._drive_z.wait_motion_complete()
+        logging.info("Starting Z descent within %s um of target", self._descent_radius)
+        move_tg.create_task(self._drive_z.move(target_z, z_speed))
+        return True
+
+    def _xy_speeds(
+        self, x_target: int, y_target: int, profile: MotionProfile
+    ) -> tuple[int, int]:
+        """Get the speeds of the x and y axes for a move to the raw targets.
+
+        For a synchronized profile, the axis with the shorter distance is
+        slowed in proportion, so both axes cruise for the same time."""
+
+        if not profile.synchronized:
+            return profile.speed, profile.speed
+        x_pos, y_pos, _ = self.get_position_raw()
+        x_distance, y_distance = abs(x_target - x_pos), abs(y_target - y_pos)
+        longest = max(x_distance, y_distance)
+        if longest == 0:
+            return profile.speed, profile.speed
+        return (
+            max(1, round(profile.speed * x_distance / longest)),
+            max(1, round(profile.speed * y_distance / longest)),
+        )
+
+    def _travel_depth(self, target_x: int, target_y: int) -> int | None:
+        """Get the depth the z-axis must be raised to before moving the x and
+        y axes to the target, or `None` if no retract is required.
+
+        Without keep-out zones, this is always `CRUISE_DEPTH`."""
+
+        if self._keepout_zones is None:
+            return CRUISE_DEPTH
+
+        x_pos, y_pos, _ = self.get_position_raw()
+        start = (
+            x_pos - self._calibration_offset[0],
+            y_pos - self._calibration_offset[1],
+        )
+        return clearance_depth(self._keepout_zones, start, (target_x, target_y))
+
+    async def execute_path(
+        self,
+        waypoints: (
+            Iterable[tuple[int, int, int, float]]
+            | AsyncIterable[tuple[int, int, int, float]]
+        ),
+        profile: MotionProfile = None,
+    ) -> list[WaypointTiming]:
+        """Move through a sequence of waypoints.
+
+        Each waypoint is an (x, y, z, dwell) tuple: the coordinates are
+        provided as um integer offsets from the calibration point (as
+        for `move()`), and `dwell` is the time in seconds to remain at
+        the waypoint before moving on. Each waypoint is reached in the
+        same way as `move()`. The axes move with the speeds of
+        `profile`, or of the profile set with `set_motion_profile()`.
+
+        Waypoints may be provided by a sequence, an iterator or an async
+        iterator. A sequence is checked against the motion bounds before
+        any motion starts. Otherwise, the waypoints are streamed: each
+        is requested from the iterator while the drives move to the
+        previous waypoint (so an async iterator can compute the next
+        target during the motion), and is checked against the motion
+        bounds when it is received, stopping the path once the previous
+        waypoint is reached. Either way, as for `move()`, an
+        out-of-bounds waypoint terminates the drives and raises a
+        `DriveManagerError`.
+
+        Returns the timing of each waypoint, in path order."""
+
+        self._check_gantry()
+        profile = self._profile if profile is None else profile
+        if isinstance(waypoints, Sequence):
+            await self._enforce_bounds(
+                [waypoint[:3] for waypoint in waypoints], "Waypoint"
+            )
+            logging.info("Executing path of %s waypoints", len(waypoints))
+        else:
+            logging.info("Executing streamed path")
+
+        if isinstance(waypoints, AsyncIterable):
+            stream = aiter(waypoints)
+        else:
+
+            async def iterate():
+                for waypoint in waypoints:
+                    yield waypoint
+
+            stream = iterate()
+
+        async def next_waypoint(index: int) -> tuple[int, int, int, float] | None:
+            try:
+                waypoint = tuple(await anext(stream))
+            except StopAsyncIteration:
+                return None
+            try:
+                self._check_bounds(*waypoint[:3])
+            except DriveManagerError as e:
+                raise DriveManagerError(f"Waypoint {index}: {e}") from None
+            return waypoint
+
+        async def run_path() -> list[WaypointTiming]:
+            timings = []
+            upcoming = asyncio.ensure_future(next_waypoint(0))
+            try:
+                while (waypoint := await upcoming) is not None:
+                    index = len(timings)
+                    # Fetch the next waypoint while moving to this one
+                    upcoming = asyncio.ensure_future(next_waypoint(index + 1))
+                    target_x, target_y, target_z, dwell = waypoint
+                    start = time.monotonic()
+                    await self._move_sequence(
+                        target_x, target_y, target_z, profile=profile
+                    )
+                    arrival = time.monotonic()
+                    if dwell > 0:
+                        await asyncio.sleep(dwell)
+                    timings.append(
+                        WaypointTiming(
+                            index=index,
+                            target=(target_x, target_y, target_z),
+                            start=start,
+                            arrival=arrival,
+                            end=time.monotonic(),
+                        )
+                    )
+                    logging.info(
+                        "Waypoint %s reached in %.3f s", index, timings[-1].travel_time
+                    )
+            finally:
+                upcoming.cancel()
+                await asyncio.gather(upcoming, return_exceptions=True)
+            return timings
+
+        return await self._run_motion(_GANTRY_AXES, run_path)
 
     async def move_direct(self, target_x: int, target_y: int, target_z: int):
         """Move to the designated coordinates without raising the z-axis.
@@ -206,7 +895,9 @@ class DriveManager:
         Also note that there is no software restriction imposed on the
         motion of the z-axis."""
 
-        try:
+        self._check_gantry()
+
+        async def move_direct():
             # Run the X and Y motions concurrently
             async with asyncio.TaskGroup() as move_tg:
                 move_tg.create_task(
@@ -219,54 +910,52 @@ class DriveManager:
 
             await self._drive_z.move(target_z)
             logging.info("Z motion complete")
-        except:
-            logging.critical("Unhandled movement error, terminating...")
-            await self.terminate()
-            raise
 
-    async def stop(self):
+        await self._run_motion(_GANTRY_AXES, move_direct)
+
+    async def move_axis(self, drive: DriveTarget | str, target: int):
+        """Move a single axis to `target`.
+
+        The target is the raw drive position (micrometers for a linear
+        axis); no calibration offset or motion bounds are applied, and
+        no other axis is moved. This is intended for auxiliary axes,
+        such as a rotary or pipette axis. Use `move()` to move the
+        picker-head."""
+
+        target_drive = self._get_drive(drive)
+        await self._run_motion((target_drive.name,), lambda: target_drive.move(target))
+
+    async def stop(self, axes: Iterable[DriveTarget | str] = None):
         """Immediately stop all movement.
 
-        This sets the halt bit on all drives. This can be reversed
-        using the `resume()` method."""
+        This sets the halt bit on all drives (or only those in `axes`),
+        preempting any other actions on them. This can be reversed using
+        the `resume()` method."""
 
-        async with asyncio.TaskGroup() as stop_tg:
-            stop_tg.create_task(self._drive_x.stop())
-            stop_tg.create_task(self._drive_y.stop())
-            stop_tg.create_task(self._drive_z.stop())
+        await self._fan_out(Drive.stop, axes, CommandPriority.STOP)
 
-    async def stop_drive(self, drive: DriveTarget):
+    async def stop_drive(self, drive: DriveTarget | str):
         """Immediately stop the specified drive.
 
-        This sets the halt bit on the drive. This can be reversed
-        using the `resume_drive()` method."""
+        This sets the halt bit on the drive, preempting any other
+        actions on it. This can be reversed using the `resume_drive()`
+        method."""
 
-        match drive:
-            case DriveTarget.DriveX:
-                await self._drive_x.stop()
-            case DriveTarget.DriveY:
-                await self._drive_y.stop()
-            case DriveTarget.DriveZ:
-                await self._drive_z.stop()
+        target_drive = self._get_drive(drive)
+        await self._commands.run(
+            (target_drive.name,), target_drive.stop, CommandPriority.STOP
+        )
 
-    async def resume(self):
-        """Clear the halt bit on all drives."""
+    async def resume(self, axes: Iterable[DriveTarget | str] = None):
+        """Clear the halt bit on all drives (or only those in `axes`)."""
 
-        async with asyncio.TaskGroup() as resume_tg:
-            resume_tg.create_task(self._drive_x.resume())
-            resume_tg.create_task(self._drive_y.resume())
-            resume_tg.create_task(self._drive_z.resume())
+        await self._fan_out(Drive.resume, axes)
 
-    async def resume_drive(self, drive: DriveTarget):
+    async def resume_drive(self, drive: DriveTarget | str):
         """Clear the halt bit on the specified drive."""
 
-        match drive:
-            case DriveTarget.DriveX:
-                await self._drive_x.resume()
-            case DriveTarget.DriveY:
-                await self._drive_y.resume()
-            case DriveTarget.DriveZ:
-                await self._drive_z.resume()
+        target_drive = self._get_drive(drive)
+        await self._commands.run((target_drive.name,), target_drive.resume)
 
     def get_position(self) -> (float, float, float):
         """Get the position of the picker-head in millimeters.
@@ -274,6 +963,7 @@ class DriveManager:
         This is measured by the encoders in each drive, and is an
         offset from the calibration point."""
 
+        self._check_gantry()
         x_pos = (
             self._drive_x.get_encoder_position() - self._calibration_offset[0]
         ) / 1000
@@ -291,59 +981,83 @@ class DriveManager:
         `get_position()` method should be used unless you know what you
         are doing."""
 
+        self._check_gantry()
         x_pos = self._drive_x.get_encoder_position()
         y_pos = self._drive_y.get_encoder_position()
         z_pos = self._drive_z.get_encoder_position()
         return (x_pos, y_pos, z_pos)
 
-    def get_drive_state(self, drive: DriveTarget) -> DriveState:
+    def get_velocity(self) -> (float, float, float):
+        """Get the velocity of the picker-head in millimeters per second.
+
+        This is derived from the last two encoder positions read from
+        each drive, without any additional reads."""
+
+        self._check_gantry()
+        return (
+            self._drive_x.get_velocity() / 1000,
+            self._drive_y.get_velocity() / 1000,
+            self._drive_z.get_velocity() / 1000,
+        )
+
+    def get_axis_position(self, drive: DriveTarget | str) -> int:
+        """Get the raw encoder position of a single axis.
+
+        As for `move_axis()`, this is the position in drive units,
+        without the calibration offset."""
+
+        return self._get_drive(drive).get_encoder_position()
+
+    def get_settle_time(self, drive: DriveTarget | str) -> float | None:
+        """Get the time taken by the last motion of a drive to settle.
+
+        This is the time in seconds from when the drive stopped moving
+        to when it reported the motion as complete, or `None` if this
+        is not available from the recent status history."""
+
+        return self._get_drive(drive).get_settle_time()
+
+    def get_drive_state(self, drive: DriveTarget | str) -> DriveState:
         """Get the status of a drive.
 
         Note that if the drive state is `DriveState.WARN` the drive
         may still be capable of movement depending on the severity of
-        the warning."""
+        the warning. If the connection to the drive has been lost, a
+        `DriveActionError` is raised instead while the drive worker
+        reconnects."""
 
-        match drive:
-            case DriveTarget.DriveX:
-                return self._drive_x.get_status()
-            case DriveTarget.DriveY:
-                return self._drive_y.get_status()
-            case DriveTarget.DriveZ:
-                return self._drive_z.get_status()
+        return self._get_drive(drive).get_status()
 
-    def get_drive_exception(self, drive: DriveTarget) -> DriveError:
+    def get_drive_exception(self, drive: DriveTarget | str) -> DriveError:
         """Get the diagnostic code and message from a drive.
 
         Refer to Appendix D of the CMMO-ST FHPP datasheet for a
         comprehensive list of error codes and diagnostic messages. If
         no fault is present, the error code will be 0."""
 
-        match drive:
-            case DriveTarget.DriveX:
-                return self._drive_x.get_exception()
-            case DriveTarget.DriveY:
-                return self._drive_y.get_exception()
-            case DriveTarget.DriveZ:
-                return self._drive_z.get_exception()
+        return self._get_drive(drive).get_exception()
 
-    async def reset_drive(self, drive: DriveTarget):
+    async def read_drive_exception(self, drive: DriveTarget | str) -> DriveError:
+        """Read the diagnostic code and message from a drive on demand.
+
+        `get_drive_exception()` returns the diagnostic code read when
+        the current fault or warning was first flagged. This method
+        instead reads the diagnostic code from the drive controller
+        immediately, regardless of the drive state."""
+
+        return await self._get_drive(drive).read_diagnostics()
+
+    async def reset_drive(self, drive: DriveTarget | str):
         """Reset a targeted drive, acknowledging faults.
 
         Some error messages are acknowledgeable, and can be cleared by
         toggling the reset bit on the problematic drive controller."""
 
-        match drive:
-            case DriveTarget.DriveX:
-                return self._drive_x.reset_error()
-            case DriveTarget.DriveY:
-                return self._drive_y.reset_error()
-            case DriveTarget.DriveZ:
-                return self._drive_z.reset_error()
-
-    async def terminate(self):
-        """Disable all drives and terminate the Modbus connections."""
-
-        async with asyncio.TaskGroup() as term_tg:
-            term_tg.create_task(self._drive_x.terminate())
-            term_tg.create_task(self._drive_y.terminate())
-            term_tg.create_task(self._drive_z.terminate())
+        target_drive = self._get_drive(drive)
+        await self._commands.run((target_drive.name,), target_drive.reset_error)
+
+    async def terminate(self, axes: Iterable[DriveTarget | str] = None):
+        """Disable all drives (or only those in `axes`) and terminate the
+        Modbus connections, preempting any other actions on them."""
+
+        await self._fan_out(Drive.terminate, axes, CommandPriority.STOP)
@@ -0,0 +1,301 @@
+"""Prediction of move durations from calibrated kinematic models of the axes.
+
+Each axis is modelled by an `AxisModel`: a trapezoidal velocity profile
+limited by the maximum velocity and acceleration of the axis, plus the time
+taken to settle once it stops moving and the latency before it starts. A
+`GantryModel` combines the models of the x, y and z axes to predict the
+duration of a `DriveManager.move()`, so schedulers and route planners can
+use real time costs rather than distances:
+
+```python
+from libmotorctrl import GantryModel, load_telemetry
+from libmotorctrl.route_planner import plan_picks
+
+model = GantryModel.from_telemetry(load_telemetry("run.tlm"))
+picks = plan_picks(colonies, wells, sterilizer, cost=model.travel_time)
+```
+
+The models are calibrated from status histories, such as a telemetry
+recording. Predictions for a single move only need the standard library,
+while calibration and predictions for arrays of moves use NumPy (install the
+`telemetry` extra), broadcasting over the arrays passed in so millions of
+candidate moves can be scored at once.
+
+All positions are in micrometers and times in seconds."""
+
+import math
+import numbers
+from dataclasses import dataclass
+from .drive_manager import CRUISE_DEPTH
+
+
+@dataclass
+class AxisModel:
+    """A kinematic model of an axis."""
+
+    max_velocity: float
+    """The maximum velocity of the axis, in micrometers per second."""
+    acceleration: float
+    """The acceleration (and deceleration) of the axis, in micrometers per
+    second squared."""
+    settle_time: float = 0.0
+    """The time from the axis stopping to the motion being reported as
+    complete."""
+    latency: float = 0.0
+    """The time from a move being started to the axis moving, e.g. the mean
+    of the `move_latency_seconds` metric for the `is_moving` event."""
+
+    def move_time(self, distance, speed: float = 100):
+        """Predict the time taken to move a distance (or an array of
+        distances) at `speed` percent of the maximum velocity.
+
+        Moving no distance takes no time."""
+        velocity = self.max_velocity * speed / 100
+        # Moves shorter than this never reach the velocity
+        ramp_distance = velocity * velocity / self.acceleration
+
+        if isinstance(distance, numbers.Real):
+            distance = abs(distance)
+            if distance == 0:
+                return 0.0
+            if distance >= ramp_distance:
+                motion = distance / velocity + velocity / self.acceleration
+            else:
+                motion = 2 * math.sqrt(distance / self.acceleration)
+            return self.latency + motion + self.settle_time
+
+        import numpy as np
+
+        distance = np.abs(distance)
+        motion = np.where(
+            distance >= ramp_distance,
+            distance / velocity + velocity / self.acceleration,
+            2 * np.sqrt(distance / self.acceleration),
+        )
+        return np.where(distance == 0, 0.0, self.latency + motion + self.settle_time)
+
+    @classmethod
+    def calibrate(
+        cls, timestamp, position, is_moving, motion_complete, latency: float = 0.0
+    ) -> "AxisModel":
+        """Fit a model to a status history of the axis.
+
+        The history is given as arrays of the `timestamp`, `position`,
+        `is_moving` and `motion_complete` fields of the status snapshots in
+        the order they were read, e.g. those of an axis returned by
+        `load_telemetry()`. Each run of snapshots in which the axis is
+        moving is taken as a move, starting and ending halfway between the
+        snapshots either side of the run.
+
+        The maximum velocity and acceleration are fitted by least squares to
+        the durations and distances of the moves, along with a constant
+        offset of the durations (e.g. from the delay before the drive
+        reports the axis moving), which is discarded. Moves much slower
+        than the fit, such as homing or moves at reduced speed, are left
+        out of it, so the history should mostly hold moves at full speed,
+        over distances both shorter and longer than needed to reach the
+        maximum velocity. The settle time is the median of those of the
+        moves.
+
+        Raises a `ValueError` if the history holds no complete moves."""
+        import numpy as np
+
+        timestamp = np.asarray(timestamp, dtype=float)
+        position = np.asarray(position, dtype=float)
+        moving = np.asarray(is_moving, dtype=bool)
+        complete = np.asarray(motion_complete, dtype=bool)
+
+        # Each move spans from the last snapshot before the axis moves to
+        # the first after it stops
+        edges = np.diff(moving.astype(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) + 1
+        if starts.size:
+            ends = ends[ends > starts[0]]
+        starts = starts[: ends.size]
+
+        # The edges fall anywhere between the snapshots either side
+        durations = (timestamp[ends - 1] + timestamp[ends]) / 2 - (
+            timestamp[starts] + timestamp[starts + 1]
+        ) / 2
+        distances = np.abs(position[ends] - position[starts])
+        valid = (distances > 0) & (durations > 0)
+        if not valid.any():
+            raise ValueError("The history holds no complete moves")
+
+        # Start from the fastest moves, whose average speed and acceleration
+        # are close to the limits. Moves much slower than the current fit
+        # are left out of the next one.
+        velocity = float(np.max(distances[valid] / durations[valid]))
+        acceleration = float(np.max(4 * distances[valid] / durations[valid] ** 2))
+        offset = 0.0
+        # Residuals below the polling interval are timing noise
+        tolerance = float(np.median(np.diff(timestamp)))
+        used = None
+        for _ in range(10):
+            model = cls(velocity, acceleration)
+            residuals = durations - offset - model.move_time(distances)
+            spread = 1.4826 * np.median(np.abs(residuals[valid]))
+            fitted = valid & (residuals <= max(3 * spread, tolerance))
+            if used is not None and (fitted == used).all():
+                break
+            used = fitted
+            velocity, acceleration, offset = _fit_trapezoid(
+                distances[used], durations[used], velocity, acceleration
+            )
+
+        settle_times = []
+        for end in ends:
+            settled = np.flatnonzero(complete[end:])
+            if settled.size:
+                settle_times.append(timestamp[end + settled[0]] - timestamp[end])
+
+        return cls(
+            max_velocity=velocity,
+            acceleration=acceleration,
+            settle_time=float(np.median(settle_times)) if settle_times else 0.0,
+            latency=latency,
+        )
+
+
+def _fit_trapezoid(distances, durations, velocity: float, acceleration: float):
+    """Fit the maximum velocity and acceleration of a trapezoidal profile,
+    and a constant offset, to the durations of moves over distances by
+    Gauss-Newton iteration from an initial guess.
+
+    The velocity and acceleration are fitted as logarithms, which keeps them
+    positive. Returns the velocity, acceleration and offset."""
+    import numpy as np
+
+    def residuals(params):
+        model = AxisModel(*np.exp(params[:2]))
+        return durations - params[2] - model.move_time(distances)
+
+    params = np.array([math.log(velocity), math.log(acceleration), 0.0])
+    error = residuals(params)
+    cost = error @ error
+    for _ in range(100):
+        velocity, acceleration = np.exp(params[:2])
+        # The derivatives of the move time with respect to the parameters
+        cruising = distances >= velocity * velocity / acceleration
+        jacobian = np.ones((distances.size, 3))
+        jacobian[:, 0] = np.where(
+            cruising, velocity / acceleration - distances / velocity, 0.0
+        )
+        jacobian[:, 1] = np.where(
+            cruising, -velocity / acceleration, -np.sqrt(distances / acceleration)
+        )
+        step = np.linalg.lstsq(jacobian, error, rcond=None)[0]
+
+        # Halve the step until it improves the fit
+        while np.abs(step).max() > 1e-9:
+            candidate = residuals(params + step)
+            if candidate @ candidate < cost:
+                break
+            step /= 2
+        else:
+            break
+        params += step
+        error = candidate
+        cost = error @ error
+
+    velocity, acceleration = np.exp(params[:2])
+    return float(velocity), float(acceleration), float(params[2])
+
+
+@dataclass
+class GantryModel:
+    """Kinematic models of the x, y and z axes, predicting the duration of
+    `DriveManager.move()`."""
+
+    x: AxisModel
+    y: AxisModel
+    z: AxisModel
+
+    @classmethod
+    def from_telemetry(cls, telemetry: dict, metrics=None) -> "GantryModel":
+        """Calibrate the models of the axes from a telemetry recording.
+
+        `telemetry` is a recording loaded with `load_telemetry()`, holding
+        the "X", "Y" and "Z" axes. If the `metrics` of the drive manager
+        the recording was made with are provided (see
+        `DriveManager.metrics`), the latency of each axis is taken from the
+        mean time for the axis to start moving."""
+
+        models = []
+        for axis in ("X", "Y", "Z"):
+            latency = None
+            if metrics is not None:
+                histogram = metrics.get(
+                    "move_latency_seconds", drive=axis, event="is_moving"
+                )
+                latency = histogram.mean if histogram is not None else None
+            arrays = telemetry[axis]
+            models.append(
+                AxisModel.calibrate(
+                    arrays["timestamp"],
+                    arrays["position"],
+                    arrays["is_moving"],
+                    arrays["motion_complete"],
+                    latency=latency or 0.0,
+                )
+            )
+        return cls(*models)
+
+    def travel_time(self, start, target, speed: float = 100):
+        """Predict the time for the x and y axes to travel between two (x,
+        y) points, or arrays of points with a last dimension of 2.
+
+        The axes move concurrently, so this is the time of the slower axis.
+        It can be passed as the `cost` function of the route planner."""
+        if isinstance(start, tuple) and isinstance(target, tuple):
+            return max(
+                self.x.move_time(target[0] - start[0], speed),
+                self.y.move_time(target[1] - start[1], speed),
+            )
+
+        import numpy as np
+
+        start, target = np.asarray(start), np.asarray(target)
+        return np.maximum(
+            self.x.move_time(target[..., 0] - start[..., 0], speed),
+            self.y.move_time(target[..., 1] - start[..., 1], speed),
+        )
+
+    def move_time(
+        self,
+        start,
+        target,
+        speed: float = 100,
+        z_speed: float = 100,
+        travel_depth: int = CRUISE_DEPTH,
+    ):
+        """Predict the duration of a `DriveManager.move()` between two (x, y,
+        z) points, or arrays of points with a last dimension of 3.
+
+        As for `move()`, the z-axis is raised to `travel_depth` (if it is
+        lower), the x and y axes are moved, and the z-axis is lowered to the
+        target. Keep-out zones and motion blending are not modelled, so the
+        prediction is an upper bound when they are in use. Arrays are
+        broadcast against each other, e.g. to score every pair of points."""
+        if isinstance(start, tuple) and isinstance(target, tuple):
+            raise_time = self.z.move_time(max(start[2] - travel_depth, 0), z_speed)
+            depth = min(start[2], travel_depth)
+            return (
+                raise_time
+                + self.travel_time(start[:2], target[:2], speed)
+                + self.z.move_time(target[2] - depth, z_speed)
+            )
+
+        import numpy as np
+
+        start, target = np.asarray(start), np.asarray(target)
+        raise_time = self.z.move_time(
+            np.maximum(start[..., 2] - travel_depth, 0), z_speed
+        )
+        depth = np.minimum(start[..., 2], travel_depth)
+        return (
+            raise_time
+            + self.travel_time(start[..., :2], target[..., :2], speed)
+            + self.z.move_time(target[..., 2] - depth, z_speed)
+        )
@@ -0,0 +1,156 @@
+"""Latency metrics collected by the drives.
+
+Each `Drive` reports the duration of the Modbus transactions of every worker
+cycle, and for every move, the time from the move being started to the
+setpoint being written, `ack_start` being raised, `is_moving` being raised
+and `motion_complete` being raised. The `DriveManager` reports the duration
+of every `move()`. Together these show which axis and which phase of a move
+limits throughput.
+
+Metrics are reported to a `MetricsSink`. By default, each `DriveManager`
+collects them in an `InMemoryMetrics` sink, available as
+`DriveManager.metrics`, which can also render them in the Prometheus text
+exposition format. To report metrics elsewhere, subclass `MetricsSink` and
+implement both of its methods."""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+"""The default upper bounds of the histogram buckets, in seconds."""
+
+
+class Histogram:
+    """A histogram of observed values."""
+
+    __slots__ = ("buckets", "bucket_counts", "count", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        """The upper bounds of the buckets."""
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        """The number of values observed in each bucket (not cumulative). The
+        last bucket holds the values above the largest bound."""
+        self.count = 0
+        """The number of values observed."""
+        self.sum = 0.0
+        """The sum of the values observed."""
+
+    def observe(self, value: float):
+        """Record a value."""
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> float | None:
+        """The mean of the values observed, or `None` if there are none."""
+        return self.sum / self.count if self.count else None
+
+
+class Counter:
+    """A monotonically increasing count."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+        """The current count."""
+
+    def inc(self, amount: float = 1):
+        """Increase the count by `amount`."""
+        self.value += amount
+
+
+class MetricsSink(ABC):
+    """The interface through which metrics are reported.
+
+    The drives request a metric once per label set, and then report to the
+    returned object from their worker or movement methods, so reporting a
+    value is a single method call. Implementations return objects with the
+    same `observe()` and `inc()` methods as `Histogram` and `Counter`.
+
+    Metric names follow Prometheus conventions, and labels identify the drive
+    and (where applicable) the movement event."""
+
+    @abstractmethod
+    def histogram(self, name: str, description: str, **labels: str) -> Histogram:
+        """Get the histogram with the given name and labels."""
+
+    @abstractmethod
+    def counter(self, name: str, description: str, **labels: str) -> Counter:
+        """Get the counter with the given name and labels."""
+
+
+class InMemoryMetrics(MetricsSink):
+    """A metrics sink keeping every metric in memory."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # Metric name -> (type, description, {label items: metric})
+        self._metrics = {}
+
+    def _get(self, kind: str, name: str, description: str, labels: dict, factory):
+        _, _, series = self._metrics.setdefault(name, (kind, description, {}))
+        key = tuple(sorted(labels.items()))
+        if key not in series:
+            series[key] = factory()
+        return series[key]
+
+    def histogram(self, name: str, description: str, **labels: str) -> Histogram:
+        return self._get(
+            "histogram", name, description, labels, lambda: Histogram(self.buckets)
+        )
+
+    def counter(self, name: str, description: str, **labels: str) -> Counter:
+        return self._get("counter", name, description, labels, Counter)
+
+    def get(self, name: str, **labels: str) -> Histogram | Counter | None:
+        """Get a reported metric, or `None` if it has not been reported."""
+        if name not in self._metrics:
+            return None
+        return self._metrics[name][2].get(tuple(sorted(labels.items())))
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, (kind, description, series) in self._metrics.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in series.items():
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(key)} {metric.value}")
+                    continue
+                cumulative = 0
+                bounds = [*(repr(float(b)) for b in metric.buckets), "+Inf"]
+                for bound, bucket_count in zip(bounds, metric.bucket_counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(key + (("le", bound),))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {metric.sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(items: tuple[tuple[str, str], ...]) -> str:
+    if not items:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in items
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
@@ -0,0 +1,420 @@
+"""Pick-order planning for sampling runs via the `plan_picks()` function.
+
+A sampling run repeatedly moves the picker-head from a colony to a well, and
+from the well to the sterilizer (or directly on to the next colony). The
+planner chooses the order the colonies are visited in and assigns a well to
+each colony to minimize the total travel time of the run. The resulting plan
+can be converted to waypoints for `DriveManager.execute_path()` with
+`plan_waypoints()`.
+
+All coordinates are (x, y) micrometer offsets from the calibration point, as
+used by `DriveManager.move()`."""
+
+import logging
+import math
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+Point = tuple[int, int]
+
+_NEIGHBOURS = 8
+"""The number of nearest candidates considered for each 2-opt or well
+exchange move."""
+
+
+def travel_cost(a: Point, b: Point) -> float:
+    """Estimate the cost of moving between two points.
+
+    The x and y-axes move concurrently, so the travel time is dominated by
+    the axis with the longest displacement. This returns that displacement
+    (the Chebyshev distance) in micrometers."""
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+@dataclass
+class Pick:
+    """A single pick in a planned sampling run."""
+
+    colony_index: int
+    """The index of the colony in the list passed to `plan_picks()`."""
+    well_index: int
+    """The index of the well in the list passed to `plan_picks()`."""
+    colony: Point
+    """The coordinates of the colony."""
+    well: Point
+    """The coordinates of the well."""
+    sterilize: bool
+    """Whether the sterilizer is visited after depositing in the well."""
+
+
+class _Grid:
+    """Uniform grid bucketing points for nearest-neighbour queries.
+
+    Queries use the Chebyshev distance, which bounds the distance to points
+    in cells outside the rings already searched."""
+
+    _POINTS_PER_CELL = 4
+
+    def __init__(self, points: Sequence[Point], indices: Sequence[int]):
+        self.points = points
+        self._build(indices)
+
+    def _build(self, indices: Sequence[int]):
+        xs = [self.points[i][0] for i in indices]
+        ys = [self.points[i][1] for i in indices]
+        self.x0 = min(xs, default=0)
+        self.y0 = min(ys, default=0)
+        x_span = max(max(xs, default=0) - self.x0, 1)
+        y_span = max(max(ys, default=0) - self.y0, 1)
+        # Square cells holding a few points each on average. For a narrow
+        # strip of points (e.g. a row of wells), the cells are instead sized
+        # to hold a few points each along the length of the strip.
+        count = max(len(indices), 1)
+        self.cell = (
+            max(
+                math.sqrt(x_span * y_span * self._POINTS_PER_CELL / count),
+                max(x_span, y_span) * self._POINTS_PER_CELL / count,
+            )
+            + 1
+        )
+        self.last_x = int(x_span // self.cell)
+        self.last_y = int(y_span // self.cell)
+        self.buckets = {}
+        self.count = 0
+        for i in indices:
+            self.add(i)
+        self.built_count = self.count
+
+    def _key(self, point: Point) -> tuple[int, int]:
+        return (
+            int((point[0] - self.x0) // self.cell),
+            int((point[1] - self.y0) // self.cell),
+        )
+
+    def add(self, index: int):
+        self.buckets.setdefault(self._key(self.points[index]), []).append(index)
+        self.count += 1
+
+    def remove(self, index: int):
+        self.buckets[self._key(self.points[index])].remove(index)
+        self.count -= 1
+        # Rebuild with larger cells as points are removed, so queries don't
+        # have to search through empty cells
+        if 0 < self.count < self.built_count // 4:
+            self._build([i for bucket in self.buckets.values() for i in bucket])
+
+    def nearest(self, point: Point, k: int = 1) -> list[int]:
+        """Get the indices of the (up to) `k` nearest points to `point`."""
+        k = min(k, self.count)
+        if k == 0:
+            return []
+
+        cx, cy = self._key(point)
+        px, py = point
+        points = self.points
+        last_x, last_y = self.last_x, self.last_y
+        # Skip the rings which cannot reach the grid when the query point
+        # lies outside of it, and stop at the ring covering all of it
+        first_ring = max(0, -cx, -cy, cx - last_x, cy - last_y)
+        last_ring = max(cx, cy, last_x - cx, last_y - cy)
+        found = []
+        for ring in range(first_ring, last_ring + 1):
+            for ix in range(max(cx - ring, 0), min(cx + ring, last_x) + 1):
+                if abs(ix - cx) == ring:
+                    iys = range(max(cy - ring, 0), min(cy + ring, last_y) + 1)
+                else:
+                    iys = (cy - ring, cy + ring)
+                for iy in iys:
+                    for index in self.buckets.get((ix, iy), ()):
+                        # Inlined `travel_cost()`, as this is the hot loop
+                        dx = points[index][0] - px
+                        dy = points[index][1] - py
+                        found.append((max(dx, -dx, dy, -dy), index))
+            # Points in unsearched rings are at least `ring` cells away
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= ring * self.cell:
+                    break
+        found.sort()
+        return [index for _, index in found[:k]]
+
+
+def _order_colonies(
+    colonies: Sequence[Point],
+    start: Point,
+    cost: Callable[[Point, Point], float],
+    deadline: float,
+) -> list[int]:
+    """Order the colonies with a nearest-neighbour tour from `start`, then
+    improve the tour with 2-opt moves until no move helps or time runs out."""
+    # Node 0 is the fixed start point and nodes 1..n are the colonies
+    points = [start, *colonies]
+    nodes = range(1, len(points))
+    grid = _Grid(points, nodes)
+
+    route = [0]
+    for _ in nodes:
+        (nearest,) = grid.nearest(points[route[-1]])
+        grid.remove(nearest)
+        route.append(nearest)
+
+    # The nearest neighbours of each node, found as they are needed, so
+    # that a short time budget is not spent on nodes 2-opt never reaches
+    grid = _Grid(points, nodes)
+    neighbours = {}
+
+    def nearest(node: int) -> list[int]:
+        if node not in neighbours:
+            neighbours[node] = [
+                n for n in grid.nearest(points[node], _NEIGHBOURS + 1) if n != node
+            ]
+        return neighbours[node]
+
+    position = [0] * len(points)
+    for index, node in enumerate(route):
+        position[node] = index
+
+    last = len(route) - 1
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for i in range(last):
+            if i % 16 == 0 and time.monotonic() > deadline:
+                break
+            a, b = route[i], route[i + 1]
+            ab = cost(points[a], points[b])
+            for c in nearest(a):
+                j = position[c]
+                if j <= i + 1:
+                    continue
+                # The route is open-ended, so reversing up to the last node
+                # only replaces one edge
+                if j == last:
+                    gain = ab - cost(points[a], points[c])
+                else:
+                    d = route[j + 1]
+                    gain = (
+                        ab
+                        + cost(points[c], points[d])
+                        - cost(points[a], points[c])
+                        - cost(points[b], points[d])
+                    )
+                if gain > 1e-9:
+                    route[i + 1 : j + 1] = route[j:i:-1]
+                    for index in range(i + 1, j + 1):
+                        position[route[index]] = index
+                    improved = True
+                    break
+
+    return [node - 1 for node in route[1:]]
+
+
+def plan_picks(
+    colonies: Sequence[Point],
+    wells: Sequence[Point],
+    sterilizer: Point = None,
+    start: Point = None,
+    sterilize_every: int = 1,
+    cost: Callable[[Point, Point], float] = travel_cost,
+    time_budget: float = 0.25,
+) -> list[Pick]:
+    """Plan the order of a sampling run and the well used for each colony.
+
+    The run starts from `start` (by default the sterilizer, or the first
+    colony if there is no sterilizer). Each pick moves to a colony and then
+    to its well. If a `sterilizer` is provided, it is visited after every
+    `sterilize_every` picks and after the last pick; these visits are fixed
+    and are not reordered. Only the wells provided are used, so any wells
+    that already hold a sample should be left out.
+
+    The colonies are ordered by a nearest-neighbour tour improved with 2-opt
+    moves, and each is greedily assigned the free well that minimizes the
+    travel to the well and on to the next destination. The assignment is
+    then improved by exchanging wells between picks. `cost` returns the
+    travel cost between two points (see `travel_cost()`). `time_budget` is
+    the time in seconds the planning may take: building the initial plan
+    takes a fraction of the default budget for a few thousand colonies, and
+    once the budget runs out, the best plan found so far is returned.
+
+    If there are more colonies than wells, only as many colonies as there
+    are wells are picked, in the order given.
+
+    Returns the picks in execution order. Raises a `ValueError` if
+    `sterilize_every` is less than 1."""
+
+    if sterilize_every < 1:
+        raise ValueError(f"sterilize_every must be at least 1, not {sterilize_every}")
+    deadline = time.monotonic() + time_budget
+    if len(colonies) > len(wells):
+        logging.warning(
+            "Only %s wells for %s colonies, some will not be picked",
+            len(wells),
+            len(colonies),
+        )
+        colonies = colonies[: len(wells)]
+    if not colonies:
+        return []
+    if start is None:
+        start = sterilizer if sterilizer is not None else colonies[0]
+
+    # The wells nearest to each colony are the candidates for its pick, and
+    # for the pick before it when it is visited directly from that well
+    all_wells = _Grid(wells, range(len(wells)))
+    nearby_wells = [all_wells.nearest(colony, _NEIGHBOURS) for colony in colonies]
+
+    # If every pick returns to the sterilizer, the order of the colonies does
+    # not affect the travel cost, so the whole budget goes to the well
+    # assignment. Otherwise, leave it half of the remaining budget.
+    if sterilizer is not None and sterilize_every == 1:
+        order_deadline = time.monotonic()
+    else:
+        order_deadline = (time.monotonic() + deadline) / 2
+    order = _order_colonies(colonies, start, cost, order_deadline)
+    count = len(order)
+    sterilize = [
+        sterilizer is not None and ((i + 1) % sterilize_every == 0 or i == count - 1)
+        for i in range(count)
+    ]
+    # Where the picker-head goes after depositing each sample
+    destinations = [
+        (
+            sterilizer
+            if sterilize[i]
+            else colonies[order[i + 1]] if i + 1 < count else None
+        )
+        for i in range(count)
+    ]
+
+    def pick_cost(i: int, well: int) -> float:
+        total = cost(colonies[order[i]], wells[well])
+        if destinations[i] is not None:
+            total += cost(wells[well], destinations[i])
+        return total
+
+    candidates = [nearby_wells[colony] for colony in order]
+    if sterilizer is not None:
+        by_sterilizer = sorted(
+            range(len(wells)), key=lambda well: cost(wells[well], sterilizer)
+        )
+    next_by_sterilizer = 0
+
+    # The wells in order of their distance from the middle of the colonies,
+    # for picks whose nearby wells are all taken
+    middle = (
+        (min(x for x, _ in colonies) + max(x for x, _ in colonies)) / 2,
+        (min(y for _, y in colonies) + max(y for _, y in colonies)) / 2,
+    )
+    by_middle = sorted(range(len(wells)), key=lambda well: cost(wells[well], middle))
+    next_by_middle = 0
+
+    # Greedy assignment, considering the free wells nearest to both ends of
+    # the trip through the well
+    used = [False] * len(wells)
+    assigned = [0] * count
+    for i in range(count):
+        options = [well for well in candidates[i] if not used[well]]
+        if sterilize[i]:
+            while used[by_sterilizer[next_by_sterilizer]]:
+                next_by_sterilizer += 1
+            options += by_sterilizer[
+                next_by_sterilizer : next_by_sterilizer + _NEIGHBOURS
+            ]
+        elif i + 1 < count:
+            options += candidates[i + 1]
+        options = [well for well in options if not used[well]]
+        if not options:
+            # All of the nearby wells are already taken
+            while used[by_middle[next_by_middle]]:
+                next_by_middle += 1
+            options = [
+                well
+                for well in by_middle[next_by_middle : next_by_middle + _NEIGHBOURS]
+                if not used[well]
+            ]
+        assigned[i] = min(options, key=lambda well: pick_cost(i, well))
+        used[assigned[i]] = True
+
+    # Improve the assignment by moving picks to free wells or exchanging
+    # wells between pairs of picks
+    owner = dict(zip(assigned, range(count)))
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for i in range(count):
+            if i % 16 == 0 and time.monotonic() > deadline:
+                break
+            current = pick_cost(i, assigned[i])
+            for well in candidates[i]:
+                j = owner.get(well)
+                if j == i:
+                    continue
+                if j is None:
+                    gain = current - pick_cost(i, well)
+                else:
+                    gain = (
+                        current
+                        + pick_cost(j, well)
+                        - pick_cost(i, well)
+                        - pick_cost(j, assigned[i])
+                    )
+                if gain > 1e-9:
+                    del owner[assigned[i]]
+                    if j is not None:
+                        assigned[j] = assigned[i]
+                        owner[assigned[j]] = j
+                    assigned[i] = well
+                    owner[well] = i
+                    current = pick_cost(i, well)
+                    improved = True
+
+    return [
+        Pick(
+            colony_index=order[i],
+            well_index=assigned[i],
+            colony=colonies[order[i]],
+            well=wells[assigned[i]],
+            sterilize=sterilize[i],
+        )
+        for i in range(count)
+    ]
+
+
+def route_cost(
+    picks: Sequence[Pick],
+    start: Point,
+    sterilizer: Point = None,
+    cost: Callable[[Point, Point], float] = travel_cost,
+) -> float:
+    """Get the total travel cost of a planned sampling run from `start`."""
+    total = 0.0
+    position = start
+    for pick in picks:
+        total += cost(position, pick.colony) + cost(pick.colony, pick.well)
+        position = pick.well
+        if pick.sterilize:
+            total += cost(position, sterilizer)
+            position = sterilizer
+    return total
+
+
+def plan_waypoints(
+    picks: Sequence[Pick],
+    colony_depth: int,
+    well_depth: int,
+    sterilizer: tuple[int, int, int] = None,
+    sterilizer_dwell: float = 0,
+) -> list[tuple[int, int, int, float]]:
+    """Convert planned picks to waypoints for `DriveManager.execute_path()`.
+
+    `colony_depth` and `well_depth` are the z-axis depths to lower to at the
+    colonies and wells. `sterilizer` is the (x, y, z) position of the
+    sterilizer, where the picker-head dwells for `sterilizer_dwell` seconds
+    after each pick that is followed by sterilization."""
+    waypoints = []
+    for pick in picks:
+        waypoints.append((*pick.colony, colony_depth, 0))
+        waypoints.append((*pick.well, well_depth, 0))
+        if pick.sterilize:
+            waypoints.append((*sterilizer, sterilizer_dwell))
+    return waypoints
@@ -0,0 +1,238 @@
+"""Executing picks with overlapped sterilizer dwells via the `DwellScheduler`
+class.
+
+After the loop has been held in the sterilizer for the full dwell, which
+occupies the gantry, it may also need time to cool before it can touch a
+colony, which does not. Rather than also sleeping through the cooldown at the
+sterilizer, the scheduler treats each loop (`Tool`) as a timed resource which
+is unavailable until it has cooled. The gantry travels to the
+next colony while the loop cools, and if the picker-head carries several
+loops, they are used in turn so that one cools while another picks.
+
+Host-side work, such as capturing an image of the dish to confirm the next
+colony, can be overlapped with the motion and dwells by passing a `prepare`
+coroutine function to `run()`; it is called for each pick while the previous
+pick is executed.
+
+```python
+from libmotorctrl import DwellScheduler, Tool
+from libmotorctrl.route_planner import plan_picks
+
+scheduler = DwellScheduler(
+    drive_ctrl,
+    colony_depth=80_000,
+    well_depth=80_000,
+    sterilizer=(461_330, 87_950, 60_000),
+    dwell=5,
+    cooldown=LOOP_COOLDOWN,  # Measured for the loops in use
+    tools=[Tool("left"), Tool("right", offset=(20_000, 0, 0))],
+)
+for tool in scheduler.tools:
+    await scheduler.sterilize(tool)
+await scheduler.run(
+    plan_picks(colonies, wells, sterilizer[:2]), prepare=capture, on_deposit=record
+)
+```"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass
+from .drive_manager import CRUISE_DEPTH, DriveManager, DriveManagerError, MotionProfile
+from .route_planner import Pick
+
+
+@dataclass
+class Tool:
+    """A loop (or other tool) mounted on the picker-head."""
+
+    name: str
+    """The name of the tool."""
+    offset: tuple[int, int, int] = (0, 0, 0)
+    """The (x, y, z) offset of the tip of the tool from the position of the
+    picker-head, in micrometers."""
+    ready_at: float = 0.0
+    """The `time.monotonic()` timestamp at which the tool has cooled after
+    its last sterilization."""
+
+    @property
+    def ready(self) -> bool:
+        """Whether the tool can be used."""
+        return time.monotonic() >= self.ready_at
+
+    async def wait_ready(self):
+        """Wait until the tool can be used."""
+        delay = self.ready_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class ScheduledPick:
+    """A pick executed by `DwellScheduler.run()`.
+
+    Times are `time.monotonic()` timestamps in seconds."""
+
+    pick: Pick
+    """The pick."""
+    tool: str
+    """The name of the tool used."""
+    start: float
+    """When the pick was started."""
+    end: float
+    """When the pick, and any sterilization after it, finished."""
+
+
+class DwellScheduler:
+    """Executes picks with a `DriveManager`, overlapping the cooling of
+    sterilized tools with other work.
+
+    Each pick is made with the current tool. After a pick which requires
+    sterilization (see `libmotorctrl.route_planner.plan_picks()`), the tool
+    is held in the sterilizer for `dwell` seconds, and is then unavailable
+    for a further `cooldown` seconds while it cools. The scheduler then
+    switches to the tool which will be ready soonest, alternating between
+    tools which are equally ready. If the tool is not ready when a pick
+    starts, the picker-head travels above the colony and waits there for
+    it before descending."""
+
+    def __init__(
+        self,
+        manager: DriveManager,
+        colony_depth: int,
+        well_depth: int,
+        sterilizer: tuple[int, int, int],
+        dwell: float,
+        cooldown: float = 0.0,
+        tools: Sequence[Tool] = None,
+        profile: MotionProfile = None,
+    ):
+        """`colony_depth` and `well_depth` are the z-axis depths to lower the
+        tool to at each colony and well, and `sterilizer` is the (x, y, z)
+        position of the sterilizer. `cooldown` is added to the `dwell`,
+        never taken from it, and should be the measured cooling time of the
+        tools. All positions are those of the tip of
+        the tool, as offsets from the calibration point. By default, a
+        single tool with no offset is used. Moves are made with `profile`,
+        or the profile set on the drive manager."""
+
+        self.manager = manager
+        """The drive manager used to move the picker-head."""
+        self.colony_depth = colony_depth
+        self.well_depth = well_depth
+        self.sterilizer = sterilizer
+        self.dwell = dwell
+        self.cooldown = cooldown
+        self.profile = profile
+        self.tools: list[Tool] = [Tool("loop")] if tools is None else list(tools)
+        """The tools on the picker-head."""
+        if not self.tools:
+            raise DriveManagerError("At least one tool is required")
+        if len({tool.name for tool in self.tools}) != len(self.tools):
+            raise DriveManagerError("Duplicate tool names")
+        self.tool = self.tools[0]
+        """The tool used for the next pick."""
+        self.wait_time = 0.0
+        """The total time in seconds spent waiting for tools to cool."""
+
+    def _head(self, point: tuple[int, int, int], tool: Tool) -> tuple[int, int, int]:
+        """Get the position of the picker-head placing the tool at a point."""
+        return (
+            point[0] - tool.offset[0],
+            point[1] - tool.offset[1],
+            point[2] - tool.offset[2],
+        )
+
+    async def sterilize(self, tool: Tool = None):
+        """Sterilize a tool (by default, the current tool), then switch to
+        the tool which will be ready soonest.
+
+        The move to the sterilizer and the dwell run as a single command
+        of the drive manager, so no other command can move the gantry
+        until the dwell is over."""
+
+        tool = self.tool if tool is None else tool
+        logging.info("Sterilizing tool %s...", tool.name)
+        await self.manager.execute_path(
+            [(*self._head(self.sterilizer, tool), self.dwell)], profile=self.profile
+        )
+        tool.ready_at = time.monotonic() + self.cooldown
+
+        # Prefer the tools after this one on ties, so tools alternate
+        index = self.tools.index(tool) + 1
+        rotation = self.tools[index:] + self.tools[:index]
+        self.tool = min(rotation, key=lambda candidate: candidate.ready_at)
+
+    async def run(
+        self,
+        picks: Iterable[Pick],
+        prepare: Callable[[Pick], Awaitable] = None,
+        on_deposit: Callable[[Pick], None] = None,
+    ) -> list[ScheduledPick]:
+        """Execute picks in order.
+
+        If `prepare` is provided, it is awaited with each pick before the
+        pick is executed; each call is started as soon as the previous
+        pick is, so it runs concurrently with the motion and dwells of
+        that pick. An error raised by `prepare` stops the run.
+
+        If `on_deposit` is provided, it is called with each pick as soon as
+        its sample has been deposited in the well, so the wells used are
+        known even if the run is stopped by an error.
+
+        If a move fails, the drive manager is terminated (see
+        `DriveManager.execute_path()`) and the error is raised.
+
+        Returns the picks executed, with the tool used and their timing."""
+
+        picks = list(picks)
+        scheduled = []
+        preparing = None
+        if prepare is not None and picks:
+            preparing = asyncio.create_task(prepare(picks[0]))
+        try:
+            for index, pick in enumerate(picks):
+                if preparing is not None:
+                    await preparing
+                    preparing = None
+                    if index + 1 < len(picks):
+                        preparing = asyncio.create_task(prepare(picks[index + 1]))
+
+                tool = self.tool
+                start = time.monotonic()
+                colony = self._head((*pick.colony, self.colony_depth), tool)
+                well = self._head((*pick.well, self.well_depth), tool)
+                if not tool.ready:
+                    # Travel while the tool cools, rather than at the sterilizer
+                    await self.manager.move(
+                        colony[0], colony[1], CRUISE_DEPTH, profile=self.profile
+                    )
+                    waiting = time.monotonic()
+                    await tool.wait_ready()
+                    self.wait_time += time.monotonic() - waiting
+                await self.manager.execute_path(
+                    [(*colony, 0), (*well, 0)], profile=self.profile
+                )
+                if on_deposit is not None:
+                    on_deposit(pick)
+                if pick.sterilize:
+                    await self.sterilize(tool)
+
+                scheduled.append(
+                    ScheduledPick(
+                        pick=pick, tool=tool.name, start=start, end=time.monotonic()
+                    )
+                )
+                logging.info(
+                    "Pick %s of %s completed with tool %s",
+                    index + 1,
+                    len(picks),
+                    tool.name,
+                )
+        finally:
+            if preparing is not None:
+                preparing.cancel()
+                await asyncio.gather(preparing, return_exceptions=True)
+
+        return scheduled
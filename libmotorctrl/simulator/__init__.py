@@ -0,0 +1,40 @@
+"""Simulated CMMO-ST drive controllers for testing without hardware.
+
+A `SimulatedDrive` models the FHPP register interface and the kinematics of
+an axis, and a `DriveSimulator` serves it over Modbus TCP, so the full stack
+can be run against localhost by passing the simulator endpoints to the
+`DriveManager`:
+
+```python
+from libmotorctrl import DriveManager
+from libmotorctrl.simulator import start_simulators
+
+simulators = await start_simulators(3)
+drive_ctrl = await DriveManager.create(
+    endpoints=[simulator.endpoint for simulator in simulators]
+)
+```
+
+Simulators can also be run in a separate process with
+`python -m libmotorctrl.simulator`."""
+
+from .model import SimulatedDrive
+from .server import DriveSimulator
+
+
+async def start_simulators(
+    count: int = 3, host: str = "127.0.0.1", port: int = 0, **drive_args
+) -> list[DriveSimulator]:
+    """Start `count` simulated drives on the current event loop.
+
+    The drives listen on consecutive ports starting at `port`, or on free
+    ports picked by the operating system if `port` is 0. Keyword arguments
+    are passed to each `SimulatedDrive`."""
+    simulators = []
+    for index in range(count):
+        simulator = DriveSimulator(
+            SimulatedDrive(**drive_args), host, port + index if port else 0
+        )
+        await simulator.start()
+        simulators.append(simulator)
+    return simulators
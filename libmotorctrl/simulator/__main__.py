@@ -0,0 +1,32 @@
+"""Serve simulated drives until interrupted.
+
+Usage: python -m libmotorctrl.simulator [--host HOST] [--port PORT] [--count N]"""
+
+import argparse
+import asyncio
+import logging
+from . import start_simulators
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m libmotorctrl.simulator",
+        description="Serve simulated CMMO-ST drive controllers over Modbus TCP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port", type=int, default=5020, help="port of the first drive"
+    )
+    parser.add_argument("--count", type=int, default=3, help="number of drives")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    await start_simulators(args.count, args.host, args.port)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,274 @@
+"""Kinematic model of a CMMO-ST drive controller running the FHPP profile."""
+
+import math
+import time
+from collections.abc import Callable
+from ..codec import CONTROL_CODEC, RECORD_CONTROL_CODEC, STATUS_CODEC
+from ..codec import ParameterMessage, decode_parameter, encode_parameter
+from ..drive import ControlMode, ControlRegisters, OpMode, SetpointMode
+from ..drive import StatusRegisters
+from ..drive import MAX_RECORDS, PNU_RECORD_POSITION, PNU_RECORD_VELOCITY
+from ..drive import REQUEST_NONE, REQUEST_READ_ARRAY, REQUEST_WRITE_ARRAY
+from ..drive import RESPONSE_ERROR
+
+# Diagnostic codes raised by the model, see Appendix D of the FHPP datasheet
+FAULT_HOMING_REQUIRED = 0x28
+FAULT_NEGATIVE_LIMIT = 0x29
+FAULT_POSITIVE_LIMIT = 0x2A
+
+# Parameter channel response identifiers and error numbers
+_RESPONSE_NONE = 0
+_RESPONSE_ARRAY = 5
+_ERROR_PNU = 0
+_ERROR_SUBINDEX = 3
+
+
+class SimulatedDrive:
+    """A simulated drive controller and axis.
+
+    The model implements the FHPP handshakes used by `Drive`: enabling,
+    halting, resetting faults, homing and direct-mode positioning. Moves follow
+    a trapezoidal velocity profile, limited by `acceleration` and by
+    `max_speed` scaled by the speed preselection (SP1, in percent). Homing
+    drives the axis to position 0 at `homing_speed` and sets the reference.
+    Positioning before homing, or to a target outside `stroke`, raises a fault
+    which is acknowledged by toggling the reset bit.
+
+    In record selection mode, the target and velocity of a move are taken
+    from the record table, whose positions and velocities are read and
+    written through the parameter channel. Records without a velocity move
+    at `max_speed`.
+
+    The model is advanced to the current time of `clock` whenever its
+    registers are read or written. All positions are in micrometers and
+    times in seconds."""
+
+    def __init__(
+        self,
+        stroke: tuple[int, int] = (0, 500_000),
+        max_speed: float = 200_000,
+        acceleration: float = 2_000_000,
+        homing_speed: float = 50_000,
+        position: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.stroke = stroke
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.homing_speed = homing_speed
+        self.clock = clock
+
+        self.position = float(position)
+        """The actual position of the axis."""
+        self.velocity = 0.0
+        """The actual velocity of the axis."""
+        self.target = None
+        """The target of the motion in progress, or `None` when idle."""
+        self.error_code = 0
+        """The diagnostic code of the active fault, or 0."""
+        self.parameters = {}
+        """The record table parameters written through the parameter channel,
+        by (PNU, record number)."""
+
+        self._control = ControlRegisters(*CONTROL_CODEC.decode([0, 0, 0, 0]))
+        self._speed = max_speed
+        self._homing = False
+        self._reference_set = False
+        self._ack_start = False
+        self._motion_complete = True
+        self._parameter_response = [0, 0, 0, 0]
+        self._last_step = clock()
+
+    @property
+    def fault_present(self) -> bool:
+        return self.error_code != 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the axis accepts motion commands."""
+        return (
+            self._control.drive_enabled
+            and self._control.operation_enabled
+            and not self.fault_present
+        )
+
+    def write(self, registers: list[int]):
+        """Apply the control registers written by the client."""
+        self.step()
+        previous = self._control
+        self._control = ControlRegisters(*CONTROL_CODEC.decode(registers))
+        control = self._control
+        if control.operation_mode == OpMode.RECSELECT:
+            # The third byte holds the record number rather than CDIR
+            values = dict(
+                zip(RECORD_CONTROL_CODEC.names, RECORD_CONTROL_CODEC.decode(registers))
+            )
+            control.record_number = values["record_number"]
+
+        if control.reset and not previous.reset:
+            self.error_code = 0
+        if not self.enabled:
+            self._stop()
+
+        # Commands are accepted on the rising edge of the start bits
+        start = control.positioning_start and not previous.positioning_start
+        home = control.homing_start and not previous.homing_start
+        if (start or home) and self.enabled and not control.halt_active:
+            if home:
+                self._start_motion(0, self.homing_speed, homing=True)
+            elif control.operation_mode == OpMode.DIRECTAPP:
+                self._start_positioning(control)
+            elif control.operation_mode == OpMode.RECSELECT:
+                self._start_record(control.record_number)
+        if not control.positioning_start and not control.homing_start:
+            self._ack_start = False
+
+    def read(self) -> list[int]:
+        """Get the status registers read by the client."""
+        self.step()
+        control = self._control
+        status = StatusRegisters(
+            drive_enabled=control.drive_enabled and not self.fault_present,
+            operation_enabled=self.enabled,
+            warning_present=False,
+            fault_present=self.fault_present,
+            load_applied=False,
+            fct_blocked=control.fct_blocked,
+            operation_mode=control.operation_mode,
+            halt_active=control.halt_active,
+            ack_start=self._ack_start,
+            motion_complete=self._motion_complete,
+            ack_teach=False,
+            is_moving=self.velocity != 0,
+            following_error=False,
+            still_monitoring=False,
+            reference_set=self._reference_set,
+            setpoint_mode=control.setpoint_mode,
+            control_mode=control.control_mode,
+            speed_limit_reached=False,
+            stroke_limit_reached=False,
+            velocity_percent=min(round(abs(self.velocity) / self.max_speed * 100), 255),
+            position=round(self.position),
+        )
+        registers = STATUS_CODEC.encode(status)
+        if control.operation_mode == OpMode.RECSELECT:
+            # The record number and record status byte replace SDIR and the
+            # velocity
+            registers[1] = control.record_number << 8
+        return registers
+
+    def write_parameters(self, registers: list[int]):
+        """Process a request written to the parameter channel registers."""
+        request = decode_parameter(registers)
+        if request.identifier == REQUEST_NONE:
+            response = ParameterMessage(_RESPONSE_NONE, request.pnu, request.subindex)
+        elif request.pnu not in (PNU_RECORD_POSITION, PNU_RECORD_VELOCITY):
+            response = ParameterMessage(
+                RESPONSE_ERROR, request.pnu, request.subindex, _ERROR_PNU
+            )
+        elif not 1 <= request.subindex <= MAX_RECORDS:
+            response = ParameterMessage(
+                RESPONSE_ERROR, request.pnu, request.subindex, _ERROR_SUBINDEX
+            )
+        elif request.identifier == REQUEST_WRITE_ARRAY:
+            self.parameters[request.pnu, request.subindex] = request.value
+            response = request._replace(identifier=_RESPONSE_ARRAY)
+        elif request.identifier == REQUEST_READ_ARRAY:
+            value = self.parameters.get((request.pnu, request.subindex), 0)
+            response = ParameterMessage(
+                _RESPONSE_ARRAY, request.pnu, request.subindex, value
+            )
+        else:
+            response = ParameterMessage(
+                RESPONSE_ERROR, request.pnu, request.subindex, _ERROR_PNU
+            )
+        self._parameter_response = encode_parameter(response)
+
+    def read_parameters(self) -> list[int]:
+        """Get the parameter channel response registers."""
+        return self._parameter_response
+
+    def _start_positioning(self, control: ControlRegisters):
+        if control.control_mode != ControlMode.POSITIONING:
+            return
+        if not self._reference_set:
+            self._fault(FAULT_HOMING_REQUIRED)
+            return
+        target = control.setpoint
+        if control.setpoint_mode == SetpointMode.RELATIVE:
+            target += round(self.position)
+        if target < self.stroke[0]:
+            self._fault(FAULT_NEGATIVE_LIMIT)
+        elif target > self.stroke[1]:
+            self._fault(FAULT_POSITIVE_LIMIT)
+        else:
+            speed = self.max_speed * max(control.preselection, 1) / 100
+            self._start_motion(target, speed, homing=False)
+
+    def _start_record(self, record: int):
+        if not self._reference_set:
+            self._fault(FAULT_HOMING_REQUIRED)
+            return
+        target = self.parameters.get((PNU_RECORD_POSITION, record), 0)
+        speed = self.parameters.get((PNU_RECORD_VELOCITY, record), self.max_speed)
+        if target < self.stroke[0]:
+            self._fault(FAULT_NEGATIVE_LIMIT)
+        elif target > self.stroke[1]:
+            self._fault(FAULT_POSITIVE_LIMIT)
+        else:
+            self._start_motion(target, min(speed, self.max_speed), homing=False)
+
+    def _start_motion(self, target: int, speed: float, homing: bool):
+        self.target = target
+        self._speed = speed
+        self._homing = homing
+        self._ack_start = True
+        self._motion_complete = False
+
+    def _stop(self):
+        self.target = None
+        self.velocity = 0.0
+
+    def _fault(self, error_code: int):
+        self.error_code = error_code
+        self._stop()
+
+    def step(self):
+        """Advance the model to the current time."""
+        now = self.clock()
+        dt, self._last_step = now - self._last_step, now
+        if self.target is None or self._control.halt_active:
+            self.velocity = 0.0
+            return
+
+        # Integrate in small steps so a slow poll rate doesn't distort the
+        # velocity profile
+        steps = max(1, math.ceil(dt / 0.001))
+        for _ in range(steps):
+            if self._integrate(dt / steps):
+                break
+
+    def _integrate(self, dt: float) -> bool:
+        """Advance the motion by `dt`, returning whether the target was
+        reached."""
+        remaining = self.target - self.position
+        direction = math.copysign(1, remaining)
+        speed = abs(self.velocity)
+        stopping_distance = speed * speed / (2 * self.acceleration)
+        if stopping_distance >= abs(remaining):
+            speed = max(speed - self.acceleration * dt, 0.0)
+        else:
+            speed = min(speed + self.acceleration * dt, self._speed)
+
+        travel = speed * dt
+        if travel >= abs(remaining) or (speed == 0 and abs(remaining) < 1):
+            self.position = float(self.target)
+            self.velocity = 0.0
+            self.target = None
+            self._motion_complete = True
+            if self._homing:
+                self._reference_set = True
+            return True
+        self.position += direction * travel
+        self.velocity = direction * speed
+        return False
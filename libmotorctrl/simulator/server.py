@@ -0,0 +1,104 @@
+"""Modbus TCP server exposing a `SimulatedDrive`."""
+
+import logging
+from pymodbus.datastore import ModbusServerContext, ModbusSlaveContext
+from pymodbus.datastore.store import BaseModbusDataBlock
+from pymodbus.other_message import (
+    ReadExceptionStatusRequest,
+    ReadExceptionStatusResponse,
+)
+from pymodbus.server import ModbusTcpServer
+from .model import SimulatedDrive
+
+
+class _DriveDataBlock(BaseModbusDataBlock):
+    """Holding registers mapped onto a simulated drive.
+
+    As on the real controllers, the control and status registers share
+    addresses 0-3: writes go to the control registers, and reads come from
+    the status registers. Addresses 4-7 similarly hold the parameter channel
+    requests and responses."""
+
+    def __init__(self, drive: SimulatedDrive):
+        self.drive = drive
+        self.address = 0
+        self.default_value = 0
+        self.values = [0] * 8
+        self._written = [0] * 8
+
+    def validate(self, address, count=1):
+        return address >= 0 and address + count <= 8
+
+    def getValues(self, address, count=1):
+        registers = self.drive.read()
+        if address + count > 4:
+            registers = registers + self.drive.read_parameters()
+        return registers[address : address + count]
+
+    def setValues(self, address, values):
+        if isinstance(values, int):
+            values = [values]
+        self._written[address : address + len(values)] = values
+        if address < 4:
+            self.drive.write(self._written[:4])
+        if address + len(values) > 4:
+            self.drive.write_parameters(self._written[4:])
+
+
+class _ReadDiagnosticCode(ReadExceptionStatusRequest):
+    """Read Exception Status (FC7), answered with the diagnostic code of the
+    simulated drive."""
+
+    def execute(self, context=None):
+        return ReadExceptionStatusResponse(context.store["h"].drive.error_code)
+
+
+class DriveSimulator:
+    """A `SimulatedDrive` served over Modbus TCP.
+
+    The server is started with `start()` (or by entering the simulator as an
+    async context manager) and runs on the current event loop. Use a port of
+    0 to have the operating system pick a free port; the port actually used
+    is available as `endpoint` once started."""
+
+    def __init__(
+        self,
+        drive: SimulatedDrive = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.drive = SimulatedDrive() if drive is None else drive
+        self.host = host
+        self.port = port
+        context = ModbusServerContext(
+            slaves=ModbusSlaveContext(hr=_DriveDataBlock(self.drive), zero_mode=True),
+            single=True,
+        )
+        self._context = context
+        self._server = None
+
+    @property
+    def endpoint(self) -> tuple[str, int]:
+        """The (host, port) the simulator is listening on."""
+        return (self.host, self.port)
+
+    async def start(self):
+        """Start listening for connections."""
+        self._server = ModbusTcpServer(self._context, address=(self.host, self.port))
+        self._server.decoder.register(_ReadDiagnosticCode)
+        await self._server.transport_listen()
+        self.port = self._server.transport.sockets[0].getsockname()[1]
+        logging.info("Simulated drive listening on %s:%s", self.host, self.port)
+
+    async def stop(self):
+        """Stop the server and close its connections."""
+        if self._server is not None:
+            await self._server.shutdown()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
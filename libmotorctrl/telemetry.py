@@ -0,0 +1,182 @@
+"""Recording of per-cycle drive telemetry to a memory-mapped file.
+
+A `TelemetryRecorder` is passed to the `DriveManager` (or to each `Drive`),
+and the worker of every drive appends the raw status registers it reads to
+the recording on each cycle. Records are packed directly into a memory-mapped
+file of fixed size, which wraps around once full, so recording costs a
+single `struct.pack_into()` per cycle and memory use is bounded however long
+the recording runs.
+
+Recordings are loaded for analysis with `load_telemetry()`, which requires
+NumPy (install the `telemetry` extra)."""
+
+import itertools
+import mmap
+import struct
+from os import PathLike
+from .codec import STATUS_LAYOUT
+
+_MAGIC = b"LMCTLM01"
+
+# Magic, record size, capacity, axis count, then the axis names
+_HEADER = struct.Struct("<8sIQI")
+_AXIS_NAME = struct.Struct("<16s")
+_MAX_AXES = 16
+_HEADER_SIZE = 512
+
+# Sequence number, timestamp, cycle, axis and the four status registers,
+# padded to 32 bytes
+_RECORD = struct.Struct("<QdIBxHHHH2x")
+
+
+class TelemetryRecorder:
+    """A fixed-size, memory-mapped recording of drive status registers.
+
+    The file holds `capacity` records; once full, the oldest records are
+    overwritten. At the default capacity (32 MiB) and cycle time, this holds
+    roughly an hour of telemetry for three drives polled at the busy rate of
+    10 ms.
+
+    Records from several drive worker threads may be written concurrently.
+    Each record takes a sequence number, which `load_telemetry()` uses to
+    restore the order of the records."""
+
+    def __init__(self, path: str | PathLike, capacity: int = 1 << 20):
+        self.path = path
+        self.capacity = capacity
+        self._axes = []
+        self._sequence = itertools.count(1)
+
+        size = _HEADER_SIZE + capacity * _RECORD.size
+        with open(path, "w+b") as f:
+            f.truncate(size)
+            self._mmap = mmap.mmap(f.fileno(), size)
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_axis(self, name: str) -> int:
+        """Register an axis to record, returning its index for `record()`.
+
+        Axis names must be unique within the recording, and at most 16
+        bytes long when encoded as UTF-8. Robots recording to the same
+        file must therefore use distinct axis names; otherwise, give each
+        robot its own recorder."""
+        if len(self._axes) == _MAX_AXES:
+            raise ValueError(f"At most {_MAX_AXES} axes can be recorded")
+        if name in self._axes:
+            raise ValueError(f"Axis {name} is already recorded")
+        if len(name.encode()) > _AXIS_NAME.size:
+            raise ValueError(f"Axis name {name} is longer than {_AXIS_NAME.size} bytes")
+        self._axes.append(name)
+        self._write_header()
+        return len(self._axes) - 1
+
+    def _write_header(self):
+        _HEADER.pack_into(
+            self._mmap, 0, _MAGIC, _RECORD.size, self.capacity, len(self._axes)
+        )
+        for index, name in enumerate(self._axes):
+            _AXIS_NAME.pack_into(
+                self._mmap,
+                _HEADER.size + index * _AXIS_NAME.size,
+                name.encode(),
+            )
+
+    def record(self, axis: int, timestamp: float, cycle: int, registers: list[int]):
+        """Record the raw status registers read by the drive worker.
+
+        The registers are decoded by `load_telemetry()` rather than here, to
+        keep recording cheap. Once the recording is closed, records are
+        discarded, so it can be closed before the drives are terminated."""
+        sequence = next(self._sequence)
+        try:
+            _RECORD.pack_into(
+                self._mmap,
+                _HEADER_SIZE + (sequence % self.capacity) * _RECORD.size,
+                sequence,
+                timestamp,
+                cycle & 0xFFFF_FFFF,
+                axis,
+                *registers,
+            )
+        except (TypeError, ValueError):
+            # The recording may be closed by another thread at any point
+            if not self._mmap.closed:
+                raise
+
+    def flush(self):
+        """Write the recording out to the file, unless it is closed."""
+        if not self._mmap.closed:
+            self._mmap.flush()
+
+    def close(self):
+        """Flush and close the recording."""
+        if not self._mmap.closed:
+            self._mmap.flush()
+            self._mmap.close()
+
+
+def load_telemetry(path: str | PathLike) -> dict:
+    """Load a recording made by a `TelemetryRecorder`.
+
+    Returns a dictionary mapping each axis name to a dictionary of NumPy
+    arrays, in recording order: `timestamp`, `cycle` and `position`, plus
+    one array for each status register field (e.g. `velocity_percent` and
+    `following_error`)."""
+    import numpy as np
+
+    with open(path, "rb") as f:
+        header = f.read(_HEADER_SIZE)
+    magic, record_size, capacity, axis_count = _HEADER.unpack_from(header)
+    if magic != _MAGIC or record_size != _RECORD.size:
+        raise ValueError(f"{path} is not a telemetry recording")
+    axes = [
+        _AXIS_NAME.unpack_from(header, _HEADER.size + index * _AXIS_NAME.size)[0]
+        .rstrip(b"\0")
+        .decode()
+        for index in range(axis_count)
+    ]
+
+    dtype = np.dtype(
+        {
+            "names": [
+                "sequence",
+                "timestamp",
+                "cycle",
+                "axis",
+                "reg0",
+                "reg1",
+                "reg2",
+                "reg3",
+            ],
+            "formats": ["<u8", "<f8", "<u4", "u1", "<u2", "<u2", "<u2", "<u2"],
+            "offsets": [0, 8, 16, 20, 22, 24, 26, 28],
+            "itemsize": _RECORD.size,
+        }
+    )
+    records = np.fromfile(path, dtype=dtype, count=capacity, offset=_HEADER_SIZE)
+    records = records[records["sequence"] != 0]
+    records = records[np.argsort(records["sequence"])]
+
+    telemetry = {}
+    for index, name in enumerate(axes):
+        axis_records = records[records["axis"] == index]
+        registers = (axis_records["reg0"], axis_records["reg1"])
+        position = (axis_records["reg2"].astype("<u4") << 16) | axis_records["reg3"]
+        arrays = {
+            "timestamp": axis_records["timestamp"],
+            "cycle": axis_records["cycle"],
+            "position": position.view("<i4"),
+        }
+        for f in STATUS_LAYOUT:
+            value = (registers[f.register] >> f.shift) & ((1 << f.width) - 1)
+            if f.width == 1:
+                value = value.astype(bool) ^ f.inverted
+            arrays[f.name] = value
+        telemetry[name] = arrays
+    return telemetry
@@ -0,0 +1,56 @@
+import asyncio
+import contextlib
+import inspect
+
+import pytest
+
+from libmotorctrl import DriveManager, IOEngine
+from libmotorctrl.simulator import start_simulators
+
+TEST_TIMEOUT = 20
+"""The time in seconds an async test may run for before it fails."""
+
+FAST_AXIS = {"max_speed": 1_000_000, "acceleration": 10_000_000}
+"""Simulated axis kinematics fast enough to keep the tests short."""
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run coroutine test functions on a new event loop."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {
+        name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames
+    }
+    asyncio.run(asyncio.wait_for(pyfuncitem.obj(**arguments), TEST_TIMEOUT))
+    return True
+
+
+@pytest.fixture
+def simulated_manager():
+    """An async context manager starting simulated drives and a homed
+    `DriveManager` connected to them, which yields the manager and the
+    simulators and stops both on exit."""
+
+    @contextlib.asynccontextmanager
+    async def start(engine=IOEngine.ASYNCIO, home=True, **manager_args):
+        simulators = await start_simulators(3, **FAST_AXIS)
+        manager = None
+        try:
+            manager = await DriveManager.create(
+                engine=engine,
+                cycle_time=0.005,
+                endpoints=[simulator.endpoint for simulator in simulators],
+                **manager_args,
+            )
+            if home:
+                for axis in manager.axes[::-1]:
+                    await manager.home(axis)
+            yield manager, simulators
+        finally:
+            if manager is not None:
+                await manager.terminate()
+            for simulator in simulators:
+                await simulator.stop()
+
+    return start
@@ -0,0 +1,191 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from libmotorctrl.codec import (
+    CONTROL_CODEC,
+    CONTROL_LAYOUT,
+    RECORD_CONTROL_CODEC,
+    RECORD_CONTROL_LAYOUT,
+    STATUS_CODEC,
+    STATUS_LAYOUT,
+    ParameterMessage,
+    decode_parameter,
+    encode_parameter,
+)
+
+CODECS = {
+    "control": (CONTROL_CODEC, CONTROL_LAYOUT),
+    "record_control": (RECORD_CONTROL_CODEC, RECORD_CONTROL_LAYOUT),
+    "status": (STATUS_CODEC, STATUS_LAYOUT),
+}
+
+
+def random_values(layout, rng):
+    """Random in-range values for every field of a layout, followed by the
+    32-bit value."""
+    values = []
+    for f in layout:
+        if f.width == 1:
+            values.append(bool(rng.getrandbits(1)))
+        else:
+            values.append(rng.getrandbits(f.width))
+    values.append(rng.randint(-(2**31), 2**31 - 1))
+    return tuple(values)
+
+
+def used_bits(layout):
+    """The bits of the bitfield registers assigned to a field."""
+    used = [0, 0]
+    for f in layout:
+        used[f.register] |= ((1 << f.width) - 1) << f.shift
+    return used
+
+
+def legacy_encode_control(control) -> list[int]:
+    """The bit-by-bit control register encoder replaced by the codec."""
+    register_out = [0x0000, 0x0000, 0x0000, 0x0000]
+
+    # fmt: off
+    # CCON
+    register_out[0] |= (int(control.drive_enabled)     << 0) << 8
+    register_out[0] |= (int(control.operation_enabled) << 1) << 8
+    register_out[0] |= (int(not control.brake_active)  << 2) << 8
+    register_out[0] |= (int(control.reset)             << 3) << 8
+    # Bit 4 is reserved
+    register_out[0] |= (int(control.fct_blocked)       << 5) << 8
+    register_out[0] |= (int(control.operation_mode)    << 6) << 8
+
+    # CPOS
+    register_out[0] |= int(not control.halt_active)   << 0
+    register_out[0] |= int(control.positioning_start) << 1
+    register_out[0] |= int(control.homing_start)      << 2
+    register_out[0] |= int(control.jog_positive)      << 3
+    register_out[0] |= int(control.jog_negative)      << 4
+    register_out[0] |= int(control.teach)             << 5
+    register_out[0] |= int(control.clear_path)        << 6
+
+    # CDIR
+    register_out[1] |= (int(control.setpoint_mode)       << 0) << 8
+    register_out[1] |= (int(control.control_mode)        << 1) << 8
+    register_out[1] |= (int(control.stroke_limit_bypass) << 5) << 8
+    # fmt: on
+
+    # SP 1
+    register_out[1] |= control.preselection
+
+    # SP 2
+    register_out[2] |= control.setpoint >> 16
+    register_out[3] |= control.setpoint & 0xFFFF
+    return register_out
+
+
+def legacy_decode_status(registers: list[int]) -> dict:
+    """The bit-by-bit status register decoder replaced by the codec, with
+    the velocity masked to SP 1 and the position sign-extended."""
+    status = {}
+    # fmt: off
+    # Parse SCON
+    status["drive_enabled"] = bool(((registers[0]     >> 0) >> 8) & 1)
+    status["operation_enabled"] = bool(((registers[0] >> 1) >> 8) & 1)
+    status["warning_present"] = bool(((registers[0]   >> 2) >> 8) & 1)
+    status["fault_present"] = bool(((registers[0]     >> 3) >> 8) & 1)
+    status["load_applied"] = bool(((registers[0]      >> 4) >> 8) & 1)
+    status["fct_blocked"] = bool(((registers[0]       >> 5) >> 8) & 1)
+    status["operation_mode"] = int((registers[0]      >> 6) >> 8)
+
+    # Parse SPOS
+    status["halt_active"] = not bool((registers[0]  >> 0) & 1)
+    status["ack_start"] = bool((registers[0]        >> 1) & 1)
+    status["motion_complete"] = bool((registers[0]  >> 2) & 1)
+    status["ack_teach"] = bool((registers[0]        >> 3) & 1)
+    status["is_moving"] = bool((registers[0]        >> 4) & 1)
+    status["following_error"] = bool((registers[0]  >> 5) & 1)
+    status["still_monitoring"] = bool((registers[0] >> 6) & 1)
+    status["reference_set"] = bool((registers[0]    >> 7) & 1)
+
+    # Parse SDIR
+    status["setpoint_mode"] = int(((registers[1]         >> 0) >> 8) & 1)
+    status["control_mode"] = int(((registers[1]          >> 1) >> 8) & 0b11)
+    status["speed_limit_reached"] = bool(((registers[1]  >> 4) >> 8) & 1)
+    status["stroke_limit_reached"] = bool(((registers[1] >> 5) >> 8) & 1)
+    # fmt: on
+
+    # Drive actual velocity (%)
+    status["velocity_percent"] = int(registers[1] & 0xFF)
+
+    # Drive actual position (sinc)
+    position = int((registers[2] << 16) + registers[3])
+    status["position"] = position - (1 << 32) if position >> 31 else position
+    return status
+
+
+@pytest.mark.parametrize("codec, layout", CODECS.values(), ids=CODECS.keys())
+def test_round_trip_values(codec, layout):
+    rng = random.Random(0)
+    for _ in range(2000):
+        values = random_values(layout, rng)
+        source = SimpleNamespace(**dict(zip(codec.names, values)))
+        assert codec.decode(codec.encode(source)) == values
+
+
+@pytest.mark.parametrize("codec, layout", CODECS.values(), ids=CODECS.keys())
+def test_round_trip_registers(codec, layout):
+    rng = random.Random(1)
+    used = used_bits(layout)
+    for _ in range(2000):
+        registers = [rng.getrandbits(16) for _ in range(4)]
+        source = SimpleNamespace(**dict(zip(codec.names, codec.decode(registers))))
+        # Reserved bits are encoded as zero
+        expected = [registers[0] & used[0], registers[1] & used[1], *registers[2:]]
+        assert codec.encode(source) == expected
+
+
+def test_control_matches_legacy_encoder():
+    rng = random.Random(2)
+    for _ in range(2000):
+        values = random_values(CONTROL_LAYOUT, rng)
+        source = SimpleNamespace(**dict(zip(CONTROL_CODEC.names, values)))
+        # The legacy encoder did not handle negative setpoints
+        source.setpoint &= 0x7FFF_FFFF
+        assert CONTROL_CODEC.encode(source) == legacy_encode_control(source)
+
+
+def test_status_matches_legacy_decoder():
+    rng = random.Random(3)
+    for _ in range(2000):
+        registers = [rng.getrandbits(16) for _ in range(4)]
+        decoded = dict(zip(STATUS_CODEC.names, STATUS_CODEC.decode(registers)))
+        assert decoded == legacy_decode_status(registers)
+
+
+@pytest.mark.parametrize(
+    "name, value", [("preselection", 300), ("operation_mode", 4), ("reset", -1)]
+)
+def test_out_of_range_field_raises(name, value):
+    values = random_values(CONTROL_LAYOUT, random.Random(4))
+    source = SimpleNamespace(**dict(zip(CONTROL_CODEC.names, values)))
+    setattr(source, name, value)
+    with pytest.raises(ValueError, match=name):
+        CONTROL_CODEC.encode(source)
+
+
+def test_record_number_out_of_range_raises():
+    values = random_values(RECORD_CONTROL_LAYOUT, random.Random(5))
+    source = SimpleNamespace(**dict(zip(RECORD_CONTROL_CODEC.names, values)))
+    source.record_number = 256
+    with pytest.raises(ValueError, match="record_number"):
+        RECORD_CONTROL_CODEC.encode(source)
+
+
+def test_parameter_round_trip():
+    rng = random.Random(6)
+    for _ in range(2000):
+        message = ParameterMessage(
+            rng.randint(0, 0xF),
+            rng.randint(0, 0xFFF),
+            rng.randint(0, 0xFF),
+            rng.randint(-(2**31), 2**31 - 1),
+        )
+        assert decode_parameter(encode_parameter(message)) == message
@@ -0,0 +1,94 @@
+import pytest
+
+from libmotorctrl import KeepOutZone
+from libmotorctrl.collision import clearance_depth
+from libmotorctrl.drive_manager import CRUISE_DEPTH
+
+ZONE = KeepOutZone(x_min=0, x_max=10_000, y_min=0, y_max=10_000, depth=30_000)
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        # Horizontal segments (zero dy)
+        ((-5_000, 5_000), (15_000, 5_000), True),
+        ((-5_000, 10_000), (15_000, 10_000), True),
+        ((-5_000, 10_001), (15_000, 10_001), False),
+        ((-5_000, 5_000), (-1, 5_000), False),
+        # Vertical segments (zero dx)
+        ((5_000, -5_000), (5_000, 15_000), True),
+        ((0, 15_000), (0, 12_000), False),
+        ((-1, -5_000), (-1, 15_000), False),
+        # Points
+        ((5_000, 5_000), (5_000, 5_000), True),
+        ((-5_000, 5_000), (-5_000, 5_000), False),
+    ],
+)
+def test_intersects_axis_parallel_segments(start, end, expected):
+    assert ZONE.intersects(start, end) == expected
+    assert ZONE.intersects(end, start) == expected
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        ((5_000, 5_000), (20_000, 30_000)),
+        ((-20_000, -30_000), (5_000, 5_000)),
+        ((2_000, 3_000), (8_000, 9_000)),
+        ((-5_000, 5_000), (0, 5_000)),
+    ],
+    ids=["starts inside", "ends inside", "inside", "ends on edge"],
+)
+def test_intersects_segments_with_an_end_inside(start, end):
+    assert ZONE.intersects(start, end)
+    assert ZONE.intersects(end, start)
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        # Diagonals past the (10_000, 10_000) corner
+        ((0, 20_001), (20_001, 0), False),
+        ((0, 20_000), (20_000, 0), True),
+        # Diagonals past the (0, 0) corner
+        ((-10_000, 10_000), (10_000, -10_000), True),
+        ((-10_000, 9_999), (9_999, -10_000), False),
+        # Heading for the zone, but stopping short of it
+        ((-20_000, -20_000), (-1, -1), False),
+        ((30_000, 20_000), (12_000, 11_000), False),
+    ],
+)
+def test_intersects_near_corners(start, end, expected):
+    assert ZONE.intersects(start, end) == expected
+    assert ZONE.intersects(end, start) == expected
+
+
+def test_clearance_depth_of_overlapping_zones():
+    plate = KeepOutZone(x_min=0, x_max=100_000, y_min=0, y_max=50_000, depth=60_000)
+    walls = KeepOutZone(
+        x_min=40_000, x_max=60_000, y_min=0, y_max=100_000, depth=20_000
+    )
+    zones = [plate, walls]
+
+    # Only the plate is crossed
+    assert clearance_depth(zones, (10_000, 10_000), (30_000, 40_000)) == 60_000
+    # Only the walls are crossed
+    assert clearance_depth(zones, (50_000, 60_000), (50_000, 90_000)) == 20_000
+    # Crossing both, the shallower depth applies, in either order
+    assert clearance_depth(zones, (10_000, 10_000), (90_000, 10_000)) == 20_000
+    assert clearance_depth(zones[::-1], (10_000, 10_000), (90_000, 10_000)) == 20_000
+    # Crossing neither
+    assert clearance_depth(zones, (150_000, 0), (150_000, 90_000)) is None
+    assert clearance_depth([], (10_000, 10_000), (90_000, 10_000)) is None
+
+
+async def test_travel_depth_without_zones(simulated_manager):
+    async with simulated_manager() as (manager, simulators):
+        far_away = KeepOutZone(0, 1_000, 0, 1_000, depth=10_000)
+        manager.set_keepout_zones([far_away])
+        assert manager._travel_depth(200_000, 200_000) is None
+
+        # Without zones, every move retracts to the cruise depth
+        for zones in (None, []):
+            manager.set_keepout_zones(zones)
+            assert manager._travel_depth(200_000, 200_000) == CRUISE_DEPTH
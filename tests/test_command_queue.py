@@ -0,0 +1,255 @@
+import asyncio
+
+import pytest
+
+from libmotorctrl import (
+    Command,
+    CommandPreemptedError,
+    CommandPriority,
+    DriveManager,
+    IOEngine,
+)
+from libmotorctrl.command_queue import CommandQueue, command_priority
+
+
+class Actions:
+    """Commands which log when they start and finish, and run until released."""
+
+    def __init__(self):
+        self.log = []
+        self._released = {}
+
+    def __call__(self, name: str):
+        self._released[name] = asyncio.Event()
+
+        async def action():
+            self.log.append(("start", name))
+            await self._released[name].wait()
+            self.log.append(("end", name))
+            return name
+
+        return action
+
+    def release(self, name: str):
+        self._released[name].set()
+
+
+async def done():
+    return "done"
+
+
+async def settle():
+    """Let every ready task run until they are all blocked."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def test_overlapping_claims_run_one_at_a_time():
+    queue, actions = CommandQueue(), Actions()
+    xy = asyncio.create_task(queue.run("XY", actions("xy")))
+    await settle()
+    y = asyncio.create_task(queue.run("Y", actions("y")))
+    yz = asyncio.create_task(queue.run("YZ", actions("yz")))
+    z = asyncio.create_task(queue.run("Z", actions("z")))
+    await settle()
+    # "z" may not overtake "yz", which is waiting for "y"
+    assert actions.log == [("start", "xy")]
+    assert queue.pending == 3
+
+    actions.release("xy")
+    await settle()
+    assert actions.log[-1] == ("start", "y")
+    actions.release("y")
+    await settle()
+    assert actions.log[-1] == ("start", "yz")
+    actions.release("yz")
+    await settle()
+    actions.release("z")
+    assert await asyncio.gather(xy, y, yz, z) == ["xy", "y", "yz", "z"]
+    assert [name for event, name in actions.log if event == "start"] == [
+        "xy",
+        "y",
+        "yz",
+        "z",
+    ]
+
+
+async def test_disjoint_claims_run_concurrently():
+    queue, actions = CommandQueue(), Actions()
+    x = asyncio.create_task(queue.run("X", actions("x")))
+    y = asyncio.create_task(queue.run("Y", actions("y")))
+    await settle()
+    assert actions.log == [("start", "x"), ("start", "y")]
+    actions.release("x")
+    actions.release("y")
+    await asyncio.gather(x, y)
+
+
+async def test_queued_commands_run_in_priority_order():
+    queue, actions = CommandQueue(), Actions()
+    first = asyncio.create_task(queue.run("X", actions("first")))
+    await settle()
+    tasks = [
+        asyncio.create_task(queue.run("X", actions(name), priority))
+        for name, priority in (
+            ("low", CommandPriority.LOW),
+            ("normal 1", CommandPriority.NORMAL),
+            ("high", CommandPriority.HIGH),
+            ("normal 2", CommandPriority.NORMAL),
+        )
+    ]
+    await settle()
+
+    for name in ("first", "high", "normal 1", "normal 2", "low"):
+        assert actions.log[-1] == ("start", name)
+        actions.release(name)
+        await settle()
+    await asyncio.gather(first, *tasks)
+
+
+async def test_priority_defaults_to_context():
+    queue, actions = CommandQueue(), Actions()
+    first = asyncio.create_task(queue.run("X", actions("first")))
+    await settle()
+    normal = asyncio.create_task(queue.run("X", actions("normal")))
+    command_priority.set(CommandPriority.HIGH)
+    high = asyncio.create_task(queue.run("X", actions("high")))
+    await settle()
+
+    actions.release("first")
+    await settle()
+    assert actions.log[-1] == ("start", "high")
+    actions.release("high")
+    actions.release("normal")
+    await asyncio.gather(first, normal, high)
+
+
+async def test_stop_preempts_running_and_queued_commands():
+    queue, actions = CommandQueue(), Actions()
+    running = asyncio.create_task(queue.run("XY", actions("running")))
+    await settle()
+    queued = asyncio.create_task(queue.run("X", actions("queued")))
+    other_axis = asyncio.create_task(queue.run("Z", actions("other axis")))
+    await settle()
+
+    stop = asyncio.create_task(queue.run("X", actions("stop"), CommandPriority.STOP))
+    with pytest.raises(CommandPreemptedError):
+        await running
+    with pytest.raises(CommandPreemptedError):
+        await queued
+    await settle()
+    assert ("start", "queued") not in actions.log
+    assert actions.log[-1] == ("start", "stop")
+
+    # Commands on other axes are not preempted
+    actions.release("other axis")
+    assert await other_axis == "other axis"
+    actions.release("stop")
+    assert await stop == "stop"
+    assert queue.pending == 0
+
+    # The preempted axes are free again
+    assert await queue.run("XY", done) == "done"
+
+
+async def test_stop_does_not_preempt_stop():
+    queue, actions = CommandQueue(), Actions()
+    first = asyncio.create_task(queue.run("X", actions("first"), CommandPriority.STOP))
+    await settle()
+    second = asyncio.create_task(
+        queue.run("X", actions("second"), CommandPriority.STOP)
+    )
+    await settle()
+    assert actions.log == [("start", "first")]
+    actions.release("first")
+    await settle()
+    actions.release("second")
+    assert await asyncio.gather(first, second) == ["first", "second"]
+
+
+async def test_cancelling_a_queued_command_releases_its_claim():
+    queue, actions = CommandQueue(), Actions()
+    holder = asyncio.create_task(queue.run("X", actions("holder")))
+    await settle()
+    queued = asyncio.create_task(queue.run("XY", actions("queued")))
+    await settle()
+    queued.cancel()
+    await settle()
+    assert queued.cancelled()
+    assert queue.pending == 0
+
+    # The claim on Y was dropped with the cancelled command
+    y = asyncio.create_task(queue.run("Y", actions("y")))
+    await settle()
+    assert actions.log[-1] == ("start", "y")
+    actions.release("y")
+    actions.release("holder")
+    await asyncio.gather(holder, y)
+
+    assert await queue.run("XY", done) == "done"
+    assert ("start", "queued") not in actions.log
+
+
+async def test_cancelling_a_running_command_releases_its_claim():
+    queue, actions = CommandQueue(), Actions()
+    running = asyncio.create_task(queue.run("X", actions("running")))
+    await settle()
+    queued = asyncio.create_task(queue.run("X", actions("queued")))
+    await settle()
+    running.cancel()
+    await settle()
+    assert running.cancelled()
+    assert actions.log[-1] == ("start", "queued")
+    actions.release("queued")
+    assert await queued == "queued"
+
+
+async def test_submit_resolves_in_order(simulated_manager):
+    async with simulated_manager(IOEngine.ASYNCIO) as (manager, simulators):
+        finished = []
+        targets = [100_000, 20_000, 60_000, 40_000]
+        tasks = manager.submit(
+            [Command(DriveManager.move_axis, ("X", target)) for target in targets]
+        )
+        for index, task in enumerate(tasks):
+            task.add_done_callback(lambda task, index=index: finished.append(index))
+        await asyncio.gather(*tasks)
+        assert finished == [0, 1, 2, 3]
+        assert manager.get_position_raw()[0] == targets[-1]
+
+
+async def test_submit_priority(simulated_manager):
+    async with simulated_manager(IOEngine.ASYNCIO) as (manager, simulators):
+        finished = []
+        commands = [
+            Command(DriveManager.move_axis, ("X", 200_000)),
+            Command(
+                DriveManager.move_axis, ("X", 10_000), priority=CommandPriority.LOW
+            ),
+            Command(
+                DriveManager.move_axis, ("X", 50_000), priority=CommandPriority.HIGH
+            ),
+        ]
+        tasks = manager.submit(commands)
+        for index, task in enumerate(tasks):
+            task.add_done_callback(lambda task, index=index: finished.append(index))
+        await asyncio.gather(*tasks)
+        assert finished == [0, 2, 1]
+        assert manager.get_position_raw()[0] == 10_000
+
+
+async def test_stop_preempts_submitted_move(simulated_manager):
+    async with simulated_manager(IOEngine.ASYNCIO) as (manager, simulators):
+        move, queued = manager.submit(
+            [
+                Command(DriveManager.move_axis, ("X", 400_000)),
+                Command(DriveManager.move_axis, ("X", 0)),
+            ]
+        )
+        await asyncio.sleep(0.1)
+        await manager.stop(["X"])
+        with pytest.raises(CommandPreemptedError):
+            await move
+        with pytest.raises(CommandPreemptedError):
+            await queued
+        assert 0 < manager.get_position_raw()[0] < 400_000
@@ -0,0 +1,167 @@
+import contextlib
+import time
+
+import pytest
+
+from libmotorctrl import Coordinator, IOEngine
+from libmotorctrl.drive_manager import DriveManagerError
+from libmotorctrl.route_planner import Pick
+from libmotorctrl.simulator import start_simulators
+
+STERILIZER = (300_000, 80_000, 20_000)
+DWELL = 0.2
+
+
+def make_picks(count, x=100_000):
+    return [
+        Pick(
+            colony_index=index,
+            well_index=index,
+            colony=(x + 10_000 * index, 0),
+            well=(200_000 + 9_000 * index, 50_000),
+            sterilize=True,
+        )
+        for index in range(count)
+    ]
+
+
+def terminated(manager):
+    return all(manager._get_drive(axis).terminated for axis in manager.axes)
+
+
+@pytest.fixture
+def two_robots(simulated_manager):
+    """An async context manager yielding a `Coordinator` with two robots,
+    "left" and "right", each driving its own simulated gantry."""
+
+    @contextlib.asynccontextmanager
+    async def start():
+        async with (
+            simulated_manager() as (left, _),
+            simulated_manager() as (right, _),
+        ):
+            coordinator = Coordinator()
+            for name, manager in (("left", left), ("right", right)):
+                await coordinator.add_robot(
+                    name,
+                    colony_depth=40_000,
+                    well_depth=30_000,
+                    sterilizer=STERILIZER,
+                    sterilizer_dwell=DWELL,
+                    manager=manager,
+                )
+            yield coordinator
+
+    return start
+
+
+def raw_position(manager, point):
+    x_cal, y_cal = manager._calibration_offset
+    return (point[0] + x_cal, point[1] + y_cal, point[2])
+
+
+async def test_run_distributes_picks_across_robots(two_robots):
+    async with two_robots() as coordinator:
+        left, right = coordinator.robots["left"], coordinator.robots["right"]
+        coordinator.submit("left", make_picks(1))
+        start = time.monotonic()
+        await coordinator.run()
+        single_pick = time.monotonic() - start
+        assert (left.completed, right.completed) == (1, 0)
+
+        coordinator.submit("left", make_picks(2))
+        coordinator.submit("right", make_picks(2, x=150_000))
+        start = time.monotonic()
+        await coordinator.run()
+        elapsed = time.monotonic() - start
+
+        assert (left.completed, right.completed) == (3, 2)
+        assert left.queue.empty() and right.queue.empty()
+        for robot in (left, right):
+            assert robot.manager.get_position_raw() == raw_position(
+                robot.manager, STERILIZER
+            )
+        # The robots pick concurrently, rather than one after the other
+        assert elapsed < 3 * single_pick
+
+
+async def test_get_throughput(two_robots):
+    async with two_robots() as coordinator:
+        assert coordinator.get_throughput().picks == 0
+        assert coordinator.get_throughput().picks_per_hour == 0
+
+        coordinator.submit("left", make_picks(2))
+        coordinator.submit("right", make_picks(1))
+        start = time.monotonic()
+        await coordinator.run()
+        elapsed = time.monotonic() - start
+
+        total = coordinator.get_throughput()
+        assert total.picks == 3
+        assert total.elapsed == pytest.approx(elapsed, abs=0.05)
+        assert total.picks_per_hour == pytest.approx(3 * 3600 / total.elapsed)
+        assert coordinator.get_throughput("left").picks == 2
+        assert coordinator.get_throughput("right").picks == 1
+
+
+async def test_failed_robot_does_not_stop_the_others(two_robots):
+    async with two_robots() as coordinator:
+        out_of_bounds = make_picks(2)
+        out_of_bounds[0].colony = (1_000_000, 0)
+        coordinator.submit("left", make_picks(2))
+        coordinator.submit("right", out_of_bounds)
+        with pytest.raises(ExceptionGroup) as errors:
+            await coordinator.run()
+
+        left, right = coordinator.robots["left"], coordinator.robots["right"]
+        assert errors.value.exceptions == (right.error,)
+        assert isinstance(right.error, DriveManagerError)
+        assert (left.completed, right.completed) == (2, 0)
+        assert right.queue.empty()
+        with pytest.raises(DriveManagerError):
+            coordinator.submit("right", make_picks(1))
+
+        # Later runs skip the failed robot
+        coordinator.submit("left", make_picks(1))
+        await coordinator.run()
+        assert left.completed == 3
+
+
+async def test_terminate_stops_every_robot(two_robots):
+    async with two_robots() as coordinator:
+        coordinator.submit("left", make_picks(1))
+        coordinator.submit("right", make_picks(1))
+        await coordinator.run()
+        await coordinator.terminate()
+        for robot in coordinator.robots.values():
+            assert terminated(robot.manager)
+
+
+async def test_add_robot_creates_asyncio_managers():
+    simulators = await start_simulators(6)
+    try:
+        coordinator = Coordinator()
+        for name, robot_simulators in (
+            ("left", simulators[:3]),
+            ("right", simulators[3:]),
+        ):
+            await coordinator.add_robot(
+                name,
+                colony_depth=40_000,
+                well_depth=30_000,
+                endpoints=[simulator.endpoint for simulator in robot_simulators],
+                cycle_time=0.005,
+            )
+        with pytest.raises(DriveManagerError, match="Duplicate robot name"):
+            await coordinator.add_robot("left", colony_depth=0, well_depth=0)
+
+        for robot in coordinator.robots.values():
+            drives = [robot.manager._get_drive(axis) for axis in robot.manager.axes]
+            assert all(drive.engine == IOEngine.ASYNCIO for drive in drives)
+            assert all(drive.io_task is not None for drive in drives)
+        await coordinator.terminate()
+        for robot in coordinator.robots.values():
+            assert terminated(robot.manager)
+    finally:
+        for simulator in simulators:
+            await simulator.stop()
@@ -0,0 +1,196 @@
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+from libmotorctrl import DriveActionError, DriveState, IOEngine
+from libmotorctrl.drive import Drive, OpMode
+from libmotorctrl.simulator import start_simulators
+
+ENGINES = pytest.mark.parametrize("engine", list(IOEngine), ids=lambda e: e.name)
+
+
+@contextlib.asynccontextmanager
+async def connected_drive(engine, **simulator_args):
+    """Start a simulated drive and connect a `Drive` to it, yielding both."""
+    (simulator,) = await start_simulators(1, **simulator_args)
+    drive = Drive(
+        "X",
+        simulator.host,
+        simulator.port,
+        engine=engine,
+        cycle_time=0.005,
+        autoconnect=False,
+        step_timeout=0.5,
+        reconnect_delay=0.01,
+        reconnect_delay_max=0.04,
+        request_timeout=0.2,
+    )
+    try:
+        await drive.connect()
+        yield drive, simulator
+    finally:
+        await drive.terminate()
+        await simulator.stop()
+
+
+async def initialized_drive(drive):
+    await drive.initialize_reg()
+    await drive.home()
+
+
+async def wait_until(condition, timeout=2.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+@ENGINES
+async def test_initialize_reg(engine):
+    async with connected_drive(engine) as (drive, simulator):
+        await drive.initialize_reg()
+        status = drive.reg_status
+        assert status.drive_enabled and status.operation_enabled
+        assert not status.halt_active
+        assert status.operation_mode == OpMode.DIRECTAPP
+        assert drive.get_status() == DriveState.NOHOME
+        assert simulator.drive.enabled
+
+
+@ENGINES
+async def test_home(engine):
+    away_from_home = connected_drive(engine, position=100_000, homing_speed=1_000_000)
+    async with away_from_home as (drive, simulator):
+        await drive.initialize_reg()
+        await drive.home()
+        assert drive.get_status() == DriveState.READY
+        assert drive.get_encoder_position() == 0
+        assert not drive.reg_status.ack_start
+
+
+@ENGINES
+async def test_move(engine):
+    async with connected_drive(engine, max_speed=1_000_000) as (drive, simulator):
+        await initialized_drive(drive)
+        await drive.start_move(200_000)
+        # The start handshake is complete once the call returns
+        assert not drive.reg_control.positioning_start
+        assert not drive.reg_status.ack_start
+        assert simulator.drive.target == 200_000
+        await drive.wait_motion_complete()
+        assert drive.get_encoder_position() == 200_000
+
+        await drive.move(50_000, speed=50)
+        assert drive.get_encoder_position() == 50_000
+
+
+@ENGINES
+async def test_start_positioning_fault(engine):
+    async with connected_drive(engine) as (drive, simulator):
+        await drive.initialize_reg()
+        # Positioning requires a homing reference
+        with pytest.raises(DriveActionError, match="Movement aborted"):
+            await drive.start_move(100_000)
+        assert drive.get_status() == DriveState.ERROR
+
+        await drive.reset_error()
+        await drive.home()
+        with pytest.raises(DriveActionError, match="Movement aborted"):
+            await drive.start_move(600_000)
+        assert not drive.reg_control.positioning_start
+
+
+@ENGINES
+async def test_invalid_speed(engine):
+    async with connected_drive(engine) as (drive, simulator):
+        await initialized_drive(drive)
+        with pytest.raises(DriveActionError, match="Invalid speed"):
+            await drive.start_move(100_000, speed=0)
+
+
+@ENGINES
+async def test_wait_for_step_timeout(engine):
+    async with connected_drive(engine) as (drive, simulator):
+        start = time.monotonic()
+        with pytest.raises(DriveActionError, match="Timed out waiting for never"):
+            await drive.wait_for(lambda: False, "never", 0.05)
+        assert 0.05 <= time.monotonic() - start < 0.3
+
+        # Without a timeout, the step timeout applies
+        start = time.monotonic()
+        with pytest.raises(DriveActionError, match="Timed out"):
+            await drive.wait_for(lambda: False, "never")
+        assert time.monotonic() - start >= drive.step_timeout
+
+
+@ENGINES
+async def test_connection_loss_marks_status_stale(engine):
+    async with connected_drive(engine) as (drive, simulator):
+        await initialized_drive(drive)
+        cycles = drive.cycle_count
+        await simulator.stop()
+        await wait_until(lambda: drive.reg_status.stale)
+        assert drive.connection_losses >= 1
+        with pytest.raises(DriveActionError, match="Connection to drive lost"):
+            drive.get_status()
+        with pytest.raises(DriveActionError, match="Connection to drive lost"):
+            await drive.wait_for(lambda: True, "anything")
+
+        # The worker reconnects once the drive is back
+        await simulator.start()
+        await wait_until(lambda: not drive.reg_status.stale)
+        assert drive.cycle_count > cycles
+        assert drive.get_status() == DriveState.READY
+
+
+@ENGINES
+async def test_wait_for_fails_on_connection_loss(engine):
+    async with connected_drive(engine) as (drive, simulator):
+        await drive.initialize_reg()
+        waiting = asyncio.create_task(drive.wait_for(lambda: False, "never", 5.0))
+        await asyncio.sleep(0.05)
+        await simulator.stop()
+        with pytest.raises(DriveActionError, match="Connection lost waiting for never"):
+            await waiting
+
+
+@ENGINES
+async def test_reconnect_backs_off(engine):
+    async with connected_drive(engine) as (drive, simulator):
+        await drive.initialize_reg()
+        delays = []
+        sleep_cycle = drive._sleep_cycle
+
+        async def record_sleep(period=None):
+            if period is not None:
+                delays.append(period)
+            await sleep_cycle(period)
+
+        drive._sleep_cycle = record_sleep
+        await simulator.stop()
+        await wait_until(lambda: len(delays) >= 5)
+        assert delays[:5] == [0.01, 0.02, 0.04, 0.04, 0.04]
+
+        await simulator.start()
+        await wait_until(lambda: not drive.reg_status.stale)
+        assert drive.get_status() == DriveState.NOHOME
+
+
+@ENGINES
+async def test_connection_lost_mid_move(engine):
+    async with connected_drive(engine, max_speed=200_000) as (drive, simulator):
+        await initialized_drive(drive)
+        await drive.start_move(400_000)
+        moving = asyncio.create_task(drive.wait_motion_complete())
+        await wait_until(lambda: drive.get_encoder_position() > 50_000)
+        await simulator.stop()
+        with pytest.raises(DriveActionError, match="Connection lost"):
+            await moving
+
+        await simulator.start()
+        await wait_until(lambda: not drive.reg_status.stale)
+        assert 50_000 < drive.get_encoder_position() <= 400_000
+        # The motion carried on while the drive was disconnected
+        await drive.wait_motion_complete()
+        assert drive.get_encoder_position() == 400_000
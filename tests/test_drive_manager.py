@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from libmotorctrl import DriveState, IOEngine
+from libmotorctrl.drive_manager import DriveManagerError
+
+
+def terminated(manager):
+    return all(manager._get_drive(axis).terminated for axis in manager.axes)
+
+
+async def test_execute_path_returns_waypoint_timings(simulated_manager):
+    async with simulated_manager() as (manager, simulators):
+        path = [(100_000, 50_000, 40_000, 0.05), (120_000, 60_000, 30_000, 0)]
+        timings = await manager.execute_path(path)
+        assert [timing.target for timing in timings] == [
+            waypoint[:3] for waypoint in path
+        ]
+        assert timings[0].dwell_time >= 0.05
+        assert timings[1].start >= timings[0].end
+        x, y, z = manager.get_position_raw()
+        x_cal, y_cal = manager._calibration_offset
+        assert (x - x_cal, y - y_cal, z) == path[-1][:3]
+
+
+async def test_execute_path_fetches_the_next_waypoint_during_motion(
+    simulated_manager,
+):
+    async with simulated_manager() as (manager, simulators):
+        requested = []
+
+        async def waypoints():
+            for index in range(3):
+                requested.append(time.monotonic())
+                # Computing the next target takes a while
+                await asyncio.sleep(0.05)
+                yield (100_000 + 50_000 * index, 50_000, 40_000, 0)
+
+        timings = await manager.execute_path(waypoints())
+        assert len(timings) == 3
+        for timing, request in zip(timings, requested[1:]):
+            assert timing.start <= request < timing.arrival
+        # Only the first waypoint was waited for
+        assert timings[1].start - timings[0].end < 0.05
+
+
+async def test_execute_path_checks_sequences_before_moving(simulated_manager):
+    async with simulated_manager() as (manager, simulators):
+        position = manager.get_position_raw()
+        with pytest.raises(DriveManagerError, match="Waypoint 1"):
+            await manager.execute_path(
+                [(100_000, 50_000, 40_000, 0), (1_000_000, 0, 0, 0)]
+            )
+        assert manager.get_position_raw() == position
+        assert terminated(manager)
+
+
+async def test_execute_path_stops_at_streamed_waypoint_out_of_bounds(
+    simulated_manager,
+):
+    async with simulated_manager() as (manager, simulators):
+        waypoints = iter([(100_000, 50_000, 40_000, 0), (1_000_000, 0, 0, 0)])
+        with pytest.raises(DriveManagerError, match="Waypoint 1"):
+            await manager.execute_path(waypoints)
+        assert manager.get_position_raw()[2] == 40_000
+        assert terminated(manager)
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda manager: manager.move(1_000_000, 0, 0),
+        lambda manager: manager.execute_path([(0, 0, 0, 0), (0, -1_000_000, 0, 0)]),
+        lambda manager: manager.define_locations([(0, 0), (1_000_000, 0)]),
+    ],
+    ids=["move", "execute_path", "define_locations"],
+)
+async def test_out_of_bounds_targets_terminate_the_drives(simulated_manager, call):
+    async with simulated_manager() as (manager, simulators):
+        position = manager.get_position_raw()
+        with pytest.raises(DriveManagerError, match="exceeds limits"):
+            await call(manager)
+        assert manager.get_position_raw() == position
+        assert terminated(manager)
+
+
+@pytest.mark.parametrize("engine", list(IOEngine), ids=lambda e: e.name)
+@pytest.mark.parametrize("autoconnect", [True, False])
+async def test_create_ignores_autoconnect(simulated_manager, engine, autoconnect):
+    manager_args = {"engine": engine, "home": False, "autoconnect": autoconnect}
+    async with simulated_manager(**manager_args) as (manager, simulators):
+        for axis in manager.axes:
+            assert manager._get_drive(axis).get_status() == DriveState.NOHOME
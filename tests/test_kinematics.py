@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from libmotorctrl.codec import CONTROL_CODEC, STATUS_CODEC
+from libmotorctrl.drive import ControlRegisters, OpMode
+from libmotorctrl.kinematics import AxisModel
+from libmotorctrl.simulator.model import SimulatedDrive
+
+MAX_SPEED = 200_000
+ACCELERATION = 2_000_000
+
+
+def simulate(moves, seed=0):
+    """Record the status history of a simulated axis making `moves`, a list
+    of (target, speed) pairs, after homing from 300 mm.
+
+    The axis is polled every 10 ms with 2 ms of jitter, and each snapshot is
+    timestamped up to 1 ms away from when it was read, like the drive
+    worker."""
+    rng = random.Random(seed)
+    now = 0.0
+    drive = SimulatedDrive(
+        max_speed=MAX_SPEED,
+        acceleration=ACCELERATION,
+        position=300_000,
+        clock=lambda: now,
+    )
+    control = ControlRegisters(*CONTROL_CODEC.decode([0, 0, 0, 0]))
+    control.drive_enabled = control.operation_enabled = True
+    control.halt_active = False
+    control.operation_mode = OpMode.DIRECTAPP
+    history = {name: [] for name in ("timestamp", *STATUS_CODEC.names)}
+
+    def poll():
+        nonlocal now
+        now += 0.01 + rng.uniform(-0.002, 0.002)
+        status = dict(zip(STATUS_CODEC.names, STATUS_CODEC.decode(drive.read())))
+        history["timestamp"].append(now + rng.uniform(-0.001, 0.001))
+        for name, value in status.items():
+            history[name].append(value)
+        return status
+
+    def run(**start):
+        for _ in range(10):
+            poll()
+        for name, value in start.items():
+            setattr(control, name, value)
+        drive.write(CONTROL_CODEC.encode(control))
+        poll()
+        control.homing_start = control.positioning_start = False
+        drive.write(CONTROL_CODEC.encode(control))
+        while not poll()["motion_complete"]:
+            pass
+
+    run(homing_start=True)
+    for target, speed in moves:
+        run(positioning_start=True, setpoint=target, preselection=speed)
+    for _ in range(10):
+        poll()
+    return history
+
+
+def test_calibrate_on_simulator():
+    rng = random.Random(1)
+    moves = []
+    position = 0
+    for _ in range(40):
+        distance = rng.choice([2_000, 5_000, 10_000, 20_000, 50_000, 150_000])
+        position = distance if position > 250_000 else position + distance
+        moves.append((position, 100))
+    # Moves at reduced speed are left out of the fit
+    moves += [(position - 150_000, 50), (position, 25)]
+
+    history = simulate(moves)
+    model = AxisModel.calibrate(
+        history["timestamp"],
+        history["position"],
+        history["is_moving"],
+        history["motion_complete"],
+    )
+    assert model.max_velocity == pytest.approx(MAX_SPEED, rel=0.05)
+    assert model.acceleration == pytest.approx(ACCELERATION, rel=0.1)
+    assert model.settle_time < 0.02
+
+    predicted = model.move_time(np.array([5_000, 50_000, 150_000]))
+    exact = AxisModel(MAX_SPEED, ACCELERATION).move_time(
+        np.array([5_000, 50_000, 150_000])
+    )
+    assert predicted == pytest.approx(exact, abs=0.01)
+
+
+def test_calibrate_without_moves_raises():
+    history = simulate([])
+    with pytest.raises(ValueError, match="no complete moves"):
+        AxisModel.calibrate(
+            history["timestamp"][-5:],
+            history["position"][-5:],
+            history["is_moving"][-5:],
+            history["motion_complete"][-5:],
+        )
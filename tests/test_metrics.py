@@ -0,0 +1,31 @@
+import pytest
+
+from libmotorctrl import InMemoryMetrics, MetricsSink
+
+
+def test_sinks_must_implement_every_metric():
+    class HistogramsOnly(MetricsSink):
+        def histogram(self, name, description, **labels):
+            return None
+
+    with pytest.raises(TypeError):
+        MetricsSink()
+    with pytest.raises(TypeError):
+        HistogramsOnly()
+
+
+def test_in_memory_metrics():
+    metrics = InMemoryMetrics(buckets=(0.1, 1.0))
+    latency = metrics.histogram("latency_seconds", "Latency", drive="X")
+    assert metrics.histogram("latency_seconds", "Latency", drive="X") is latency
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value)
+    metrics.counter("errors_total", "Errors", drive="X").inc()
+
+    assert metrics.get("latency_seconds", drive="X").bucket_counts == [1, 2, 1]
+    assert metrics.get("latency_seconds", drive="X").mean == pytest.approx(1.5125)
+    assert metrics.get("latency_seconds", drive="Y") is None
+    text = metrics.to_prometheus()
+    assert 'latency_seconds_bucket{drive="X",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{drive="X",le="+Inf"} 4' in text
+    assert 'errors_total{drive="X"} 1' in text
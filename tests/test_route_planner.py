@@ -0,0 +1,105 @@
+import random
+import time
+
+import pytest
+
+from libmotorctrl.route_planner import Pick, plan_picks, route_cost
+
+COLONIES = [(100_000, 0), (110_000, 5_000), (120_000, -5_000), (130_000, 0)]
+WELLS = [(267_790 + i * 9_070, 31_080) for i in range(6)]
+STERILIZER = (461_330, 87_950)
+
+
+@pytest.mark.parametrize("sterilize_every", [0, -1])
+def test_invalid_sterilize_every_raises(sterilize_every):
+    with pytest.raises(ValueError, match="sterilize_every"):
+        plan_picks(COLONIES, WELLS, STERILIZER, sterilize_every=sterilize_every)
+
+
+def test_sterilize_every():
+    picks = plan_picks(COLONIES, WELLS, STERILIZER, sterilize_every=3)
+    assert [pick.sterilize for pick in picks] == [False, False, True, True]
+
+
+def random_run(colony_count, well_count, seed):
+    """Colonies scattered over a Petri dish, and wells in 96-well plates
+    lined up beside it."""
+    rng = random.Random(seed)
+    colonies = [
+        (rng.randrange(0, 90_000), rng.randrange(0, 90_000))
+        for _ in range(colony_count)
+    ]
+    wells = [
+        (150_000 + plate * 120_000 + column * 9_000, row * 9_000)
+        for plate in range(well_count // 96 + 1)
+        for row in range(8)
+        for column in range(12)
+    ][:well_count]
+    return colonies, wells
+
+
+def sterilizer_visits(count, sterilize_every):
+    return [(i + 1) % sterilize_every == 0 or i == count - 1 for i in range(count)]
+
+
+@pytest.mark.parametrize("sterilizer", [STERILIZER, None])
+@pytest.mark.parametrize("sterilize_every", [1, 3])
+def test_each_colony_gets_a_distinct_well(sterilizer, sterilize_every):
+    colonies, wells = random_run(200, 250, seed=1)
+    picks = plan_picks(colonies, wells, sterilizer, sterilize_every=sterilize_every)
+    assert sorted(pick.colony_index for pick in picks) == list(range(200))
+    assert len({pick.well_index for pick in picks}) == 200
+    for pick in picks:
+        assert pick.colony == colonies[pick.colony_index]
+        assert pick.well == wells[pick.well_index]
+
+
+def test_more_colonies_than_wells():
+    colonies, wells = random_run(100, 40, seed=2)
+    picks = plan_picks(colonies, wells, STERILIZER)
+    assert sorted(pick.colony_index for pick in picks) == list(range(40))
+    assert sorted(pick.well_index for pick in picks) == list(range(40))
+
+
+@pytest.mark.parametrize("sterilize_every", [1, 2, 3, 5, 11, 20])
+def test_sterilizer_visits_follow_sterilize_every(sterilize_every):
+    colonies, wells = random_run(11, 96, seed=3)
+    picks = plan_picks(colonies, wells, STERILIZER, sterilize_every=sterilize_every)
+    assert [pick.sterilize for pick in picks] == sterilizer_visits(11, sterilize_every)
+
+
+def test_no_sterilizer_visits_without_sterilizer():
+    colonies, wells = random_run(11, 96, seed=3)
+    picks = plan_picks(colonies, wells, sterilize_every=2)
+    assert not any(pick.sterilize for pick in picks)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("sterilize_every", [1, 4])
+def test_plan_is_no_worse_than_input_order(seed, sterilize_every):
+    colonies, wells = random_run(150, 192, seed)
+    picks = plan_picks(colonies, wells, STERILIZER, sterilize_every=sterilize_every)
+    in_order = [
+        Pick(i, i, colonies[i], wells[i], sterilize)
+        for i, sterilize in enumerate(sterilizer_visits(150, sterilize_every))
+    ]
+    assert route_cost(picks, STERILIZER, STERILIZER) <= route_cost(
+        in_order, STERILIZER, STERILIZER
+    )
+
+
+@pytest.mark.parametrize("sterilize_every", [1, 3])
+def test_thousands_of_colonies_within_time_budget(sterilize_every):
+    colonies, wells = random_run(2000, 2400, seed=4)
+    time_budget = 0.25
+    start = time.monotonic()
+    picks = plan_picks(
+        colonies,
+        wells,
+        STERILIZER,
+        sterilize_every=sterilize_every,
+        time_budget=time_budget,
+    )
+    # Allow for building the returned picks once the budget has run out
+    assert time.monotonic() - start < time_budget * 1.1
+    assert len({pick.well_index for pick in picks}) == 2000
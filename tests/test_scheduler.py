@@ -0,0 +1,213 @@
+import asyncio
+import time
+
+import pytest
+
+from libmotorctrl import DwellScheduler, Tool
+from libmotorctrl.drive_manager import CRUISE_DEPTH, DriveManagerError
+from libmotorctrl.route_planner import Pick
+
+MOVE_TIME = 0.02
+"""The time in seconds each move of the `FakeManager` takes."""
+
+STERILIZER = (400_000, 80_000, 60_000)
+
+
+class FakeManager:
+    """Records the moves and paths requested by a `DwellScheduler`, which
+    each take `MOVE_TIME` seconds, plus the dwells of paths."""
+
+    def __init__(self):
+        self.log = []
+
+    async def move(self, x, y, z, profile=None):
+        self.log.append(("move", (x, y, z)))
+        await asyncio.sleep(MOVE_TIME)
+
+    async def execute_path(self, waypoints, profile=None):
+        waypoints = list(waypoints)
+        self.log.append(("path", waypoints))
+        for *_, dwell in waypoints:
+            await asyncio.sleep(MOVE_TIME + dwell)
+        self.log.append(("path done", waypoints))
+
+
+def make_picks(count, sterilize=True):
+    return [
+        Pick(
+            colony_index=index,
+            well_index=index,
+            colony=(10_000 * index, 20_000),
+            well=(10_000 * index, 200_000),
+            sterilize=sterilize,
+        )
+        for index in range(count)
+    ]
+
+
+def make_scheduler(manager, **args):
+    args = {"dwell": 0.05, "cooldown": 0.0, **args}
+    return DwellScheduler(
+        manager,
+        colony_depth=80_000,
+        well_depth=70_000,
+        sterilizer=STERILIZER,
+        **args,
+    )
+
+
+async def test_tool_ready():
+    tool = Tool("loop")
+    assert tool.ready
+    start = time.monotonic()
+    await tool.wait_ready()
+    assert time.monotonic() - start < 0.01
+
+    tool.ready_at = time.monotonic() + 0.1
+    assert not tool.ready
+    await tool.wait_ready()
+    assert time.monotonic() >= tool.ready_at
+    assert tool.ready
+
+
+def test_tools_are_validated():
+    with pytest.raises(DriveManagerError):
+        make_scheduler(FakeManager(), tools=[])
+    with pytest.raises(DriveManagerError):
+        make_scheduler(FakeManager(), tools=[Tool("loop"), Tool("loop")])
+
+
+async def test_sterilize_dwells_in_one_path():
+    manager = FakeManager()
+    tool = Tool("offset", offset=(1_000, 2_000, 3_000))
+    scheduler = make_scheduler(manager, cooldown=10, tools=[tool])
+    await scheduler.sterilize()
+    assert manager.log[0] == ("path", [(399_000, 78_000, 57_000, 0.05)])
+    assert tool.ready_at - time.monotonic() == pytest.approx(10, abs=0.1)
+    assert scheduler.tool is tool
+
+
+async def test_sterilize_alternates_tools():
+    tools = [Tool("a"), Tool("b"), Tool("c")]
+    scheduler = make_scheduler(FakeManager(), cooldown=10, tools=tools)
+    used = []
+    for _ in range(3):
+        used.append(scheduler.tool.name)
+        await scheduler.sterilize()
+    assert used == ["a", "b", "c"]
+
+    # With every tool cooling, the one sterilized first is ready soonest
+    assert scheduler.tool.name == "a"
+
+
+async def test_sterilize_prefers_the_tool_ready_soonest():
+    tools = [Tool("a"), Tool("b"), Tool("c")]
+    tools[1].ready_at = time.monotonic() + 60
+    scheduler = make_scheduler(FakeManager(), tools=tools)
+    await scheduler.sterilize()
+    assert scheduler.tool.name == "c"
+    await scheduler.sterilize()
+    assert scheduler.tool.name == "a"
+
+
+async def test_run_moves_and_deposits_each_pick():
+    manager = FakeManager()
+    scheduler = make_scheduler(manager, tools=[Tool("loop", offset=(0, 0, 5_000))])
+    picks = make_picks(2)
+    deposited = []
+
+    def on_deposit(pick):
+        # The sterilizer has not been visited yet
+        assert manager.log[-1] == ("path done", pick_path(pick))
+        deposited.append(pick.well_index)
+
+    def pick_path(pick):
+        return [(*pick.colony, 75_000, 0), (*pick.well, 65_000, 0)]
+
+    scheduled = await scheduler.run(picks, on_deposit=on_deposit)
+    assert deposited == [0, 1]
+    sterilizer_path = [(STERILIZER[0], STERILIZER[1], 55_000, 0.05)]
+    assert [entry for event, entry in manager.log if event == "path"] == [
+        pick_path(picks[0]),
+        sterilizer_path,
+        pick_path(picks[1]),
+        sterilizer_path,
+    ]
+    assert [result.pick for result in scheduled] == picks
+    assert all(result.tool == "loop" for result in scheduled)
+    assert all(result.end > result.start for result in scheduled)
+
+
+async def test_run_skips_unrequested_sterilization():
+    manager = FakeManager()
+    scheduler = make_scheduler(manager)
+    picks = make_picks(3, sterilize=False)
+    picks[1].sterilize = True
+    await scheduler.run(picks)
+    paths = [entry for event, entry in manager.log if event == "path"]
+    assert len(paths) == 4
+    assert paths[2] == [(*STERILIZER, 0.05)]
+
+
+async def test_run_waits_for_cooling_above_the_colony():
+    manager = FakeManager()
+    scheduler = make_scheduler(manager, cooldown=0.2)
+    picks = make_picks(2)
+    await scheduler.run(picks)
+
+    # The second pick travels to the colony at cruise depth, then waits
+    second_pick = manager.log.index(("path done", [(*STERILIZER, 0.05)])) + 1
+    assert manager.log[second_pick] == ("move", (10_000, 20_000, CRUISE_DEPTH))
+    assert manager.log[second_pick + 1][0] == "path"
+    assert scheduler.wait_time == pytest.approx(0.2 - MOVE_TIME, abs=0.05)
+
+
+async def test_run_alternates_tools_while_cooling():
+    manager = FakeManager()
+    tools = [Tool("left"), Tool("right", offset=(20_000, 0, 0))]
+    scheduler = make_scheduler(manager, cooldown=10, tools=tools)
+    scheduled = await scheduler.run(make_picks(2))
+    assert [result.tool for result in scheduled] == ["left", "right"]
+    assert scheduler.wait_time == 0
+    assert not any(event == "move" for event, entry in manager.log)
+    paths = [entry for event, entry in manager.log if event == "path"]
+    assert paths[3] == [(STERILIZER[0] - 20_000, *STERILIZER[1:], 0.05)]
+
+
+async def test_run_prepares_the_next_pick_during_the_current_one():
+    manager = FakeManager()
+    scheduler = make_scheduler(manager)
+    picks = make_picks(3)
+    prepared = []
+
+    async def prepare(pick):
+        manager.log.append(("prepare", pick.colony_index))
+        await asyncio.sleep(MOVE_TIME)
+        prepared.append(pick.colony_index)
+
+    await scheduler.run(picks, prepare=prepare)
+    assert prepared == [0, 1, 2]
+
+    # Each pick after the first is prepared as soon as the previous pick
+    # starts, before its motion has finished
+    for index in (1, 2):
+        previous = picks[index - 1]
+        path = [(*previous.colony, 80_000, 0), (*previous.well, 70_000, 0)]
+        preparing = manager.log.index(("prepare", index))
+        assert manager.log.index(("path", path)) < preparing
+        assert preparing < manager.log.index(("path done", path))
+
+
+async def test_run_stops_on_prepare_error():
+    manager = FakeManager()
+    scheduler = make_scheduler(manager)
+    picks = make_picks(3)
+    deposited = []
+
+    async def prepare(pick):
+        if pick.colony_index == 1:
+            raise RuntimeError("Colony not found")
+
+    with pytest.raises(RuntimeError):
+        await scheduler.run(picks, prepare=prepare, on_deposit=deposited.append)
+    assert deposited == picks[:1]
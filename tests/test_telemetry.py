@@ -0,0 +1,49 @@
+import pytest
+
+from libmotorctrl.codec import STATUS_CODEC
+from libmotorctrl.telemetry import TelemetryRecorder, load_telemetry
+
+
+def test_record_after_close_is_ignored(tmp_path):
+    recorder = TelemetryRecorder(tmp_path / "run.tlm", capacity=16)
+    axis = recorder.add_axis("X")
+    recorder.record(axis, 1.0, 1, [0, 0, 0, 0])
+    recorder.close()
+
+    recorder.record(axis, 2.0, 2, [0, 0, 0, 0])
+    recorder.flush()
+    recorder.close()
+
+
+def test_axis_names_are_validated(tmp_path):
+    with TelemetryRecorder(tmp_path / "run.tlm", capacity=16) as recorder:
+        assert recorder.add_axis("X") == 0
+        with pytest.raises(ValueError):
+            recorder.add_axis("X")
+        with pytest.raises(ValueError):
+            recorder.add_axis("pipette-rotation-2")
+        with pytest.raises(ValueError):
+            recorder.add_axis("rotary-\u00e4xis-1234")
+        assert recorder.add_axis("pipette-rotate-1") == 1
+
+
+def test_load_round_trip(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "run.tlm"
+    registers = [[0x0317, 0x0132, 0xFFFF, 0xFF38], [0x0205, 0x0000, 0x0001, 0x0000]]
+    with TelemetryRecorder(path, capacity=16) as recorder:
+        x_axis, y_axis = recorder.add_axis("X"), recorder.add_axis("Y")
+        recorder.record(x_axis, 1.0, 1, registers[0])
+        recorder.record(y_axis, 1.5, 1, registers[1])
+        recorder.record(x_axis, 2.0, 2, registers[1])
+
+    telemetry = load_telemetry(path)
+    assert list(telemetry["X"]["timestamp"]) == [1.0, 2.0]
+    assert list(telemetry["Y"]["cycle"]) == [1]
+    for arrays, expected in (
+        (telemetry["X"], registers),
+        (telemetry["Y"], registers[1:]),
+    ):
+        for index, raw in enumerate(expected):
+            decoded = dict(zip(STATUS_CODEC.names, STATUS_CODEC.decode(raw)))
+            assert {name: arrays[name][index] for name in decoded} == decoded